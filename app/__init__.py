@@ -21,6 +21,8 @@ def create_app(config_name='default'):
     else:
         app.config.from_object(DevelopmentConfig)
 
+    app.config['CONFIG_NAME'] = config_name
+
     # Configure Babel translations
     app.config['BABEL_TRANSLATION_DIRECTORIES'] = '../translations'
 
@@ -32,8 +34,9 @@ def create_app(config_name='default'):
     def make_session_permanent():
         session.permanent = True  # Ensure all sessions respect PERMANENT_SESSION_LIFETIME
 
-    # Initialize database
-    # db.init_app(app)
+    # Initialize database (CV drafts)
+    from app.drafts import init_drafts
+    init_drafts(app)
 
     def get_locale():
         if 'lang' in request.args:
@@ -85,8 +88,46 @@ def create_app(config_name='default'):
     # Ensure upload directory exists
     os.makedirs(app.config.get('UPLOAD_FOLDER', 'uploads'), exist_ok=True)
 
+    # In-memory store for generated CVs (used when they are not persisted to disk)
+    from app.pdf_store import GeneratedCVStore
+    app.extensions['generated_cvs'] = GeneratedCVStore(app.config.get('GENERATED_CV_STORE_SIZE', 256))
+
+    # Content-addressed cache of rendered CVs
+    from app.render_cache import RenderCache
+    app.extensions['render_cache'] = RenderCache(app.config.get('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+                                                 app.config.get('RENDER_CACHE_MAX_ENTRIES', 512))
+
+    # Timing spans of the render stages
+    from app.tracing import Tracer
+    app.extensions['render_tracer'] = Tracer(app.config.get('RENDER_TRACING', True),
+                                             app.config.get('RENDER_TRACE_EVENTS', 2000))
+
+    # Background render jobs
+    from app.jobs import JobQueue
+    app.extensions['render_jobs'] = JobQueue(app, app.config.get('RENDER_JOB_BACKEND', 'thread'),
+                                             app.config.get('RENDER_JOB_WORKERS', 2),
+                                             app.config.get('RENDER_JOB_QUEUE_SIZE', 32),
+                                             max_age=app.config.get('RENDER_JOB_MAX_AGE', 3600))
+    if not app.config.get('PERSIST_GENERATED_CV', True) and app.config.get('RENDER_JOB_BACKEND') != 'sync':
+        app.logger.warning('PERSIST_GENERATED_CV is off: render jobs can only be followed from the worker '
+                           'that ran them, run a single web worker')
+
+    # Large session values (the CV being edited) are kept server side
+    from app.session_store import init_session_store
+    init_session_store(app)
+
     # Import and register blueprints
     from app.routes import main
     app.register_blueprint(main)
 
+    # Register CLI commands (flask cv ...)
+    from app.cli import cv_cli
+    app.cli.add_command(cv_cli)
+
+    # Shared read-only render resources, loaded once before the workers are forked
+    from app.warmup import RenderWarmup
+    app.extensions['render_warmup'] = RenderWarmup()
+    if app.config.get('PREFORK_WARMUP', False):
+        app.extensions['render_warmup'].run(app)
+
     return app
@@ -0,0 +1,138 @@
+"""
+Backends replaying display lists.
+
+paint_fitz draws a display list on a fitz page: all vector operations go
+through a single Shape, so each page gets one content stream instead of one
+per operation. rasterize draws display lists with Pillow, for previews that
+do not need a PDF.
+"""
+import threading
+from io import BytesIO
+
+import fitz
+from PIL import Image, ImageDraw, ImageFont
+
+from .fonts import font_registry
+from .icons import icon_library
+
+
+def paint_fitz(page, display_list):
+    """
+    Draw a display list on a fitz page.
+
+    Fonts other than the base-14 ones must already be registered on the page.
+    Images are inserted as they come; text is written above the vector
+    graphics of the same display list.
+    """
+    shape = page.new_shape()
+
+    for op in display_list:
+        kind = op[0]
+        if kind == 'text':
+            _, x, y, text, fontname, fontsize, color = op
+            shape.insert_text((x, y), text, fontsize=fontsize, fontname=fontname, color=color)
+        elif kind == 'line':
+            _, x0, y0, x1, y1, color, width = op
+            shape.draw_line((x0, y0), (x1, y1))
+            shape.finish(color=color, width=width, closePath=False)
+        elif kind == 'circle':
+            _, x, y, radius, color, fill = op
+            shape.draw_circle((x, y), radius)
+            shape.finish(color=color, fill=fill)
+        elif kind == 'rect':
+            _, x0, y0, x1, y1, color, fill = op
+            shape.draw_rect(fitz.Rect(x0, y0, x1, y1))
+            shape.finish(color=color, fill=fill)
+        elif kind == 'icon':
+            _, x, y, name, size, color = op
+            width, paths = icon_library.paths(name, size)
+            for points, closed in paths:
+                shape.draw_polyline([(x + dx, y + dy) for dx, dy in points])
+                shape.finish(color=color, width=width, closePath=closed, lineCap=1, lineJoin=1)
+        else:
+            _, x0, y0, x1, y1, stream = op
+            page.insert_image(fitz.Rect(x0, y0, x1, y1), stream=stream)
+
+    shape.commit()
+
+
+class RasterFonts:
+    """Pillow fonts built from the same font files the PDFs use, per name and pixel size"""
+
+    def __init__(self, registry=font_registry):
+        self.registry = registry
+        self._fonts = {}
+        self._lock = threading.Lock()
+
+    def get(self, fontname, pixel_size):
+        key = (fontname, pixel_size)
+        font = self._fonts.get(key)
+        if font is None:
+            if fontname in self.registry.font_files:
+                buffer = self.registry.get_buffer(fontname)
+            else:
+                buffer = fitz.Font(fontname).buffer  # Base-14 font
+            font = ImageFont.truetype(BytesIO(buffer), pixel_size)
+            with self._lock:
+                font = self._fonts.setdefault(key, font)
+        return font
+
+
+# Shared by every raster preview in the process
+raster_fonts = RasterFonts()
+
+
+def _rgb(color):
+    return None if color is None else tuple(round(c * 255) for c in color)
+
+
+def rasterize(display_lists, scale=1.0, background=(255, 255, 255)):
+    """
+    Draw display lists on top of each other as one page image.
+
+    Args:
+        display_lists (iterable): Display lists of one page, e.g. its template and its content
+        scale (float): Pixels per point (dpi / 72)
+        background (tuple): RGB color of the page
+
+    Returns:
+        PIL.Image.Image: The RGB page image
+    """
+    display_lists = list(display_lists)
+    width, height = display_lists[0].width, display_lists[0].height
+    image = Image.new('RGB', (round(width * scale), round(height * scale)), background)
+    draw = ImageDraw.Draw(image)
+
+    for display_list in display_lists:
+        for op in display_list:
+            kind = op[0]
+            if kind == 'text':
+                _, x, y, text, fontname, fontsize, color = op
+                font = raster_fonts.get(fontname, max(1, round(fontsize * scale)))
+                draw.text((x * scale, y * scale), text, font=font, fill=_rgb(color), anchor='ls')
+            elif kind == 'line':
+                _, x0, y0, x1, y1, color, width = op
+                draw.line((x0 * scale, y0 * scale, x1 * scale, y1 * scale), fill=_rgb(color),
+                          width=max(1, round(width * scale)))
+            elif kind == 'circle':
+                _, x, y, radius, color, fill = op
+                draw.ellipse(((x - radius) * scale, (y - radius) * scale, (x + radius) * scale, (y + radius) * scale),
+                             fill=_rgb(fill), outline=_rgb(color))
+            elif kind == 'rect':
+                _, x0, y0, x1, y1, color, fill = op
+                draw.rectangle((x0 * scale, y0 * scale, x1 * scale, y1 * scale), fill=_rgb(fill), outline=_rgb(color))
+            elif kind == 'icon':
+                _, x, y, name, size, color = op
+                width, paths = icon_library.paths(name, size)
+                for points, closed in paths:
+                    xy = [((x + dx) * scale, (y + dy) * scale) for dx, dy in points]
+                    if closed:
+                        xy.append(xy[0])
+                    draw.line(xy, fill=_rgb(color), width=max(1, round(width * scale)), joint='curve')
+            else:
+                _, x0, y0, x1, y1, stream = op
+                box = (round(x0 * scale), round(y0 * scale), round(x1 * scale), round(y1 * scale))
+                picture = Image.open(BytesIO(stream)).convert('RGBA').resize((box[2] - box[0], box[3] - box[1]))
+                image.paste(picture, box[:2], picture)
+
+    return image
@@ -0,0 +1,230 @@
+"""
+Render benchmarks.
+
+Synthetic cv_data fixtures, from an almost empty CV to one with fifty
+positions, are rendered with CVGenerator.generate outside a request. Each
+case reports wall time, Python allocations and output size, and results can
+be compared with a stored baseline so that a slower or larger render fails
+the run.
+"""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+import fitz
+from flask_babel import force_locale
+from PIL import Image
+
+# Metrics compared with the baseline; larger is worse for all of them
+METRICS = ('wall_ms', 'alloc_peak_kib', 'bytes')
+
+# Relative increase over the baseline reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+BenchmarkCase = namedtuple('BenchmarkCase', ['name', 'language', 'cv_data', 'photo'])
+
+_DESCRIPTION = ("Conception et maintenance des services de paiement mobile, encadrement d'une équipe de "
+                "six développeurs et mise en place de l'intégration continue. ")
+
+_TURKISH_DESCRIPTION = ("Mobil ödeme hizmetlerinin tasarımı ve bakımı, altı kişilik geliştirici ekibinin "
+                        "yönetimi ve sürekli entegrasyonun kurulması. Müşteri şikâyetlerinde %40 azalma sağlandı. ")
+
+
+def _personal_info(first_name='Awa', last_name='Ndiaye', email='awa.ndiaye@example.com',
+                   address='12 Rue Carnot, Dakar', summary=''):
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email,
+        'phone': '+221 77 123 45 67',
+        'address': address,
+        'city': 'Dakar',
+        'professional_summary': summary,
+    }
+
+
+def _cv_data(personal_info, experiences=0, description=_DESCRIPTION, educations=0, skills=0, extras=0):
+    """Build a cv_data payload with the given number of entries in each section"""
+    return {
+        'personal_info': personal_info,
+        'experience': [{
+            'company': f"Entreprise {i + 1}",
+            'position': 'Ingénieure logicielle',
+            'start_date': f"Mar {2000 + i % 24} - Jan {2001 + i % 24}",
+            'end_date': '',
+            'description_': description,
+        } for i in range(experiences)],
+        'education': [{
+            'institution': 'Université Cheikh Anta Diop',
+            'degree': 'Master Informatique',
+            'start_date': f"{1995 + i}-09-01",
+            'end_date': f"{1997 + i}-07-01",
+        } for i in range(educations)],
+        'skills': [{'skill': f"Compétence {i + 1}"} for i in range(skills)],
+        'languages': [{'language': 'Français', 'level': 'Natif'}, {'language': 'Wolof', 'level': 'Natif'}][:extras],
+        'certifications': [{'name': f"Certification {i + 1}", 'issuer': 'Cisco', 'date': '2021-05-01'}
+                           for i in range(extras)],
+        'hobbys': [{'name': 'Lecture'}, {'name': 'Football'}][:extras],
+        'references': [{'name': 'M. Sow', 'contact': '77 000 00 00', 'company': 'Sonatel'}][:extras],
+        'softwares': [{'name': 'Excel', 'proficiency': 'Avancé'}, {'name': 'Git', 'proficiency': 'Expert'}][:extras],
+    }
+
+
+def benchmark_cases():
+    """
+    The synthetic fixtures, from the smallest to the largest.
+
+    Returns:
+        list: BenchmarkCase tuples; ``photo`` tells whether a profile photo is drawn
+    """
+    typical = _cv_data(_personal_info(summary=_DESCRIPTION * 2), experiences=3, description=_DESCRIPTION * 2,
+                       educations=2, skills=6, extras=2)
+
+    return [
+        BenchmarkCase('minimal', 'fr', _cv_data(_personal_info()), False),
+        BenchmarkCase('typical', 'fr', typical, False),
+        BenchmarkCase('typical_photo', 'fr', typical, True),
+        BenchmarkCase('long_text', 'en', _cv_data(_personal_info(summary=_DESCRIPTION * 20), experiences=3,
+                                                  description=_DESCRIPTION * 15, educations=1, skills=3,
+                                                  extras=1), False),
+        BenchmarkCase('long_email', 'fr', _cv_data(_personal_info(
+            email='awa.ndiaye.diop.service.informatique.direction@example-company-with-a-long-name.sn',
+            address='Immeuble Les Cocotiers, 4e étage, 12 Rue Carnot x Avenue Lamine Guèye, Plateau, Dakar'),
+            experiences=2, educations=1, skills=3, extras=1), False),
+        BenchmarkCase('turkish', 'tr', _cv_data(_personal_info('Şükrü', 'Çağlayan', 'sukru.caglayan@örnek.com.tr',
+                                                               'İstiklal Caddesi 12, Beyoğlu, İstanbul',
+                                                               _TURKISH_DESCRIPTION * 2),
+                                                experiences=4, description=_TURKISH_DESCRIPTION * 2,
+                                                educations=2, skills=5, extras=2), True),
+        BenchmarkCase('large', 'fr', _cv_data(_personal_info(summary=_DESCRIPTION * 4), experiences=50,
+                                              description=_DESCRIPTION * 6, educations=10, skills=20,
+                                              extras=2), True),
+    ]
+
+
+def write_benchmark_photo(path, size=(600, 800)):
+    """Write a synthetic JPEG portrait, large enough to go through downscaling"""
+    width, height = size
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    image.paste((200, 120, 60), (width // 4, height // 5, width * 3 // 4, height * 3 // 5))
+    image.save(path, 'JPEG', quality=90)
+    return path
+
+
+def run_case(case, workdir, repeat=5, photo_path=''):
+    """
+    Benchmark one case with CVGenerator.generate. Needs an app context.
+
+    A first, unmeasured render warms the process-wide caches (fonts, template
+    layers, photos). The wall time is the median of ``repeat`` renders;
+    allocations are measured on a separate render, since tracing them slows
+    the renderer down.
+
+    Args:
+        case (BenchmarkCase): The case to render
+        workdir (str): Folder the PDFs are written to (and removed from)
+        repeat (int): Number of timed renders
+        photo_path (str): Profile photo used when ``case.photo`` is set
+
+    Returns:
+        dict: wall_ms, wall_min_ms, alloc_peak_kib, bytes and pages
+    """
+    from .cv_generator import CVGenerator, DEFAULT_TEMPLATE
+
+    def render():
+        # Outside a request, the translations follow the language of the case
+        with force_locale(case.language):
+            start = time.perf_counter()
+            filename = CVGenerator(case.cv_data, workdir, case.language, photo_path=photo_path if case.photo else '',
+                                   template=DEFAULT_TEMPLATE).generate()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        path = os.path.join(workdir, filename)
+        try:
+            with fitz.open(path) as doc:
+                return elapsed_ms, os.path.getsize(path), doc.page_count
+        finally:
+            os.remove(path)
+
+    render()
+    timings = []
+    for _ in range(max(repeat, 1)):
+        elapsed_ms, size, pages = render()
+        timings.append(elapsed_ms)
+
+    tracemalloc.start()
+    try:
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_ms': round(statistics.median(timings), 2),
+        'wall_min_ms': round(min(timings), 2),
+        'alloc_peak_kib': round(peak / 1024, 1),
+        'bytes': size,
+        'pages': pages,
+    }
+
+
+def run_benchmarks(workdir, repeat=5, names=None):
+    """
+    Run the benchmark cases. Needs an app context.
+
+    Args:
+        workdir (str): Scratch folder for the PDFs and the synthetic photo
+        repeat (int): Number of timed renders per case
+        names (iterable, optional): Only run these cases
+
+    Returns:
+        dict: Case name -> metrics, in fixture order
+    """
+    photo_path = write_benchmark_photo(os.path.join(workdir, 'benchmark_photo.jpg'))
+    return {case.name: run_case(case, workdir, repeat, photo_path)
+            for case in benchmark_cases() if not names or case.name in names}
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find the metrics that grew past the baseline by more than ``threshold``.
+
+    Cases or metrics missing from either side are not compared.
+
+    Args:
+        results (dict): Case name -> metrics, as returned by run_benchmarks
+        baseline (dict): Stored results in the same shape
+        threshold (float): Allowed relative increase, e.g. 0.25 for +25%
+
+    Returns:
+        list: One dict per regression with case, metric, baseline, value and ratio
+    """
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name, {})
+        for metric in METRICS:
+            expected, value = reference.get(metric), metrics.get(metric)
+            if not expected or value is None:
+                continue
+            ratio = value / expected
+            if ratio > 1 + threshold:
+                regressions.append({'case': name, 'metric': metric, 'baseline': expected,
+                                    'value': value, 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def load_baseline(path):
+    """Read a stored baseline, or return an empty one if there is none yet"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('cases', {})
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metrics': list(METRICS), 'cases': results}, f, indent=2)
+        f.write('\n')
@@ -0,0 +1,297 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.utils import secure_filename
+
+from .jobs import init_render_worker, preload_render_resources
+
+cv_cli = AppGroup('cv', help='CV rendering commands.')
+
+
+def _render_record(item):
+    """
+    Render one JSONL record to the output directory.
+
+    A record is either a bare cv_data object or an object with a ``cv_data``
+    key and optional ``id``, ``language``, ``photo_path``, ``template`` and
+    ``profile`` (PDF output profile) keys.
+
+    Returns:
+        dict: The outcome, with either ``file`` or ``error`` set
+    """
+    from .cv_generator import render_pdf
+
+    line_number, line, output_dir, record_id, error = item
+    result = {'line': line_number, 'id': record_id}
+    start = time.perf_counter()
+
+    try:
+        if error:
+            raise ValueError(error)
+        record = json.loads(line)
+        cv_data = record['cv_data'] if 'cv_data' in record else record
+        language = record.get('language', 'fr')
+
+        pdf = render_pdf(cv_data, language, record.get('photo_path', ''), record.get('template'),
+                         record.get('profile'))
+
+        filename = f"{result['id']}.pdf"
+        with open(os.path.join(output_dir, filename), 'wb') as f:
+            f.write(pdf)
+
+        result.update(file=filename, bytes=len(pdf))
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _record_id(line, line_number):
+    """
+    The id of a record, which names its PDF: its ``id`` key, or its line number.
+
+    Raises:
+        ValueError: If the id is not usable as a file name (path separators, '..')
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return str(line_number)  # Reported by the worker
+    if not isinstance(record, dict) or 'cv_data' not in record or record.get('id') is None:
+        return str(line_number)
+
+    record_id = str(record['id'])
+    if secure_filename(record_id) != record_id:
+        raise ValueError(f"Invalid id {record_id!r}: use letters, digits, '.', '-' and '_' only")
+    return record_id
+
+
+def _read_records(input_file, output_dir):
+    """Yield the render items of the records; invalid and duplicate ids are marked as errors"""
+    seen = {}
+    for line_number, line in enumerate(input_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record_id, error = _record_id(line, line_number), None
+        except ValueError as e:
+            record_id, error = str(line_number), str(e)
+        else:
+            if record_id in seen:
+                error = f"Duplicate id {record_id!r}, already used on line {seen[record_id]}"
+            else:
+                seen[record_id] = line_number
+        yield line_number, line, output_dir, record_id, error
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+@cv_cli.command('render-batch')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'))
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('--workers', '-w', default=os.cpu_count() or 1, show_default=True,
+              help='Number of worker processes (0 renders in this process).')
+@click.option('--chunksize', default=8, show_default=True, help='Records sent to a worker at a time.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Where failed records are written (default: OUTPUT_DIR/errors.jsonl).')
+def render_batch(input_file, output_dir, workers, chunksize, errors_path):
+    """Render every cv_data record of a JSONL file to OUTPUT_DIR."""
+    os.makedirs(output_dir, exist_ok=True)
+    errors_path = errors_path or os.path.join(output_dir, 'errors.jsonl')
+    records = _read_records(input_file, output_dir)
+
+    start = time.perf_counter()
+    timings = []
+    failed = 0
+
+    with open(errors_path, 'w', encoding='utf-8') as errors_file:
+        if workers > 0:
+            pool = multiprocessing.Pool(workers, initializer=init_render_worker,
+                                        initargs=(current_app.config.get('CONFIG_NAME', 'default'),))
+            results = pool.imap_unordered(_render_record, records, chunksize=chunksize)
+        else:
+            pool = None
+            preload_render_resources()
+            results = map(_render_record, records)
+
+        try:
+            for result in results:
+                if 'error' in result:
+                    failed += 1
+                    errors_file.write(json.dumps(result, ensure_ascii=False) + '\n')
+                else:
+                    timings.append({'id': result['id'], 'seconds': round(result['seconds'], 4),
+                                    'bytes': result['bytes']})
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    elapsed = time.perf_counter() - start
+    total = len(timings) + failed
+    seconds = sorted(t['seconds'] for t in timings)
+    summary = {
+        'records': total,
+        'rendered': len(timings),
+        'failed': failed,
+        'workers': workers,
+        'wall_seconds': round(elapsed, 3),
+        'records_per_second': round(total / elapsed, 2) if elapsed else 0.0,
+        'p50_seconds': _percentile(seconds, 0.50),
+        'p95_seconds': _percentile(seconds, 0.95),
+        'max_seconds': seconds[-1] if seconds else 0.0,
+        'timings': timings,
+    }
+
+    with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    click.echo(f"Rendered {len(timings)}/{total} CVs in {elapsed:.1f}s "
+               f"({summary['records_per_second']} CV/s, p50 {summary['p50_seconds']:.3f}s, "
+               f"p95 {summary['p95_seconds']:.3f}s) with {workers} worker(s)")
+    if failed:
+        click.echo(f"{failed} record(s) failed, see {errors_path}", err=True)
+
+
+@cv_cli.command('bench')
+@click.option('--repeat', '-r', default=5, show_default=True, help='Timed renders per case.')
+@click.option('--case', 'names', multiple=True, help='Only run this case (repeatable).')
+@click.option('--baseline', 'baseline_path', type=click.Path(dir_okay=False),
+              help='Baseline JSON file (default: BENCHMARK_BASELINE).')
+@click.option('--threshold', type=float, help='Allowed relative regression (default: BENCHMARK_THRESHOLD).')
+@click.option('--update-baseline', is_flag=True, help='Store the results as the new baseline.')
+@click.pass_context
+def bench(ctx, repeat, names, baseline_path, threshold, update_baseline):
+    """Benchmark CV rendering on synthetic fixtures and compare with the baseline."""
+    from .benchmarks import benchmark_cases, compare_to_baseline, load_baseline, run_benchmarks, save_baseline
+
+    known = [case.name for case in benchmark_cases()]
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise click.BadParameter(f"unknown case(s) {', '.join(unknown)}; choose from {', '.join(known)}",
+                                 param_hint='--case')
+
+    baseline_path = baseline_path or current_app.config['BENCHMARK_BASELINE']
+    threshold = current_app.config['BENCHMARK_THRESHOLD'] if threshold is None else threshold
+
+    preload_render_resources()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_benchmarks(workdir, repeat, names)
+
+    click.echo(f"{'case':<16}{'wall ms':>10}{'min ms':>10}{'alloc KiB':>12}{'bytes':>10}{'pages':>7}")
+    for name, metrics in results.items():
+        click.echo(f"{name:<16}{metrics['wall_ms']:>10.1f}{metrics['wall_min_ms']:>10.1f}"
+                   f"{metrics['alloc_peak_kib']:>12.1f}{metrics['bytes']:>10}{metrics['pages']:>7}")
+
+    if update_baseline:
+        baseline = load_baseline(baseline_path)
+        baseline.update(results)
+        save_baseline(baseline_path, baseline)
+        click.echo(f"Baseline written to {baseline_path}")
+        return
+
+    baseline = load_baseline(baseline_path)
+    if not baseline:
+        click.echo(f"No baseline at {baseline_path}, run with --update-baseline to create it", err=True)
+        return
+
+    regressions = compare_to_baseline(results, baseline, threshold)
+    for r in regressions:
+        click.echo(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> {r['value']} "
+                   f"(x{r['ratio']}, threshold +{threshold:.0%})", err=True)
+    if regressions:
+        ctx.exit(1)
+    click.echo(f"No regression past +{threshold:.0%} of {baseline_path}")
+
+
+@cv_cli.command('startup')
+@click.option('--config', 'config_name', default='production', show_default=True,
+              help='Configuration passed to create_app.')
+@click.option('--budget', type=float, help='Allowed milliseconds (default: STARTUP_BUDGET_MS).')
+@click.option('--top', default=10, show_default=True, help='Slowest imports to list.')
+@click.pass_context
+def startup(ctx, config_name, budget, top):
+    """Time importing the app and create_app in a fresh interpreter (python -X importtime)."""
+    from .startup import HEAVY_MODULES, measure_startup
+
+    budget = current_app.config['STARTUP_BUDGET_MS'] if budget is None else budget
+    result = measure_startup(config_name, top)
+
+    click.echo(f"{'import':<40}{'cumulative ms':>14}")
+    for module, cumulative in result['slowest']:
+        click.echo(f"{module:<40}{cumulative:>14.1f}")
+    click.echo(f"create_app: {result['create_app_ms']:.1f} ms (budget {budget:.0f} ms)")
+
+    failed = False
+    if result['heavy_modules']:
+        click.echo(f"Imported at startup: {', '.join(result['heavy_modules'])} "
+                   f"(expected on first use only: {', '.join(HEAVY_MODULES)})", err=True)
+        failed = True
+    if result['create_app_ms'] > budget:
+        click.echo(f"Startup over budget by {result['create_app_ms'] - budget:.1f} ms", err=True)
+        failed = True
+    if failed:
+        ctx.exit(1)
+
+
+@cv_cli.command('loadtest')
+@click.option('--users', '-u', default=4, show_default=True, help='Concurrent virtual users.')
+@click.option('--flows', '-n', default=5, show_default=True, help='Flows per virtual user.')
+@click.option('--url', 'base_url', help='Test a running server instead of this app in process.')
+@click.option('--server-pid', type=int, help='Process of the running server, for its peak RSS.')
+@click.option('--step', 'steps', multiple=True, help='Only go through this step (repeatable).')
+@click.option('--case', 'names', multiple=True, help='Only use this benchmark fixture (repeatable).')
+@click.option('--wave-latency', default=0.05, show_default=True, help='Seconds the Wave stub takes to answer.')
+@click.option('--gemini-latency', default=0.3, show_default=True, help='Seconds the Gemini stub takes to answer.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the report as JSON.')
+def loadtest(users, flows, base_url, server_pid, steps, names, wave_latency, gemini_latency, output):
+    """Drive concurrent virtual users through create, render, preview, payment and download."""
+    from .loadtest import EXTERNAL_STEPS, STEPS, local_stubs, run_load_test
+
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        raise click.BadParameter(f"unknown step(s) {', '.join(unknown)}; choose from {', '.join(STEPS)}",
+                                 param_hint='--step')
+    if not steps:
+        # Wave and Gemini are only stubbed in process
+        steps = [step for step in STEPS if not base_url or step not in EXTERNAL_STEPS]
+
+    app = current_app._get_current_object()
+    with tempfile.TemporaryDirectory() as workdir:
+        if base_url:
+            report = run_load_test(base_url=base_url, users=users, flows=flows, steps=steps, case_names=names,
+                                   workdir=workdir, server_pid=server_pid)
+        else:
+            # Generated CVs and uploaded photos go to the scratch folder, not the real uploads
+            upload_folder, app.config['UPLOAD_FOLDER'] = app.config['UPLOAD_FOLDER'], workdir
+            preload_render_resources()
+            try:
+                with local_stubs(app, wave_latency, gemini_latency):
+                    report = run_load_test(app, users=users, flows=flows, steps=steps, case_names=names,
+                                           workdir=workdir)
+            finally:
+                app.config['UPLOAD_FOLDER'] = upload_folder
+
+    click.echo(f"{'route':<36}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in report['routes'].items():
+        click.echo(f"{route:<36}{r['count']:>7}{r['errors']:>8}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                   f"{r['p99_ms']:>10.1f}")
+    click.echo(f"{report['flows'] - report['failed_flows']}/{report['flows']} flows in {report['wall_seconds']}s "
+               f"with {users} user(s): {report['flows_per_second']} flows/s, "
+               f"{report['requests_per_second']} requests/s, error rate {report['error_rate']:.2%}, "
+               f"peak RSS {report['peak_rss_mib']} MiB")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
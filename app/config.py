@@ -26,17 +26,79 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
+    # Generated CVs: keep them on disk in UPLOAD_FOLDER, or only in memory
+    PERSIST_GENERATED_CV = os.environ.get('PERSIST_GENERATED_CV', 'True').lower() == 'true'
+    GENERATED_CV_STORE_SIZE = 256  # PDFs kept in memory when not persisted
+
+    # Render cache: identical CV input is served without re-rendering
+    RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RENDER_CACHE_MAX_ENTRIES = 512
+
+    # PDF output: 'web' (subset fonts, smallest), 'print' (no object streams) or 'archive' (complete fonts)
+    PDF_OUTPUT_PROFILE = os.environ.get('PDF_OUTPUT_PROFILE', 'web')
+    PDF_LINEARIZE = os.environ.get('PDF_LINEARIZE', 'False').lower() == 'true'
+
+    # Preview thumbnails: rendered in process and cached with the render
+    THUMBNAIL_DPI = 72
+    THUMBNAIL_MAX_SIZE = 1024  # Pixels, longest side
+    THUMBNAIL_FORMAT = os.environ.get('THUMBNAIL_FORMAT', 'png')  # 'png', 'jpeg' or 'webp'
+    THUMBNAIL_QUALITY = 80  # For jpeg and webp
+
+    # Render tracing: per-stage timing histograms and a trace of recent renders
+    RENDER_TRACING = os.environ.get('RENDER_TRACING', 'True').lower() == 'true'
+    RENDER_TRACE_EVENTS = 2000  # Spans kept for /debug/render-trace
+    RENDER_TRACE_ENDPOINTS = False  # Serve /debug/render-stats and /debug/render-trace
+
+    # Render jobs: 'thread' or 'process' render in the background, 'sync' inline
+    RENDER_JOB_BACKEND = os.environ.get('RENDER_JOB_BACKEND', 'thread')
+    RENDER_JOB_WORKERS = int(os.environ.get('RENDER_JOB_WORKERS', 2))
+    RENDER_JOB_QUEUE_SIZE = 32  # Jobs waiting for a worker before new ones are refused
+    RENDER_JOB_MAX_AGE = 3600  # Seconds a job's status is kept in the database for the other workers
+
+    # Load the read-only render resources in create_app, before gunicorn --preload forks the workers
+    PREFORK_WARMUP = os.environ.get('PREFORK_WARMUP', 'False').lower() == 'true'
+
+    # Render benchmarks (flask cv bench): stored results and allowed regression
+    BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'tests', 'benchmark_baseline.json')
+    BENCHMARK_THRESHOLD = float(os.environ.get('BENCHMARK_THRESHOLD', 0.25))
+
+    # Startup benchmark (flask cv startup): milliseconds allowed to import the app and run create_app
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1000))
+
+    # Session values kept server side, under an opaque id in the cookie (see session_store.py):
+    # 'sqlite' (shared by the workers of a host), 'memory' (one process) or 'cookie' (no server side)
+    SESSION_STORE = os.environ.get('SESSION_STORE', 'sqlite')
+    SESSION_STORE_PATH = os.environ.get('SESSION_STORE_PATH')  # Default: sessions.sqlite3 in the instance folder
+    SESSION_STORE_SIZE = 10000  # Sessions kept by the memory store
+    SESSION_SERVER_KEYS = ('cv_data',)
+
+    # Database (CV drafts, see drafts.py); a relative SQLite path is in the instance folder
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///cv.sqlite3')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': 10,
+        'pool_pre_ping': True,
+    }
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Draft autosave: changed sections are written in batches, every DRAFT_FLUSH_INTERVAL
+    # seconds (0: at once) or as soon as DRAFT_BATCH_SIZE are waiting
+    DRAFT_FLUSH_INTERVAL = float(os.environ.get('DRAFT_FLUSH_INTERVAL', 2.0))
+    DRAFT_BATCH_SIZE = 50
+    DRAFT_COOKIE_NAME = 'cv_drafts'  # Long-lived cookie identifying the owner of the drafts
+    DRAFT_COOKIE_MAX_AGE = timedelta(days=90)
+
     # Languages
     LANGUAGES = ['fr', 'en']  # French as primary language for Senegal
     BABEL_DEFAULT_LOCALE = 'fr'
 
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=12)
-    SESSION_COOKIE_SECURE = True
+    SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'True').lower() == 'true'
     SESSION_COOKIE_HTTPONLY = True
 
     # Wave Payment Settings
-    WAVE_API_URL = "https://api.wave.com/v1"
+    WAVE_API_URL = os.environ.get('WAVE_API_URL', "https://api.wave.com/v1")
     WAVE_API_KEY = os.environ.get('WAVE_API_KEY', 'your_wave_api_key')
     WAVE_SECRET = os.environ.get('WAVE_SECRET', 'your_wave_secret')
     PAYMENT_AMOUNT = 1000
@@ -50,11 +112,17 @@ class Config:
 class DevelopmentConfig(Config):
     DEBUG = True
     TEST_MODE_ENABLED = True  # Enable test mode in development
+    RENDER_TRACE_ENDPOINTS = True
 
 
 class TestingConfig(Config):
     TESTING = True
     TEST_MODE_ENABLED = True  # Enable test mode in testing
+    RENDER_JOB_BACKEND = 'sync'
+    SESSION_STORE = 'memory'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'  # In memory, one per app
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DRAFT_FLUSH_INTERVAL = 0
 
 
 class ProductionConfig(Config):
@@ -1,107 +1,24 @@
-import locale
-import re
 from functools import wraps
 
-from flask import session, current_app
+from flask import session, current_app, has_request_context
 import fitz
-from PIL import Image
 import os
+import uuid
 from datetime import datetime
-from flask_babel import lazy_gettext as _
-
-
-def parse_date(date_str, lang='fr'):
-    """
-    Parse date string in various formats and return formatted date.
-    Returns None if date_str is None or empty.
-
-    Args:
-        date_str (str): The date string to parse
-        lang (str): Language code for the output month name (default: 'en')
-
-    Returns:
-        str or None: Formatted date string or None if input is empty
-    """
-    if not date_str:
-        return None
-
-    # Clean up the date string more aggressively
-    # Replace multiple spaces, tabs, and newlines with a single space
-    import re
-    from datetime import datetime
-    date_str = re.sub(r'\s+', ' ', date_str).strip()
-
-    # Check if the string already contains a date range
-    if ' - ' in date_str:
-        # Return the first part of the range
-        return parse_date(date_str.split(' - ')[0].strip(), lang)
-
-    formats_to_try = [
-        '%a, %d %b %Y %H:%M:%S GMT',  # Original format
-        '%b %Y',  # Simple month year format (e.g. Mar 2025)
-        '%Y-%m-%d',  # ISO format
-        '%m/%d/%Y',  # US format
-        '%d/%m/%Y',  # European format
-        '%B %Y',  # Full month name
-    ]
-
-    for date_format in formats_to_try:
-        try:
-            date_obj = datetime.strptime(date_str, date_format)
-
-            # Get month and year
-            month_number = date_obj.month
-            year = date_obj.year
-
-            # Translate month name based on language
-            month_name = get_month_name(month_number, lang)
-
-            # Return formatted date
-            return f"{month_name} {year}"
-        except ValueError:
-            continue
-
-    # If we can't parse the date, return it as is with a warning
-    import logging
-    logging.warning(f"Could not parse date: {date_str}")
-    return date_str
-
-
-def get_month_name(month_number, lang='fr'):
-    """
-    Get the month name for a given month number in the specified language.
-
-    Args:
-        month_number (int): Month number (1-12)
-        lang (str): Language code
-
-    Returns:
-        str: Month name in the specified language
-    """
-    # Month translations for different languages
-    month_translations = {
-        'en': [
-            'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-            'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
-        ],
-        'tr': [
-            'Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz',
-            'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara'
-        ],
-        'fr': [
-            'Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin',
-            'Juil', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc'
-        ]
-    }
-
-    # If language not supported, fall back to English
-    if lang not in month_translations:
-        import logging
-        logging.warning(f"Language {lang} not supported, falling back to English")
-        lang = 'fr'
-
-    # Return the abbreviated month name
-    return month_translations[lang][month_number - 1]
+from flask_babel import force_locale, lazy_gettext as _
+
+from .backends import paint_fitz, rasterize
+from .dates import normalize_cv_dates
+from .display_list import DisplayList, build_display_lists
+from .fonts import font_registry
+from .icons import icon_library
+from .photos import photo_cache
+from .layout import Block, Flow, Row
+from .layout_cache import memoize_layout
+from .line_breaking import line_breaker
+from .output_profiles import get_output_profile
+from .template_layers import template_layers
+from .tracing import get_render_tracer
 
 
 # Dictionary with translations for all section titles
@@ -148,11 +65,31 @@ TRANSLATIONS = {
 }
 
 
+# Fonts (bold, regular, italic) used to draw a CV
+BASE_FONTS = ("Helvetica-Bold", "Times-Roman", "Times-Italic")
+TURKISH_FONTS = ("Turkish-Bold", "Turkish-Roman", "Turkish-Italic")  # Embedded, see fonts.py
+
+# Template used when none was chosen
+DEFAULT_TEMPLATE = 'template1'
+
+
 class CVGenerator:
-    def __init__(self, cv_data, upload_folder, language='fr'):
+    def __init__(self, cv_data, upload_folder, language='fr', photo_path=None, template=None, output_profile=None):
         self.cv_data = cv_data
         self.upload_folder = upload_folder
 
+        # How the PDF is written: font subsetting, compression (see output_profiles.py)
+        self.output_profile = get_output_profile(output_profile)
+
+        # Profile photo and template: taken from the session unless given (e.g. batch rendering outside a request)
+        if photo_path is None:
+            photo_path = session.get('photo_path', '') if has_request_context() else ''
+        self.photo_path = photo_path
+
+        if template is None and has_request_context():
+            template = session.get('selected_template')
+        self.template = template or DEFAULT_TEMPLATE
+
         # Set language (default to French if invalid language is provided)
         if language in TRANSLATIONS:
             self.language = language
@@ -168,6 +105,7 @@ class CVGenerator:
         self.PAGE_HEIGHT = 842  # A4 height in points
         self.SIDEBAR_WIDTH = self.PAGE_WIDTH * 0.3
         self.MARGIN = 20
+        self.MARGIN_BOTTOM = 40  # Content moves to a new page below PAGE_HEIGHT - MARGIN_BOTTOM
         self.MARGIN_LEFT = self.SIDEBAR_WIDTH + 10
         self.SECTION_SPACING = 20
         self.SIDEBAR_TEXT_WIDTH = self.SIDEBAR_WIDTH - self.MARGIN
@@ -182,31 +120,39 @@ class CVGenerator:
         self.TEXT_FONT_SIZE = 10
         # Fonts
         if self.language == 'tr':
-            self.BOLD = "Turkish-Bold"
-            self.REGULAR = "Turkish-Roman"
-            self.ITALIC = "Turkish-Italic"
+            self.BOLD, self.REGULAR, self.ITALIC = TURKISH_FONTS
         else:
-            self.BOLD = "Helvetica-Bold"
-            self.REGULAR = "Times-Roman"
-            self.ITALIC = "Times-Italic"
-
-        # Format and store CV data
-        personal_info = self._format_personal_info()
-        self.NAME = personal_info['NAME']
-        self.CONTACT_INFO = personal_info['CONTACT_INFO']
-        self.CAREER_GOALS_TEXT = personal_info['CAREER_GOALS_TEXT']
-
-        # Format other sections
-        self.SKILLS = self._format_skills()
-        self.LANGUAGES = self._format_languages()
-        self.HOBBIES = self._format_hobbies()
-        self.REFERENCES = self._format_references()
-        self.WORK_EXPERIENCES = self._format_experiences()
-        self.EDUCATION_ENTRIES = self._format_education()
-        self.CERTIFICATIONS = self._format_certifications()
-
-        # Default software proficiency (you might want to add this to your form)
-        self.SOFTWARE = self._format_software()
+            self.BOLD, self.REGULAR, self.ITALIC = BASE_FONTS
+
+        # Everything besides their arguments that memoized layouts depend on
+        self.LAYOUT_SIGNATURE = (self.language, self.BOLD, self.REGULAR, self.ITALIC, self.TITLE_FONT_SIZE,
+                                 self.TEXT_FONT_SIZE, self.PAGE_WIDTH, self.SIDEBAR_WIDTH, self.MARGIN,
+                                 self.SECTION_SPACING, self.TEXT_COLOR, self.LINE_COLOR)
+
+        # Timing spans of each render stage
+        self.tracer = get_render_tracer()
+
+        with self.tracer.span('format'):
+            # Every date of the CV, in the CV's language
+            self.DATES = normalize_cv_dates(cv_data, self.language)
+
+            # Format and store CV data
+            personal_info = self._format_personal_info()
+            self.NAME = personal_info['NAME']
+            self.CONTACT_INFO = personal_info['CONTACT_INFO']
+            self.CAREER_GOALS_TEXT = personal_info['CAREER_GOALS_TEXT']
+
+            # Format other sections
+            self.SKILLS = self._format_skills()
+            self.LANGUAGES = self._format_languages()
+            self.HOBBIES = self._format_hobbies()
+            self.REFERENCES = self._format_references()
+            self.WORK_EXPERIENCES = self._format_experiences()
+            self.EDUCATION_ENTRIES = self._format_education()
+            self.CERTIFICATIONS = self._format_certifications()
+
+            # Default software proficiency (you might want to add this to your form)
+            self.SOFTWARE = self._format_software()
 
     def _format_personal_info(self):
         """Format personal info for CV generation"""
@@ -215,10 +161,10 @@ class CVGenerator:
         return {
             'NAME': f"{info['first_name']} {info['last_name']}",
             'CONTACT_INFO': [
-                {"text": info['email'], "icon": "📧"},  # Email
-                {"text": info['phone'], "icon": "📱"},  # Phone
-                {"text": info['address'], "icon": "📍"},  # Address
-                # {"text": f"City: {info['city']}", "icon": "🏠"}  # City
+                {"text": info['email'], "icon": "email"},
+                {"text": info['phone'], "icon": "phone"},
+                {"text": info['address'], "icon": "location"},
+                # {"text": f"City: {info['city']}", "icon": "home"}
             ],
             'CAREER_GOALS_TEXT': info.get('professional_summary', '')
         }
@@ -233,14 +179,7 @@ class CVGenerator:
         """Format work experiences for CV generation"""
         formatted_experiences = []
 
-        for exp in self.cv_data['experience']:
-            raw_dates = exp.get('start_date', '')
-
-            # Extract clean start_date and end_date
-            dates = re.split(r'\s*-\s*', raw_dates)  # Split by " - " with any extra spaces or new lines removed
-            start_date = parse_date(dates[0].strip()) if dates[0] else None
-            end_date = parse_date(dates[1].strip()) if len(dates) > 1 and dates[1] else None
-
+        for exp, (start_date, end_date) in zip(self.cv_data['experience'], self.DATES['experience']):
             # Use translated word for "present" if end_date is empty
             date_text = f"{start_date} - {end_date if end_date else self.translations['present']}"
 
@@ -257,10 +196,7 @@ class CVGenerator:
         """Format education entries for CV generation"""
         formatted_education = []
 
-        for edu in self.cv_data['education']:
-            start_date = parse_date(edu.get('start_date', ''))
-            end_date = parse_date(edu.get('end_date', ''))
-
+        for edu, (start_date, end_date) in zip(self.cv_data['education'], self.DATES['education']):
             formatted_education.append({
                 'date': f"{start_date} - {end_date}" if start_date and end_date else '',
                 'institution': edu.get('institution', ''),
@@ -273,9 +209,7 @@ class CVGenerator:
         """Format certification entries for CV generation"""
         formatted_certifications = []
 
-        for cert in self.cv_data['certifications']:
-            cert_date = parse_date(cert.get('date', ''))
-
+        for cert, cert_date in zip(self.cv_data['certifications'], self.DATES['certifications']):
             formatted_certifications.append({
                 'date': cert_date if cert_date else '',
                 'certificate': cert.get('name', ''),
@@ -302,611 +236,500 @@ class CVGenerator:
                 for ref in self.cv_data['references']]
 
     def generate(self):
-        """Generate the CV PDF with debugging"""
+        """Generate the CV PDF and save it to the upload folder, returning its filename"""
         try:
-            current_app.logger.info(f"Starting CV generation in {self.language} language.")
+            with self.tracer.span('render', language=self.language):
+                doc = self.build_document()
+
+                # Generate unique filename
+                filename = new_cv_filename()
+                filepath = os.path.join(self.upload_folder, filename)
+
+                # Save the CV
+                current_app.logger.debug(f"Saving CV to {filepath}")
+                pdf = self.save(doc)
+                with open(filepath, 'wb') as f:
+                    f.write(pdf)
+
+            current_app.logger.info(f"CV successfully generated: {filename}")
+            return filename
+
+        except Exception as e:
+            current_app.logger.error(f"Error generating CV: {str(e)}", exc_info=True)
+            raise
+
+    def render(self, sink=None):
+        """
+        Generate the CV PDF in memory, without touching the upload folder.
+
+        Args:
+            sink (file-like, optional): Binary stream the PDF is written to
+
+        Returns:
+            bytes or None: The PDF bytes, or None when written to ``sink``
+        """
+        try:
+            with self.tracer.span('render', language=self.language):
+                doc = self.build_document()
+                pdf = self.save(doc)
+
+            if sink is not None:
+                sink.write(pdf)
+                return None
+
+            return pdf
+
+        except Exception as e:
+            current_app.logger.error(f"Error generating CV: {str(e)}", exc_info=True)
+            raise
+
+    def save(self, doc):
+        """Write the document with the generator's output profile and report its size"""
+        profile = self.output_profile.name
+        with self.tracer.span('save', profile=profile) as event:
+            pdf = self.output_profile.to_bytes(doc)
+            event['bytes'] = len(pdf)
+
+        current_app.logger.info(f"CV PDF written with the '{profile}' profile: {len(pdf)} bytes")
+        return pdf
+
+    def build_document(self):
+        """Lay out and draw the CV, returning the open fitz document"""
+        current_app.logger.info(f"Starting CV generation in {self.language} language.")
+
+        # Ensure NAME exists
+        if not hasattr(self, 'NAME') or not self.NAME:
+            raise ValueError("Missing required attribute: 'NAME' for CV generation")
 
-            # Log all attributes of the class instance
-            current_app.logger.debug(f"Generating CV with attributes: {vars(self)}")
+        span = self.tracer.span
 
-            # Ensure NAME exists
-            if not hasattr(self, 'NAME') or not self.NAME:
-                raise ValueError("Missing required attribute: 'NAME' for CV generation")
+        # Layout and pagination: one display list per page, nothing drawn yet
+        display_lists = self.display_lists()
+        current_app.logger.debug(f"CV laid out on {len(display_lists)} page(s)")
 
-            # Create PDF document
-            doc = fitz.open()
+        # Static skeleton of the template, drawn once per process and stamped on every page
+        with span('template'):
+            skeleton = template_layers.open((self.template, self.language, self.PAGE_WIDTH, self.PAGE_HEIGHT),
+                                            self.draw_template, self.PAGE_WIDTH, self.PAGE_HEIGHT)
+
+        doc = fitz.open()
+        font_xrefs = {}
+        for page_number, display_list in enumerate(display_lists):
             page = doc.new_page(width=self.PAGE_WIDTH, height=self.PAGE_HEIGHT)
 
-            font_path = r"app/static/fonts/NotoEmoji-VariableFont_wght.ttf"
-            page.insert_font(fontname="icons", fontfile=font_path)  # Use F0 as alias
-
-            # Register the fonts inside generate()
-
-            if self.language == 'tr':
-                page.insert_font(fontname="Turkish-Bold", fontfile="app/static/fonts/Turkish-Bold.ttf")
-                page.insert_font(fontname="Turkish-Roman", fontfile="app/static/fonts/Turkish-Regular.ttf")
-                page.insert_font(fontname="Turkish-Italic", fontfile="app/static/fonts/Turkish-Italic.ttf")
-
-            # Draw sidebar
-            current_app.logger.debug("Drawing sidebar...")
-            self.draw_sidebar(page)
-
-            # Add profile picture
-            photo_path = session.get('photo_path', '')
-            if photo_path and os.path.exists(photo_path):
-                current_app.logger.debug(f"Adding profile picture from {photo_path}")
-                self.add_profile_picture(page, photo_path)
-                image_size = int(self.SIDEBAR_WIDTH * 0.8)
-                start_y = 20 + image_size + 30
-            else:
-                if photo_path:
-                    current_app.logger.warning(f"Profile picture not found at {photo_path}")
-                # If no photo, start text at top with just some margin
-                start_y = 50  # Adjust this value as needed for your layout
-
-            current_app.logger.debug(f"Starting y-position for text: {start_y}")
-
-            # Name
-            current_app.logger.debug(f"Adding name: {self.NAME}")
-            # Name Positioning (start from left and wrap if too long)
-            y_offset = self.add_text(page, self.NAME, x=self.MARGIN, y=start_y, font=self.BOLD, size=14,
-                                     max_width=self.SIDEBAR_TEXT_WIDTH)
-
-            # Contact Info
-            ICON_COLORS = {
-                "email": (0.2, 0.4, 0.8),  # Blue
-                "phone": (0.2, 0.7, 0.2),  # Green
-                "location": (0.8, 0.3, 0.3),  # Red
-                "home": (0.5, 0.3, 0.7)  # Purple
-            }
-            self.add_title(page, self.translations['contact'], self.MARGIN, y_offset + 10)
-            y_offset += 30
-
-            for i, contact in enumerate(self.CONTACT_INFO):
-                icon_color = list(ICON_COLORS.values())[i % len(ICON_COLORS)]  # Get color for this icon
-                y_offset = self.add_text(
-                    page,
+            # Register the embedded fonts this page uses, from the process-wide cache (read from disk only once)
+            with span('paint.fonts'):
+                for font_name in sorted(display_list.fonts()):
+                    if font_name in font_registry.font_files:
+                        font_xrefs[font_name] = font_registry.insert_font(page, font_name)
+
+            # The sidebar background is repeated on continuation pages
+            with span('paint.template'):
+                page.show_pdf_page(page.rect, skeleton, 0)
+
+            with span('paint.ops', page=page_number, ops=len(display_list)):
+                paint_fitz(page, display_list)
+
+        font_registry.keep_glyph_tables(doc, font_xrefs)
+        return doc
+
+    def display_lists(self):
+        """
+        Lay out the CV and place it on pages, without drawing anything.
+
+        Returns:
+            list: One DisplayList per page, with the sidebar before the main column
+        """
+        span = self.tracer.span
+
+        # Layout pass: measure everything once
+        with span('layout'):
+            sidebar, main = self.layout()
+
+        # Place the rows on as many pages as needed
+        with span('paginate'):
+            return build_display_lists(self.PAGE_WIDTH, self.PAGE_HEIGHT, sidebar.paginate(), main.paginate())
+
+    def preview_image(self, page_number=0, dpi=72):
+        """
+        Draw one page straight from its display list with Pillow, without building a PDF.
+
+        Returns:
+            PIL.Image.Image: The page, template included
+        """
+        display_lists = self.display_lists()
+        return rasterize([self.template_display_list(), display_lists[page_number]], scale=dpi / 72)
+
+    def layout(self):
+        """
+        Lay out the sidebar and the main column.
+
+        Returns:
+            tuple: The sidebar Flow and the main content Flow
+        """
+        bottom = self.PAGE_HEIGHT - self.MARGIN_BOTTOM
+
+        span = self.tracer.span
+
+        # ==== SIDEBAR ====
+        # Add profile picture
+        photo_path = self.photo_path
+        photo = None
+        if photo_path and os.path.exists(photo_path):
+            current_app.logger.debug(f"Adding profile picture from {photo_path}")
+            with span('layout.photo'):
+                photo = self.layout_profile_picture(photo_path)
+        elif photo_path:
+            current_app.logger.warning(f"Profile picture not found at {photo_path}")
+
+        if photo:
+            image_size = int(self.SIDEBAR_WIDTH * 0.8)
+            start_y = 20 + image_size + 30
+            sidebar = Flow(10, 50, bottom)
+            sidebar.add_rows(Row(start_y - 10, [photo]))
+        else:
+            # If no photo, start text at top with just some margin
+            sidebar = Flow(50, 50, bottom)
+
+        # Name Positioning (start from left and wrap if too long)
+        with span('layout.name'):
+            sidebar.add_rows(*self.layout_text(self.NAME, x=self.MARGIN, font=self.BOLD, size=14,
+                                               max_width=self.SIDEBAR_TEXT_WIDTH))
+
+        # Contact Info
+        ICON_COLORS = {
+            "email": (0.2, 0.4, 0.8),  # Blue
+            "phone": (0.2, 0.7, 0.2),  # Green
+            "location": (0.8, 0.3, 0.3),  # Red
+            "home": (0.5, 0.3, 0.7)  # Purple
+        }
+        with span('layout.contact'):
+            sidebar.add_rows(self.layout_title(self.translations['contact'], self.MARGIN))
+
+            for contact in self.CONTACT_INFO:
+                icon_color = ICON_COLORS.get(contact["icon"])  # Get color for this icon
+                sidebar.add_rows(*self.layout_text(
                     text=contact["text"],
                     x=self.MARGIN,
-                    y=y_offset,
                     max_width=self.SIDEBAR_TEXT_WIDTH,
                     icon=contact["icon"],
                     icon_color=icon_color,  # Specify icon color
                     color=self.TEXT_COLOR  # Regular text remains black
-                )
-                y_offset += 5  # spacing between entries
-
-            # Optional sections - only add if they have content
-            # Skills
-            if hasattr(self, 'SKILLS') and self.SKILLS:
-                current_app.logger.debug(f"Adding skills: {self.SKILLS}")
-                self.add_title(page, self.translations['skills'], self.MARGIN, y_offset + 10)
-                y_offset += 30
+                ), Row(5))  # spacing between entries
+
+        # Optional sections - only add if they have content
+        # Skills
+        if self.SKILLS:
+            with span('layout.skills', entries=len(self.SKILLS)):
+                sidebar.add_rows(self.layout_title(self.translations['skills'], self.MARGIN))
                 for skill in self.SKILLS:
-                    self.add_text(page, f"{skill}", self.MARGIN, y_offset)
-                    y_offset += 15
-
-            # Software
-            if hasattr(self, 'SOFTWARE') and self.SOFTWARE:
-                current_app.logger.debug(f"Adding software: {self.SOFTWARE}")
-                self.add_title(page, self.translations['software'], self.MARGIN, y_offset + 10)
-                y_offset += 30
+                    sidebar.add_rows(*self.layout_text(f"{skill}", self.MARGIN))
+
+        # Software
+        if self.SOFTWARE:
+            with span('layout.software', entries=len(self.SOFTWARE)):
+                sidebar.add_rows(self.layout_title(self.translations['software'], self.MARGIN))
                 for software, level in self.SOFTWARE.items():
-                    y_offset = self.add_text(page, f"{software}: ({level})", self.MARGIN, y_offset,
-                                             max_width=self.SIDEBAR_TEXT_WIDTH)
-                    y_offset += 5
-
-            # Languages
-            if hasattr(self, 'LANGUAGES') and self.LANGUAGES:
-                current_app.logger.debug(f"Adding languages: {self.LANGUAGES}")
-                self.add_title(page, self.translations['languages'], self.MARGIN, y_offset + 10)
-                y_offset += 30
+                    sidebar.add_rows(*self.layout_text(f"{software}: ({level})", self.MARGIN,
+                                                       max_width=self.SIDEBAR_TEXT_WIDTH), Row(5))
+
+        # Languages
+        if self.LANGUAGES:
+            with span('layout.languages', entries=len(self.LANGUAGES)):
+                sidebar.add_rows(self.layout_title(self.translations['languages'], self.MARGIN))
                 for lang, level in self.LANGUAGES.items():
-                    self.add_text(page, f"{lang}: {level}", self.MARGIN, y_offset)
-                    y_offset += 15
-
-            # Hobbies
-            if hasattr(self, 'HOBBIES') and self.HOBBIES:
-                current_app.logger.debug(f"Adding hobbies: {self.HOBBIES}")
-                self.add_title(page, self.translations['hobbies'], self.MARGIN, y_offset + 10)
-                y_offset += 30
+                    sidebar.add_rows(*self.layout_text(f"{lang}: {level}", self.MARGIN))
+
+        # Hobbies
+        if self.HOBBIES:
+            with span('layout.hobbies', entries=len(self.HOBBIES)):
+                sidebar.add_rows(self.layout_title(self.translations['hobbies'], self.MARGIN))
                 for hobby in self.HOBBIES:
-                    self.add_text(page, f"• {hobby}", self.MARGIN, y_offset)
-                    y_offset += 15
-
-            # References
-            if hasattr(self, 'REFERENCES') and self.REFERENCES:
-                current_app.logger.debug(f"Adding references: {self.REFERENCES}")
-                self.add_title(page, self.translations['references'], self.MARGIN, y_offset + 10)
-                y_offset += 30
+                    sidebar.add_rows(*self.layout_text(f"• {hobby}", self.MARGIN))
+
+        # References
+        if self.REFERENCES:
+            with span('layout.references', entries=len(self.REFERENCES)):
+                sidebar.add_rows(self.layout_title(self.translations['references'], self.MARGIN))
                 for name, phone, company in self.REFERENCES:
-                    self.add_text(page, name, self.MARGIN, y_offset, font=self.ITALIC)
-                    self.add_text(page, f"{company} | {phone}", self.MARGIN, y_offset + 15)
-                    y_offset += 30
+                    name_row = self.layout_text(name, self.MARGIN, font=self.ITALIC)[0]
+                    name_row.keep_with_next = True
+                    sidebar.add_rows(name_row, *self.layout_text(f"{company} | {phone}", self.MARGIN))
 
-            # ==== MAIN CONTENT ====
-            y_main = 50  # Start position for main section
+        # ==== MAIN CONTENT ====
+        main = Flow(50, 50, bottom)  # Start position for main section
 
-            # Add Career Goals
-            current_app.logger.debug(f"Adding career goals: {self.CAREER_GOALS_TEXT}")
-            y_main = self.add_career_goals(page, y_main, self.CAREER_GOALS_TEXT)
+        # Add Career Goals
+        with span('layout.career_goals'):
+            main.add(*self.layout_career_goals(self.CAREER_GOALS_TEXT))
 
-            # Add Work Experience
-            current_app.logger.debug(f"Adding work experiences: {self.WORK_EXPERIENCES}")
-            y_main = self.add_work_experience(page, y_main, self.WORK_EXPERIENCES)
+        # Add Work Experience
+        with span('layout.work_experience', entries=len(self.WORK_EXPERIENCES)):
+            main.add(*self.layout_work_experience(self.WORK_EXPERIENCES))
 
-            # Add Education
-            current_app.logger.debug(f"Adding education: {self.EDUCATION_ENTRIES}")
-            y_main = self.add_education(page, y_main, self.EDUCATION_ENTRIES)
+        # Add Education
+        with span('layout.education', entries=len(self.EDUCATION_ENTRIES)):
+            main.add(*self.layout_education(self.EDUCATION_ENTRIES))
 
-            # Add Certifications section
-            y_main = self.add_certifications(page, y_main, self.CERTIFICATIONS)
+        # Add Certifications section
+        with span('layout.certifications', entries=len(self.CERTIFICATIONS)):
+            main.add(*self.layout_certifications(self.CERTIFICATIONS))
 
-            # Generate unique filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"cv_{timestamp}.pdf"
-            filepath = os.path.join(self.upload_folder, filename)
+        return sidebar, main
 
-            # Save the CV
-            current_app.logger.debug(f"Saving CV to {filepath}")
-            doc.save(filepath)
-
-            current_app.logger.info(f"CV successfully generated: {filename}")
-            return filename
-
-        except Exception as e:
-            current_app.logger.error(f"Error generating CV: {str(e)}", exc_info=True)
-            raise
-
-    def draw_section_title(self, page, y, text, title_x=None, draw_line=True):  # draw_line is now optional
-        """Draws section titles with optional underline."""
+    def layout_section_title(self, text, title_x=None, draw_line=True, height=20):  # draw_line is now optional
+        """Lays out a section title with optional underline, kept on the same page as what follows."""
 
         if title_x is None:
             title_x = self.MARGIN_LEFT + 60
 
-        page.insert_text((title_x, y), text, fontsize=self.TITLE_FONT_SIZE, fontname=self.BOLD, color=(0, 0, 0))
+        ops = [('text', title_x, 0, text, self.BOLD, self.TITLE_FONT_SIZE, (0, 0, 0))]
 
         if draw_line:  # Only draw the line if draw_line is True
-            page.draw_line((title_x, y + 3), (self.PAGE_WIDTH - 30, y + 3), color=(0, 0, 0))  # Underline
+            ops.append(('line', title_x, 3, self.PAGE_WIDTH - 30, 3, (0, 0, 0), 1))  # Underline
 
-        return y + 20  # Move cursor down
+        return Row(height, ops, keep_with_next=True)  # Move cursor down
 
-    def add_career_goals(self, page, y, text):
-        """Adds the Career Goals section with dynamic height based on content, only if text is not empty."""
+    @memoize_layout
+    def layout_career_goals(self, text):
+        """Lays out the Career Goals section with dynamic height based on content, only if text is not empty."""
 
         if not text or not text.strip():  # Check for empty text
-            return y  # Return original y if text is empty
+            return []  # Nothing to add if text is empty
 
         # Draw the section title
-        y = self.draw_section_title(page, y, self.translations['career_goals'], self.MARGIN_LEFT, False) - 10
+        rows = [self.layout_section_title(self.translations['career_goals'], self.MARGIN_LEFT, False, height=10)]
 
-        # Calculate text dimensions
-        font = fitz.Font("Helvetica")
+        # Wrap each paragraph using the real glyph widths of the body font
         text_width = self.PAGE_WIDTH - self.MARGIN_LEFT - 30  # Available width
-        wrapped_text = ""
-        current_line = ""
-
-        # Estimate characters per line (approximate)
-        char_width = font.glyph_advance(ord('a')) * self.TEXT_FONT_SIZE  # Get average char width
-
-        chars_per_line = int(text_width / char_width)
+        line_height = self.TEXT_FONT_SIZE * 1.5  # Add 20% for line spacing
 
-        # Word wrap the text
-        words = text.split()
-        for word in words:
-            if len(current_line) + len(word) + 1 <= chars_per_line:
-                current_line += (" " + word if current_line else word)
-            else:
-                wrapped_text += current_line + "\n"
-                current_line = word
+        for paragraph in text.split('\n'):
+            lines = self.wrap_text_with_width(paragraph, self.REGULAR, self.TEXT_FONT_SIZE, text_width)
+            if not lines:
+                rows.append(Row(line_height))  # Keep blank lines between paragraphs
+            for line in lines:
+                # Baselines sit one font size below the top of each line, as in a text box
+                rows.append(Row(line_height, [('text', self.MARGIN_LEFT, self.TEXT_FONT_SIZE, line, self.REGULAR,
+                                               self.TEXT_FONT_SIZE, (0, 0, 0))]))
 
-        # Add the last line
-        if current_line:
-            wrapped_text += current_line
-
-        # Calculate required height
-        line_count = len(wrapped_text.split('\n'))
-        line_height = self.TEXT_FONT_SIZE * 1.5  # Add 20% for line spacing
-        text_height = line_height * line_count
-
-        # Create rectangle with dynamic height
-        rect = fitz.Rect(
-            self.MARGIN_LEFT,  # left
-            y,  # top
-            self.PAGE_WIDTH - 30,  # right
-            y + text_height + 10  # bottom (add padding)
-        )
-
-        # Insert text in the dynamically sized box
-        page.insert_textbox(
-            rect,
-            text,
-            fontsize=self.TEXT_FONT_SIZE,
-            fontname=self.REGULAR,
-            color=(0, 0, 0),
-            align=0  # Left alignment
-        )
-
-        # Return the next y position (after the text box)
-        return y + text_height + 20  # Add some padding after the section
+        # Add some padding after the section
+        rows.append(Row(20))
+        return [Block(rows)]
 
     def wrap_text_with_width(self, text, font_name, font_size, max_width):
         """Helper function to wrap text based on width calculation."""
-        font = fitz.Font("Helvetica")
-        wrapped_text = []
-        current_line = []
-        current_width = 0
-
-        words = text.split()
-        for word in words:
-            # Calculate word width
-            word_width = sum(font.glyph_advance(ord(c)) * font_size for c in word)
-
-            # Add space width if not first word
-            if current_line:
-                word_width += font.glyph_advance(ord(' ')) * font_size
-
-            if current_width + word_width <= max_width:
-                current_line.append(word)
-                current_width += word_width
-            else:
-                if current_line:
-                    wrapped_text.append(' '.join(current_line))
-                current_line = [word]
-                current_width = sum(font.glyph_advance(ord(c)) * font_size for c in word)
-
-        if current_line:
-            wrapped_text.append(' '.join(current_line))
-
-        return wrapped_text
-
-    def add_timeline_entry(self, page, y, date, company, title, description=""):
-        """Adds a work/education entry with a timeline, date split across two lines."""
+        return line_breaker.wrap_words(text, font_name, font_size, max_width)
+
+    @memoize_layout
+    def layout_timeline_entry(self, date, company, title, description=""):
+        """Lays out a work/education entry with a timeline, date split across two lines."""
         LINE_X = self.MARGIN_LEFT + 55
         TEXT_X = LINE_X + 10
         TEXT_WIDTH = self.PAGE_WIDTH - TEXT_X - 30
         LINE_HEIGHT = self.TEXT_FONT_SIZE * 1.5
 
-        # Draw timeline elements
-        page.draw_line((LINE_X, y), (LINE_X, y + 50), color=self.LINE_COLOR)  # Extended line
-        page.draw_circle((LINE_X, y + 2), 3, color=self.LINE_COLOR, fill=self.LINE_COLOR)
+        # Timeline dot
+        head = [('circle', LINE_X, 2, 3, self.LINE_COLOR, self.LINE_COLOR)]
 
         # Handle date
         date_parts = date.split(" - ")
         if len(date_parts) == 2:
-            page.insert_text((self.MARGIN_LEFT, y), date_parts[0] + " -",
-                             fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR)
-            page.insert_text((self.MARGIN_LEFT, y + LINE_HEIGHT), date_parts[1],
-                             fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR)
+            head.append(('text', self.MARGIN_LEFT, 0, date_parts[0] + " -",
+                         self.REGULAR, self.TEXT_FONT_SIZE, self.TEXT_COLOR))
+            head.append(('text', self.MARGIN_LEFT, LINE_HEIGHT, date_parts[1],
+                         self.REGULAR, self.TEXT_FONT_SIZE, self.TEXT_COLOR))
         else:
-            page.insert_text((self.MARGIN_LEFT, y), date,
-                             fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR)
+            head.append(('text', self.MARGIN_LEFT, 0, date, self.REGULAR, self.TEXT_FONT_SIZE, self.TEXT_COLOR))
 
         # Handle title and company
-        current_y = y
+        header_lines = []
         if company:
-            wrapped_title = self.wrap_text_with_width(title, self.BOLD, self.TEXT_FONT_SIZE, TEXT_WIDTH)
-            wrapped_company = self.wrap_text_with_width(company, self.REGULAR, self.TEXT_FONT_SIZE, TEXT_WIDTH)
-
-            for line in wrapped_title:
-                page.insert_text((TEXT_X, current_y), line,
-                                 fontsize=self.TEXT_FONT_SIZE, fontname=self.BOLD)
-                current_y += LINE_HEIGHT
-
-            for line in wrapped_company:
-                page.insert_text((TEXT_X, current_y), line,
-                                 fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR, color=(0.3, 0.3, 1))
-                current_y += LINE_HEIGHT
+            header_lines += [(line, self.BOLD, self.TEXT_COLOR) for line in
+                             self.wrap_text_with_width(title, self.BOLD, self.TEXT_FONT_SIZE, TEXT_WIDTH)]
+            header_lines += [(line, self.REGULAR, (0.3, 0.3, 1)) for line in
+                             self.wrap_text_with_width(company, self.REGULAR, self.TEXT_FONT_SIZE, TEXT_WIDTH)]
         else:
-            wrapped_title = self.wrap_text_with_width(title, self.REGULAR, self.TEXT_FONT_SIZE, TEXT_WIDTH)
-            for line in wrapped_title:
-                page.insert_text((TEXT_X, current_y), line,
-                                 fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR)
-                current_y += LINE_HEIGHT
+            header_lines += [(line, self.REGULAR, self.TEXT_COLOR) for line in
+                             self.wrap_text_with_width(title, self.REGULAR, self.TEXT_FONT_SIZE, TEXT_WIDTH)]
+
+        for i, (line, font, color) in enumerate(header_lines):
+            head.append(('text', TEXT_X, i * LINE_HEIGHT, line, font, self.TEXT_FONT_SIZE, color))
 
-        # Add some spacing before description
-        current_y += LINE_HEIGHT / 2
+        # The header (and some spacing before the description) is kept together, with the first description line
+        rows = [Row(len(header_lines) * LINE_HEIGHT + LINE_HEIGHT / 2, head, keep_with_next=True)]
 
         # Handle description
         wrapped_desc = self.wrap_text_with_width(description, self.REGULAR, self.TEXT_FONT_SIZE, TEXT_WIDTH)
         for line in wrapped_desc:
-            page.insert_text((TEXT_X, current_y), line,
-                             fontsize=self.TEXT_FONT_SIZE, fontname=self.REGULAR)
-            current_y += LINE_HEIGHT
+            rows.append(Row(LINE_HEIGHT, [('text', TEXT_X, 0, line, self.REGULAR, self.TEXT_FONT_SIZE,
+                                           self.TEXT_COLOR)]))
 
         # Calculate total height used
-        total_height = current_y - y + LINE_HEIGHT
+        content_height = sum(row.height for row in rows)
+        total_height = content_height + LINE_HEIGHT
 
-        # Extend timeline line if needed
-        if total_height > 100:  # If content is taller than default line
-            page.draw_line((LINE_X, y), (LINE_X, current_y), color=self.LINE_COLOR)
+        # Extend timeline line if content is taller than default line
+        rail_extent = content_height if total_height > 100 else 50
 
-        return current_y + self.SECTION_SPACING  # Return next Y position with spacing
+        rows.append(Row(self.SECTION_SPACING))  # Spacing before the next entry
+        return Block(rows, rail=(LINE_X, self.LINE_COLOR, rail_extent))
 
-    def add_certifications(self, page, y, certifications):
-        """Adds the Certifications section with the same timeline format as education and work experience."""
+    def layout_certifications(self, certifications):
+        """Lays out the Certifications section with the same timeline format as education and work experience."""
         # Only add the section if there are certifications to display
-        if certifications:
-            y = self.draw_section_title(page, y, self.translations['certifications'])
+        if not certifications:
+            return []
 
-            for cert in certifications:
-                # Create date string and description text
-                date_text = cert["date"]
-                title_text = cert["certificate"]
-                description = _("Émis par : {issuer}").format(issuer=cert['issuer'])
+        blocks = [Block([self.layout_section_title(self.translations['certifications'])])]
 
+        for cert in certifications:
+            # Create date string and description text
+            date_text = cert["date"]
+            title_text = cert["certificate"]
+            description = _("Émis par : {issuer}").format(issuer=cert['issuer'])
 
-                # Use the same timeline entry function as education and work experience
-                y = self.add_timeline_entry(page, y, date_text, "",
-                                            title_text, description)
+            # Use the same timeline entry function as education and work experience
+            blocks.append(self.layout_timeline_entry(date_text, "", title_text, description))
 
-            return y + self.SECTION_SPACING
-        else:
-            # If no certifications, just return the current y position
-            return y
-
-    def add_work_experience(self, page, y, experiences):
-        """Adds the Work Experience section if there are experiences."""
-        if experiences:
-            y = self.draw_section_title(page, y, self.translations['work_experience'])
-            for exp in experiences:
-                y = self.add_timeline_entry(page, y, exp["date"], exp["company"], exp["title"], exp["description"])
-            y += self.SECTION_SPACING
-        return y
-
-    def add_education(self, page, y, education):
-        """Adds the Education section."""
+        blocks.append(Block([Row(self.SECTION_SPACING)]))
+        return blocks
+
+    def layout_work_experience(self, experiences):
+        """Lays out the Work Experience section if there are experiences."""
+        if not experiences:
+            return []
+
+        blocks = [Block([self.layout_section_title(self.translations['work_experience'])])]
+        for exp in experiences:
+            blocks.append(self.layout_timeline_entry(exp["date"], exp["company"], exp["title"], exp["description"]))
+
+        blocks.append(Block([Row(self.SECTION_SPACING)]))
+        return blocks
+
+    def layout_education(self, education):
+        """Lays out the Education section."""
         # Only add the section if there are education entries to display
-        if education:
-            y = self.draw_section_title(page, y, self.translations['education'])
+        if not education:
+            return []
 
-            for edu in education:
-                y = self.add_timeline_entry(page, y, edu["date"], edu["institution"], edu["degree"])
+        blocks = [Block([self.layout_section_title(self.translations['education'])])]
 
-            return y + self.SECTION_SPACING
-        else:
-            # If no education entries, just return the current y position
-            return y
+        for edu in education:
+            blocks.append(self.layout_timeline_entry(edu["date"], edu["institution"], edu["degree"]))
+
+        blocks.append(Block([Row(self.SECTION_SPACING)]))
+        return blocks
 
     def with_icon(func):
         """Decorator to handle icons alongside text in PDF rendering with separate icon color."""
 
         @wraps(func)
-        def wrapper(self, page, text, x, y, font=None, size=None, color=None, max_width=None,
+        def wrapper(self, text, x, font=None, size=None, color=None, max_width=None,
                     icon=None, icon_color=None, icon_spacing=15, **kwargs):
             current_x = x
-            original_max_width = max_width
-            # Handle icon if present
+            icon_op = None
+            # Handle icon if present: a vector icon from icons.py, drawn at the text size
             if icon:
-                page.insert_text(
-                    (current_x, y),
-                    icon,
-                    fontsize=size or self.TEXT_FONT_SIZE,
-                    fontname="icons",  # DejaVuSans for icons
-                    color=icon_color or color or self.TEXT_COLOR
-                )
+                if icon not in icon_library:
+                    raise ValueError(f"Unknown icon '{icon}', choose from {', '.join(icon_library.names)}")
+                icon_op = ('icon', current_x, 0, icon, size or self.TEXT_FONT_SIZE,
+                           icon_color or color or self.TEXT_COLOR)
                 current_x += icon_spacing
                 # Adjust max_width if it was specified
                 if max_width:
                     max_width = max_width - icon_spacing
             # Call original function with adjusted parameters
-            return func(
+            rows = func(
                 self,
-                page=page,
                 text=text,
                 x=current_x,
-                y=y,
                 font=font,
                 size=size,
                 color=color,
                 max_width=max_width,
                 **kwargs
             )
+            # The icon sits on the first line of text
+            if icon_op:
+                if rows:
+                    rows[0].ops.insert(0, icon_op)
+                else:
+                    rows = [Row((size or self.TEXT_FONT_SIZE) * 1.5, [icon_op])]
+            return rows
 
         return wrapper
 
+    @memoize_layout
     @with_icon
-    def add_text(self, page, text, x, y, font=None, size=None, color=None, max_width=None, icon=None, icon_color=None):
-        """Efficiently wraps text and places each line separately to prevent overflow."""
+    def layout_text(self, text, x, font=None, size=None, color=None, max_width=None, icon=None, icon_color=None):
+        """Wraps text and lays out each line as its own row to prevent overflow."""
         font = font or self.REGULAR
         size = size or self.TEXT_FONT_SIZE
         color = color or self.TEXT_COLOR
-        final_y = y
-
-        # Define character width factors once (could be class constants)
-        CHAR_WIDTH_FACTORS = {
-            self.BOLD: 0.65,
-            self.ITALIC: 0.55,
-            self.REGULAR: 0.5
-        }
-
-        # Base character width for this text
-        char_width_base = size * CHAR_WIDTH_FACTORS.get(font, 0.5)
-
-        # Fast width estimation - use for quick initial checks
-        def quick_width_estimate(text_str):
-            return len(text_str) * char_width_base
-
-        # More accurate width calculation - use only when needed
-        def get_text_width(text_str):
-            # Pre-calculate width factors for different character types
-            width_factors = {
-                'upper': 1.2,
-                'narrow': 0.7,  # i, j, l, etc.
-                'wide': 1.3,  # m, w, etc.
-                'normal': 1.0
-            }
-
-            # Common narrow and wide characters
-            narrow_chars = set('ijlt,.\'"|!;:()[]{}')
-            wide_chars = set('mwWM@%&')
-
-            # Calculate width using character classes for efficiency
-            width = 0
-            for char in text_str:
-                if char.isupper():
-                    width += char_width_base * width_factors['upper']
-                elif char in narrow_chars:
-                    width += char_width_base * width_factors['narrow']
-                elif char in wide_chars:
-                    width += char_width_base * width_factors['wide']
-                else:
-                    width += char_width_base
-            return width
 
         if not max_width:
             # Single line text without wrapping
-            page.insert_text((x, y), text, fontsize=size, fontname=font, color=color)
-            return final_y + size * 1.5
-
-        # Check if text is likely to fit in a single line using quick estimate
-        if quick_width_estimate(text) <= max_width:
-            # Double-check with accurate calculation only if we're close to the limit
-            if quick_width_estimate(text) > max_width * 0.8:
-                if get_text_width(text) <= max_width:
-                    page.insert_text((x, y), text, fontsize=size, fontname=font, color=color)
-                    return final_y + size * 1.5
-            else:
-                page.insert_text((x, y), text, fontsize=size, fontname=font, color=color)
-                return final_y + size * 1.5
-
-        # Handle emails specially
-        if '@' in text:
-            # Split email into parts
-            parts = text.split('@')
-            username = parts[0]
-            domain = '@' + parts[1] if len(parts) > 1 else ''
-
-            # Try to keep each part on its own line
-            current_parts = [username, domain]
-            for part in current_parts:
-                # Skip empty parts
-                if not part:
-                    continue
-
-                # Check if part fits on one line
-                if get_text_width(part) <= max_width:
-                    page.insert_text((x, final_y), part, fontsize=size, fontname=font, color=color)
-                    final_y += size * 1.5
-                else:
-                    # Need to wrap this part
-                    current_line = ""
-                    for char in part:
-                        test_line = current_line + char
-                        if quick_width_estimate(test_line) <= max_width:
-                            current_line = test_line
-                        else:
-                            # Verify with accurate calculation if close to limit
-                            if quick_width_estimate(test_line) <= max_width * 1.1:
-                                if get_text_width(test_line) <= max_width:
-                                    current_line = test_line
-                                    continue
-
-                            # Output current line
-                            page.insert_text((x, final_y), current_line, fontsize=size, fontname=font, color=color)
-                            final_y += size * 1.5
-                            current_line = char
-
-                    # Output remaining text
-                    if current_line:
-                        page.insert_text((x, final_y), current_line, fontsize=size, fontname=font, color=color)
-                        final_y += size * 1.5
+            lines = [text]
         else:
-            # Regular text - use word-based wrapping with fallback for long words
-            words = text.split()
-            current_line = ""
+            lines = self.break_lines(text, font, size, max_width)
 
-            for word in words:
-                # Test if adding word to current line would exceed width
-                test_line = current_line + (" " if current_line else "") + word
+        return [Row(size * 1.5, [('text', x, 0, line, font, size, color)]) for line in lines]
 
-                # Quick check
-                if quick_width_estimate(test_line) <= max_width:
-                    current_line = test_line
-                else:
-                    # Double-check with accurate calculation if we're close
-                    if quick_width_estimate(test_line) <= max_width * 1.1:
-                        if get_text_width(test_line) <= max_width:
-                            current_line = test_line
-                            continue
-
-                    # Output current line if it has content
-                    if current_line:
-                        page.insert_text((x, final_y), current_line, fontsize=size, fontname=font, color=color)
-                        final_y += size * 1.5
-
-                    # Check if single word is too long for a line
-                    if quick_width_estimate(word) > max_width:
-                        # Character wrapping for this word
-                        current_line = ""
-                        for char in word:
-                            test_line = current_line + char
-                            if quick_width_estimate(test_line) <= max_width:
-                                current_line = test_line
-                            else:
-                                page.insert_text((x, final_y), current_line, fontsize=size, fontname=font, color=color)
-                                final_y += size * 1.5
-                                current_line = char
-                    else:
-                        current_line = word
-
-            # Output remaining text
-            if current_line:
-                page.insert_text((x, final_y), current_line, fontsize=size, fontname=font, color=color)
-                final_y += size * 1.5
-
-        return final_y
-
-    def draw_sidebar(self, page):
-        """Draws the left sidebar."""
-        page.draw_rect([0, 0, self.SIDEBAR_WIDTH, self.PAGE_HEIGHT], fill=self.SIDEBAR_COLOR, color=self.SIDEBAR_COLOR)
-
-    def add_title(self, page, text, x, y):
-        """Adds a bold, underlined title to the PDF."""
-        self.add_text(page, text, x, y, font=self.BOLD, size=self.TITLE_FONT_SIZE)
-        page.draw_line((x, y + 8), (x + 100, y + 8), width=1, color=self.TEXT_COLOR)
-
-    def add_profile_picture(self, page, img_path):
-        """Adds a profile picture to the top of the sidebar, resized to fit."""
-        try:
-            img = Image.open(img_path).convert("RGBA")
+    def break_lines(self, text, font, size, max_width):
+        """Splits text into lines no wider than max_width, breaking long words and emails."""
+        return line_breaker.break_lines(text, font, size, max_width)
 
-            # Calculate the target size to fit in sidebar (maintaining aspect ratio)
-            max_size = int(self.SIDEBAR_WIDTH * 0.8)  # Use 80% of sidebar width
+    def template_display_list(self):
+        """Lays out the parts of the page that do not depend on the CV content."""
+        display_list = DisplayList(self.PAGE_WIDTH, self.PAGE_HEIGHT)
 
-            width, height = img.size
-            if width > max_size or height > max_size:
-                if width > height:
-                    new_width = max_size
-                    new_height = int(height * (max_size / width))
-                else:
-                    new_height = max_size
-                    new_width = int(width * (max_size / height))
-                img = img.resize((new_width, new_height), Image.LANCZOS)  # High-quality resize
-            else:
-                new_width = width
-                new_height = height
+        # Left sidebar
+        display_list.rect(0, 0, self.SIDEBAR_WIDTH, self.PAGE_HEIGHT, self.SIDEBAR_COLOR, self.SIDEBAR_COLOR)
+        return display_list
+
+    def draw_template(self, page):
+        """Draws the template skeleton on a fitz page."""
+        paint_fitz(page, self.template_display_list())
+
+    def layout_title(self, text, x):
+        """Lays out a bold, underlined sidebar title."""
+        ops = [
+            ('text', x, 10, text, self.BOLD, self.TITLE_FONT_SIZE, self.TEXT_COLOR),
+            ('line', x, 18, x + 100, 18, self.TEXT_COLOR, 1),
+        ]
+        return Row(30, ops, keep_with_next=True)
+
+    def layout_profile_picture(self, img_path):
+        """Lays out a profile picture at the top of the sidebar, resized to fit."""
+        try:
+            # Photos are normalized once (at upload) and then served from memory
+            max_size = int(self.SIDEBAR_WIDTH * 0.8)  # Use 80% of sidebar width
+            photo = photo_cache.load(img_path, max_size)
 
             # Center in sidebar
             x_center = self.SIDEBAR_WIDTH / 2
-            rect = fitz.Rect(
-                x_center - new_width / 2,  # Left
-                10,  # Top
-                x_center + new_width / 2,  # Right
-                10 + new_height  # Bottom
-            )
+            return ('image', x_center - photo.width / 2, 0, x_center + photo.width / 2, photo.height, photo.data)
+        except Exception as e:
+            current_app.logger.warning(f"Error loading profile picture: {str(e)}")
+            return None
 
-            # Save the resized image
-            img_path = "resized_profile.png"
-            img.save(img_path, quality=95)
 
-            page.insert_image(rect, filename=img_path)
-        except Exception as e:
-            print("Error loading profile picture:", e)
+def new_cv_filename():
+    """Return a unique filename for a generated CV (safe for concurrent renders)"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"cv_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
 
 
-def generate_cv_from_form_data(cv_data, upload_folder, language='fr'):
-    """Helper function to generate CV from form data with language selection"""
-    print(f"Generating CV in {language} language with data: {cv_data}")
-    generator = CVGenerator(cv_data, upload_folder, language)
-    return generator.generate()
+def render_pdf(cv_data, language='fr', photo_path='', template=None, output_profile=None):
+    """
+    Render a CV to PDF bytes without touching the request or the render cache.
+
+    Used by render jobs and batch workers, which run outside of a request but
+    inside an app context. The CV language is also used for the translated
+    strings drawn on it; ``output_profile`` defaults to PDF_OUTPUT_PROFILE.
+    """
+    generator = CVGenerator(cv_data, None, language, photo_path=photo_path, template=template or DEFAULT_TEMPLATE,
+                            output_profile=output_profile)
+    with force_locale(language):
+        return generator.render()
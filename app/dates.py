@@ -0,0 +1,195 @@
+"""
+Date normalization for CV rendering.
+
+Dates reach the renderer in a handful of shapes: HTTP dates from the session
+serializer ('Fri, 01 Mar 2019 00:00:00 GMT'), ISO and slashed dates, month
+names ('Mar 2019') and ranges typed in the preview editor
+('Mar 2019 - Jan 2023'). One precompiled pattern recognizes all of them, and
+results are memoized per (string, language).
+"""
+import calendar
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = 'fr'
+
+# Normalized (string, language) pairs kept in memory
+DATE_CACHE_SIZE = 4096
+
+# Abbreviated month names drawn on the CV
+MONTH_NAMES = {
+    'en': [
+        'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+        'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
+    ],
+    'tr': [
+        'Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz',
+        'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara'
+    ],
+    'fr': [
+        'Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin',
+        'Juil', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc'
+    ]
+}
+
+# English month names accepted in input, abbreviated or full
+_ENGLISH_MONTHS = ['january', 'february', 'march', 'april', 'may', 'june',
+                   'july', 'august', 'september', 'october', 'november', 'december']
+_INPUT_MONTHS = {name: number for number, name in enumerate(_ENGLISH_MONTHS, start=1)}
+_INPUT_MONTHS.update({name[:3]: number for number, name in enumerate(_ENGLISH_MONTHS, start=1)})
+_WEEKDAYS = {'mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'}
+
+DATE_PATTERN = re.compile(r"""
+      (?P<weekday>[A-Za-z]{3}),\ (?P<http_day>\d{1,2})\ (?P<http_month>[A-Za-z]{3})\ (?P<http_year>\d{4})
+      \ (?:[01]?\d|2[0-3]):[0-5]?\d:[0-5]?\d\ GMT                               # Fri, 01 Mar 2019 00:00:00 GMT
+    | (?P<month_name>[A-Za-z]+)\ (?P<named_year>\d{4})                         # Mar 2019, March 2019
+    | (?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})          # 2019-03-01
+    | (?P<first>\d{1,2})/(?P<second>\d{1,2})/(?P<slash_year>\d{4})             # 03/01/2019 or 01/03/2019
+""", re.VERBOSE)
+
+_WHITESPACE = re.compile(r'\s+')
+_RANGE_SEPARATOR = re.compile(r'\s*-\s*')
+
+
+def _valid_day(day, month, year):
+    return 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
+
+def sniff_date(text):
+    """
+    Recognize a single, whitespace-normalized date.
+
+    Args:
+        text (str): The date string
+
+    Returns:
+        tuple or None: (month, year), or None if the format is not recognized
+    """
+    match = DATE_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+
+    groups = match.groupdict()
+
+    if groups['http_year']:
+        month = _INPUT_MONTHS.get(groups['http_month'].lower())
+        year = int(groups['http_year'])
+        if groups['weekday'].lower() not in _WEEKDAYS or not month:
+            return None
+        if not _valid_day(int(groups['http_day']), month, year):
+            return None
+        return month, year
+
+    if groups['named_year']:
+        month = _INPUT_MONTHS.get(groups['month_name'].lower())
+        return (month, int(groups['named_year'])) if month else None
+
+    if groups['iso_year']:
+        month, year = int(groups['iso_month']), int(groups['iso_year'])
+        return (month, year) if _valid_day(int(groups['iso_day']), month, year) else None
+
+    # Slashed dates are read month first (US), then day first (European)
+    first, second, year = int(groups['first']), int(groups['second']), int(groups['slash_year'])
+    if _valid_day(second, first, year):
+        return first, year
+    if _valid_day(first, second, year):
+        return second, year
+    return None
+
+
+def get_month_name(month_number, lang=DEFAULT_LANGUAGE):
+    """
+    Get the month name for a given month number in the specified language.
+
+    Args:
+        month_number (int): Month number (1-12)
+        lang (str): Language code; unsupported languages use French
+
+    Returns:
+        str: Month name in the specified language
+    """
+    return MONTH_NAMES.get(lang, MONTH_NAMES[DEFAULT_LANGUAGE])[month_number - 1]
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(date_str, lang=DEFAULT_LANGUAGE):
+    """
+    Parse date string in various formats and return formatted date.
+    Returns None if date_str is None or empty.
+
+    Of a date range, only the start is kept. Results are memoized.
+
+    Args:
+        date_str (str): The date string to parse
+        lang (str): Language code for the output month name
+
+    Returns:
+        str or None: 'Month Year', the cleaned input if it is not a known
+        date format, or None if the input is empty
+    """
+    if not date_str:
+        return None
+
+    date_str = _WHITESPACE.sub(' ', date_str).strip()
+    if ' - ' in date_str:
+        date_str = date_str.split(' - ')[0].strip()
+
+    parsed = sniff_date(date_str)
+    if parsed is None:
+        # Logged once per string, since the result is cached
+        logger.warning(f"Could not parse date: {date_str}")
+        return date_str
+
+    month, year = parsed
+    return f"{get_month_name(month, lang)} {year}"
+
+
+def split_date_range(raw):
+    """
+    Split a date range such as 'Mar 2019 - Jan 2023' into its start and end.
+
+    A single date (including an ISO date) is returned as the start.
+
+    Returns:
+        tuple: (start, end) strings, ``end`` is '' when there is none
+    """
+    raw = _WHITESPACE.sub(' ', raw or '').strip()
+    if not raw or DATE_PATTERN.fullmatch(raw):
+        return raw, ''
+
+    parts = _RANGE_SEPARATOR.split(raw)
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+
+def normalize_cv_dates(cv_data, lang=DEFAULT_LANGUAGE):
+    """
+    Normalize every date of a cv_data payload in one pass.
+
+    Experience dates come from ``start_date``, which may hold a whole range
+    edited in the preview, falling back to ``end_date`` for the end unless
+    the position is current.
+
+    Args:
+        cv_data (dict): The CV data as stored in the session
+        lang (str): Language code for the month names
+
+    Returns:
+        dict: 'experience' and 'education' map to lists of (start, end),
+        'certifications' to a list of dates, in entry order; missing dates are None
+    """
+    experience = []
+    for exp in cv_data.get('experience', []):
+        start, end = split_date_range(exp.get('start_date', ''))
+        if not end and not exp.get('is_current'):
+            end = exp.get('end_date', '')
+        experience.append((parse_date(start, lang), parse_date(end, lang)))
+
+    return {
+        'experience': experience,
+        'education': [(parse_date(edu.get('start_date', ''), lang), parse_date(edu.get('end_date', ''), lang))
+                      for edu in cv_data.get('education', [])],
+        'certifications': [parse_date(cert.get('date', ''), lang) for cert in cv_data.get('certifications', [])],
+    }
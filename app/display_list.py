@@ -0,0 +1,203 @@
+"""
+Display lists: what is drawn on one page, in absolute coordinates.
+
+The layout pass produces rows of operations positioned relative to their
+row; once the rows are placed on pages, each page becomes a DisplayList.
+Backends (see backends.py) replay display lists onto a fitz page or a
+raster image, so measuring, placing and drawing stay separate stages.
+
+Text is split into runs of a single font as it is added, each character
+going to the first font of its fallback chain that has a glyph for it (see
+font_fallback.py).
+
+Operations are stored column-wise: one byte for the kind, four doubles for
+the geometry, an index into a table of deduplicated styles and a payload
+(the text, or the image bytes). Iterating over a display list yields the
+operations in the vocabulary of layout.py, with absolute coordinates:
+
+    ('text', x, y, text, fontname, fontsize, color)
+    ('line', x0, y0, x1, y1, color, width)
+    ('circle', x, y, radius, color, fill)
+    ('rect', x0, y0, x1, y1, color, fill)
+    ('image', x0, y0, x1, y1, stream)
+    ('icon', x, y, name, size, color)
+"""
+import base64
+from array import array
+
+from .font_fallback import font_fallback
+from .text_metrics import text_measurer
+
+TEXT, LINE, CIRCLE, RECT, IMAGE, ICON = range(6)
+OP_KINDS = ('text', 'line', 'circle', 'rect', 'image', 'icon')
+
+
+def _tuples(value):
+    """Turn the nested lists of a JSON style back into tuples"""
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    return value
+
+
+class DisplayList:
+    """
+    The drawing operations of one page, in paint order.
+
+    Args:
+        width (float): Page width in points
+        height (float): Page height in points
+    """
+    __slots__ = ('width', 'height', 'kinds', 'coords', 'styles', 'style_table', 'payloads', '_style_ids')
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.kinds = array('B')
+        self.coords = array('d')  # Four values per operation
+        self.styles = array('I')  # Index into style_table
+        self.style_table = []
+        self.payloads = []  # Text, image bytes, icon name or None
+        self._style_ids = {}
+
+    def _append(self, kind, x0, y0, x1, y1, style, payload=None):
+        style_id = self._style_ids.get(style)
+        if style_id is None:
+            style_id = self._style_ids[style] = len(self.style_table)
+            self.style_table.append(style)
+
+        self.kinds.append(kind)
+        self.coords.extend((x0, y0, x1, y1))
+        self.styles.append(style_id)
+        self.payloads.append(payload)
+
+    def text(self, x, y, text, fontname, fontsize, color):
+        runs = font_fallback.runs(text, fontname)
+        for run, run_font in runs:
+            self._append(TEXT, x, y, 0, 0, (run_font, fontsize, color), run)
+            if len(runs) > 1:
+                x += text_measurer.text_width(run, run_font, fontsize)
+
+    def line(self, x0, y0, x1, y1, color, width=1):
+        self._append(LINE, x0, y0, x1, y1, (color, width))
+
+    def circle(self, x, y, radius, color, fill=None):
+        self._append(CIRCLE, x, y, radius, 0, (color, fill))
+
+    def rect(self, x0, y0, x1, y1, color, fill=None):
+        self._append(RECT, x0, y0, x1, y1, (color, fill))
+
+    def image(self, x0, y0, x1, y1, stream):
+        self._append(IMAGE, x0, y0, x1, y1, (), stream)
+
+    def icon(self, x, y, name, size, color):
+        self._append(ICON, x, y, size, 0, (color,), name)
+
+    def add(self, y, op):
+        """Append a layout operation whose vertical coordinates are relative to ``y``"""
+        kind = op[0]
+
+        if kind == 'text':
+            _, x, dy, text, fontname, fontsize, color = op
+            self.text(x, y + dy, text, fontname, fontsize, color)
+        elif kind == 'line':
+            _, x0, dy0, x1, dy1, color, width = op
+            self.line(x0, y + dy0, x1, y + dy1, color, width)
+        elif kind == 'circle':
+            _, x, dy, radius, color, fill = op
+            self.circle(x, y + dy, radius, color, fill)
+        elif kind == 'rect':
+            _, x0, dy0, x1, dy1, color, fill = op
+            self.rect(x0, y + dy0, x1, y + dy1, color, fill)
+        elif kind == 'image':
+            _, x0, dy0, x1, dy1, stream = op
+            self.image(x0, y + dy0, x1, y + dy1, stream)
+        elif kind == 'icon':
+            _, x, dy, name, size, color = op
+            self.icon(x, y + dy, name, size, color)
+        else:
+            raise ValueError(f"Unknown layout operation '{kind}'")
+
+    def extend(self, placed_ops):
+        """Append (y, op) pairs, as produced by Flow.paginate"""
+        for y, op in placed_ops:
+            self.add(y, op)
+
+    def fonts(self):
+        """Names of the fonts the text operations are drawn with"""
+        return {self.style_table[style_id][0] for kind, style_id in zip(self.kinds, self.styles) if kind == TEXT}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        coords, style_table = self.coords, self.style_table
+        for i, kind in enumerate(self.kinds):
+            x0, y0, x1, y1 = coords[4 * i:4 * i + 4]
+            style = style_table[self.styles[i]]
+            payload = self.payloads[i]
+
+            if kind == TEXT:
+                yield ('text', x0, y0, payload) + style
+            elif kind == LINE:
+                yield ('line', x0, y0, x1, y1) + style
+            elif kind == CIRCLE:
+                yield ('circle', x0, y0, x1) + style
+            elif kind == RECT:
+                yield ('rect', x0, y0, x1, y1) + style
+            elif kind == ICON:
+                yield ('icon', x0, y0, payload, x1) + style
+            else:
+                yield ('image', x0, y0, x1, y1, payload)
+
+    def to_dict(self):
+        """
+        A JSON-serializable copy of the display list (images are base64 encoded).
+
+        Returns:
+            dict: Rebuilt into a DisplayList by from_dict()
+        """
+        return {
+            'width': self.width,
+            'height': self.height,
+            'kinds': list(self.kinds),
+            'coords': list(self.coords),
+            'styles': list(self.styles),
+            'style_table': [list(style) for style in self.style_table],
+            'payloads': [{'image': base64.b64encode(p).decode('ascii')} if isinstance(p, bytes) else p
+                         for p in self.payloads],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        display_list = cls(data['width'], data['height'])
+        display_list.kinds = array('B', data['kinds'])
+        display_list.coords = array('d', data['coords'])
+        display_list.styles = array('I', data['styles'])
+        display_list.style_table = [_tuples(style) for style in data['style_table']]
+        display_list._style_ids = {style: i for i, style in enumerate(display_list.style_table)}
+        display_list.payloads = [base64.b64decode(p['image']) if isinstance(p, dict) else p
+                                 for p in data['payloads']]
+        return display_list
+
+
+def build_display_lists(width, height, *flow_pages):
+    """
+    Merge the paginated flows of a document into one display list per page.
+
+    Args:
+        width (float): Page width in points
+        height (float): Page height in points
+        *flow_pages: Results of Flow.paginate, painted in the given order
+
+    Returns:
+        list: One DisplayList per page
+    """
+    page_count = max((len(pages) for pages in flow_pages), default=0)
+    display_lists = []
+    for page_number in range(page_count):
+        display_list = DisplayList(width, height)
+        for pages in flow_pages:
+            if page_number < len(pages):
+                display_list.extend(pages[page_number])
+        display_lists.append(display_list)
+    return display_lists
@@ -0,0 +1,264 @@
+"""
+Durable CV drafts.
+
+The CV being edited is also written to the database, one row per cv_data
+section (personal_info, experience, ...) holding that section's JSON: a
+draft outlives the 12 hour session, and a section can be read or rewritten
+without loading the rest of the document. Drafts belong to an anonymous
+user, identified by a random token kept in a long-lived cookie.
+
+Autosave only writes the sections that changed, and batches them: they are
+queued and written together, in one transaction, every DRAFT_FLUSH_INTERVAL
+seconds or as soon as DRAFT_BATCH_SIZE sections are pending (at once when
+DRAFT_FLUSH_INTERVAL is 0).
+"""
+import atexit
+import os
+import secrets
+import threading
+
+from flask import after_this_request, current_app, request, session
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+
+from app import db
+from .models import Draft, DraftSection, User, _now
+
+# cv_data sections, in document order
+SECTIONS = ('personal_info', 'education', 'experience', 'skills', 'languages', 'certifications', 'hobbys',
+            'references', 'softwares')
+
+
+def _sqlite_pragmas(connection, _):
+    cursor = connection.cursor()
+    # Readers do not block the autosave writer, and drafts cascade to their sections
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def changed_sections(previous, cv_data):
+    """Return the sections of ``cv_data`` that differ from ``previous``"""
+    previous = previous or {}
+    return {name: value for name, value in cv_data.items() if previous.get(name) != value}
+
+
+class DraftStore:
+    """Drafts of one app, with the queue of autosaved sections waiting to be written"""
+
+    def __init__(self, app, flush_interval=2.0, batch_size=50):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}  # (draft id, section name) -> JSON
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.flushes = 0
+
+    def user_for(self, token, create=False):
+        """Return the user of ``token``, created if asked and missing"""
+        user = User.query.filter_by(token=token).one_or_none()
+        if user is None and create:
+            user = User(token=token)
+            db.session.add(user)
+            db.session.commit()
+        return user
+
+    def create_draft(self, token, language=None, template=None):
+        """
+        Start a draft for the user of ``token``.
+
+        Returns:
+            int: The draft id
+        """
+        draft = Draft(user=self.user_for(token, create=True), language=language, template=template)
+        db.session.add(draft)
+        db.session.commit()
+        return draft.id
+
+    def latest_draft(self, token):
+        """Return the id of the most recently updated draft of the user of ``token``, or None"""
+        row = (db.session.query(Draft.id).join(User).filter(User.token == token)
+               .order_by(Draft.updated_at.desc(), Draft.id.desc()).first())
+        return row[0] if row else None
+
+    def owns(self, token, draft_id):
+        """Tell whether the draft belongs to the user of ``token``"""
+        query = db.session.query(Draft.id).join(User).filter(User.token == token, Draft.id == draft_id)
+        return query.first() is not None
+
+    def save_sections(self, draft_id, sections):
+        """Write sections of a draft now, bypassing the autosave queue"""
+        self._write({(draft_id, name): self.app.json.dumps(value) for name, value in sections.items()})
+
+    def autosave(self, draft_id, sections):
+        """
+        Queue sections of a draft for the next batched write.
+
+        Values are serialized here, so later changes to them are not saved
+        by accident; a section queued twice is only written once, with its
+        latest value.
+        """
+        items = {(draft_id, name): self.app.json.dumps(value) for name, value in sections.items()}
+        if not items:
+            return
+        if self.flush_interval <= 0:
+            self._write(items)
+            return
+
+        with self._condition:
+            self._pending.update(items)
+            self._ensure_writer()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self):
+        """Write every queued section now; on failure they stay queued for the next flush"""
+        with self._condition:
+            items, self._pending = self._pending, {}
+        if not items:
+            return
+        try:
+            with self.app.app_context():
+                self._write(items)
+        except Exception as e:
+            self.app.logger.error(f"Draft autosave failed, {len(items)} section(s) kept queued: {e}")
+            with self._condition:
+                # Sections queued again meanwhile keep their newer value
+                self._pending = {**items, **self._pending}
+
+    def _ensure_writer(self):
+        # The thread is started on first use, also in workers forked after create_app
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            if self._thread is None:
+                # Sections still queued when the process exits are written then
+                atexit.register(self.flush)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='draft-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._pending) >= self.batch_size, self.flush_interval)
+            self.flush()
+
+    def _write(self, items):
+        """Upsert sections in one transaction; ``items`` maps (draft id, name) to JSON"""
+        now = _now()
+        draft_ids = {draft_id for draft_id, _ in items}
+        existing = {(section.draft_id, section.name): section for section in DraftSection.query.filter(
+            DraftSection.draft_id.in_(draft_ids),
+            DraftSection.name.in_({name for _, name in items}))}
+
+        for (draft_id, name), data in items.items():
+            section = existing.get((draft_id, name))
+            if section is None:
+                position = SECTIONS.index(name) if name in SECTIONS else len(SECTIONS)
+                db.session.add(DraftSection(draft_id=draft_id, name=name, position=position, data=data,
+                                            updated_at=now))
+            else:
+                section.data, section.updated_at = data, now
+        Draft.query.filter(Draft.id.in_(draft_ids)).update({Draft.updated_at: now}, synchronize_session=False)
+        db.session.commit()
+        self.flushes += 1
+
+    def load_sections(self, draft_id, names=None):
+        """
+        Read sections of a draft; only the requested rows are fetched and parsed.
+
+        Args:
+            draft_id (int): The draft
+            names (iterable): Section names, all of them by default
+
+        Returns:
+            dict: Section name -> value, in document order
+        """
+        query = DraftSection.query.filter_by(draft_id=draft_id)
+        if names is not None:
+            query = query.filter(DraftSection.name.in_(list(names)))
+        return {section.name: self.app.json.loads(section.data)
+                for section in query.order_by(DraftSection.position, DraftSection.name)}
+
+    def load(self, draft_id):
+        """Return the whole cv_data of a draft, or None if it has no sections"""
+        return self.load_sections(draft_id) or None
+
+
+def init_drafts(app):
+    """Bind the database to ``app``, create the missing tables and set up the draft store"""
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _sqlite_pragmas)
+        db.create_all()
+        if not isinstance(db.engine.pool, StaticPool):
+            # Workers forked after create_app (gunicorn --preload) would otherwise reuse the
+            # master's pooled connection; each process now opens its own. The in-memory test
+            # database lives in its single StaticPool connection and is kept.
+            db.engine.dispose()
+
+    app.extensions['drafts'] = DraftStore(app, app.config.get('DRAFT_FLUSH_INTERVAL', 2.0),
+                                          app.config.get('DRAFT_BATCH_SIZE', 50))
+
+
+def get_draft_store():
+    """Return the draft store of the current app"""
+    return current_app.extensions['drafts']
+
+
+def _draft_token(create=False):
+    """Token of the visitor's draft cookie, set on the response when ``create`` asks for a new one"""
+    name = current_app.config.get('DRAFT_COOKIE_NAME', 'cv_drafts')
+    token = request.cookies.get(name)
+    if token or not create:
+        return token
+
+    token = secrets.token_urlsafe(32)
+
+    @after_this_request
+    def set_cookie(response):
+        response.set_cookie(name, token, max_age=current_app.config.get('DRAFT_COOKIE_MAX_AGE'), httponly=True,
+                            secure=current_app.config.get('SESSION_COOKIE_SECURE', False), samesite='Lax')
+        return response
+
+    return token
+
+
+def autosave_cv_data(cv_data, previous=None):
+    """
+    Save the changed sections of the session's draft, starting a draft on first save.
+
+    Failures are logged: the CV stays in the session either way.
+    """
+    try:
+        store = get_draft_store()
+        token = _draft_token(create=True)
+        draft_id = session.get('draft_id')
+        if draft_id is None or not store.owns(token, draft_id):
+            draft_id = store.create_draft(token, session.get('lang'), session.get('selected_template'))
+            session['draft_id'] = draft_id
+            previous = None
+        store.autosave(draft_id, changed_sections(previous, cv_data))
+    except Exception as e:
+        current_app.logger.error(f"Error saving CV draft: {str(e)}")
+
+
+def restore_cv_data():
+    """
+    Put the visitor's latest draft back in the session once it expired.
+
+    Returns:
+        dict: The restored cv_data, or None when there is no draft
+    """
+    token = _draft_token()
+    if not token:
+        return None
+    store = get_draft_store()
+    draft_id = store.latest_draft(token)
+    cv_data = store.load(draft_id) if draft_id is not None else None
+    if cv_data is not None:
+        session['cv_data'], session['draft_id'] = cv_data, draft_id
+    return cv_data
@@ -0,0 +1,149 @@
+"""
+Glyph coverage of the fonts a CV is drawn with, and per-character fallback.
+
+The bold, regular and italic fonts of a CV are still chosen by language,
+but a font can only draw the characters it has glyphs for. Base-14 fonts
+are written by fitz with a single-byte encoding, so they cover Latin-1
+only: typographic apostrophes, the euro sign, Turkish or Wolof letters
+would come out as a dot. Every font gets a fallback chain; each string is
+split into runs drawn with the first font of the chain that covers the
+character, so only the fonts actually needed end up embedded.
+
+Coverage is kept as one bitmap per font, built once per process, so
+picking the font of a character is a bit test.
+"""
+import threading
+
+import fitz
+
+from .fonts import font_registry
+
+# fitz draws base-14 fonts with a single-byte encoding
+BASE14_LIMIT = 0x100
+
+# Tried in order after the font itself; the Turkish fonts cover Latin
+# Extended-A, DejaVu Sans has the widest coverage (IPA letters for Wolof,
+# Greek, Cyrillic, symbols).
+FALLBACK_CHAINS = {
+    'Helvetica-Bold': ('Turkish-Bold', 'DejaVuSans'),
+    'Times-Roman': ('Turkish-Roman', 'DejaVuSans'),
+    'Times-Italic': ('Turkish-Italic', 'DejaVuSans'),
+    'DejaVuSans': (),
+}
+DEFAULT_FALLBACKS = ('DejaVuSans',)
+
+
+class Coverage:
+    """Bitmap of the codepoints a font has glyphs for"""
+    __slots__ = ('bits', 'ascii')
+
+    def __init__(self, codepoints):
+        codepoints = list(codepoints)
+        self.bits = bytearray((max(codepoints, default=0) >> 3) + 1)
+        for codepoint in codepoints:
+            self.bits[codepoint >> 3] |= 1 << (codepoint & 7)
+
+        # Most strings are plain ASCII: they need no lookup when it is all covered
+        self.ascii = all(codepoint in self for codepoint in range(0x20, 0x7f))
+
+    def __contains__(self, codepoint):
+        index = codepoint >> 3
+        return index < len(self.bits) and bool(self.bits[index] >> (codepoint & 7) & 1)
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+
+class FontFallback:
+    """
+    Fonts, coverage bitmaps and fallback chains, built lazily once per font name.
+
+    Font names are the ones passed to ``fontname=`` when drawing: the names
+    of the font registry, everything else is treated as a base-14 font.
+    """
+
+    def __init__(self, registry=font_registry, chains=None):
+        self.registry = registry
+        self.chains = dict(FALLBACK_CHAINS if chains is None else chains)
+        self._fonts = {}
+        self._coverage = {}
+        self._lock = threading.Lock()
+
+    def font(self, font_name):
+        """Return the (cached) fitz.Font for ``font_name``."""
+        font = self._fonts.get(font_name)
+        if font is None:
+            if font_name in self.registry.font_files:
+                font = fitz.Font(fontbuffer=self.registry.get_buffer(font_name))
+            else:
+                font = fitz.Font(font_name)
+            with self._lock:
+                font = self._fonts.setdefault(font_name, font)
+        return font
+
+    def coverage(self, font_name):
+        """Return the (cached) Coverage bitmap of ``font_name``."""
+        coverage = self._coverage.get(font_name)
+        if coverage is None:
+            codepoints = self.font(font_name).valid_codepoints()
+            if font_name not in self.registry.font_files:
+                codepoints = [cp for cp in codepoints if cp < BASE14_LIMIT]
+            coverage = Coverage(codepoints)
+            with self._lock:
+                coverage = self._coverage.setdefault(font_name, coverage)
+        return coverage
+
+    def chain(self, font_name):
+        """The font itself followed by its fallbacks"""
+        return (font_name,) + self.chains.get(font_name, DEFAULT_FALLBACKS)
+
+    def font_for(self, codepoint, font_name):
+        """
+        Pick the font that draws a character.
+
+        Returns:
+            str: The first font of the chain of ``font_name`` covering ``codepoint``,
+            or ``font_name`` itself when none does
+        """
+        for candidate in self.chain(font_name):
+            if codepoint in self.coverage(candidate):
+                return candidate
+        return font_name
+
+    def runs(self, text, font_name):
+        """
+        Split text into runs of characters drawn with the same font.
+
+        Returns:
+            list: (text, font name) pairs, in order
+        """
+        coverage = self.coverage(font_name)
+        if text.isascii() and coverage.ascii:
+            return [(text, font_name)]
+
+        runs = []
+        start, current = 0, font_name
+        for i, char in enumerate(text):
+            codepoint = ord(char)
+            font = font_name if codepoint in coverage else self.font_for(codepoint, font_name)
+            if font != current:
+                if i > start:
+                    runs.append((text[start:i], current))
+                start, current = i, font
+        runs.append((text[start:], current))
+        return runs
+
+    def preload(self, font_names):
+        """Build the coverage bitmaps of the given fonts and their fallbacks ahead of time."""
+        for font_name in font_names:
+            for candidate in self.chain(font_name):
+                self.coverage(candidate)
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._coverage.clear()
+
+
+# Shared by every CVGenerator in the process
+font_fallback = FontFallback()
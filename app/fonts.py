@@ -0,0 +1,145 @@
+import os
+import threading
+
+import fitz
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'fonts')
+
+# Font names used by the CV generator, mapped to their file in FONTS_DIR
+FONT_FILES = {
+    'Turkish-Bold': 'Turkish-Bold.ttf',
+    'Turkish-Roman': 'Turkish-Regular.ttf',
+    'Turkish-Italic': 'Turkish-Italic.ttf',
+    'DejaVuSans': 'DejaVuSans.ttf',  # Fallback for characters the other fonts lack
+}
+
+
+class FontRegistry:
+    """
+    Process-wide cache of font file contents, keyed by font name.
+
+    Each font file is read from disk once and the same bytes are handed to
+    every render (and every thread) afterwards.
+    """
+
+    def __init__(self, fonts_dir=FONTS_DIR, font_files=None):
+        self.fonts_dir = fonts_dir
+        self.font_files = dict(FONT_FILES if font_files is None else font_files)
+        self._buffers = {}
+        self._glyph_tables = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, name):
+        """Return the absolute path of the file backing font ``name``."""
+        try:
+            return os.path.join(self.fonts_dir, self.font_files[name])
+        except KeyError:
+            raise KeyError(f"Unknown font '{name}'")
+
+    def get_buffer(self, name):
+        """
+        Get the raw bytes of a font, loading them on first use.
+
+        Args:
+            name (str): Font name as used in ``fontname=`` (e.g. 'Turkish-Bold')
+
+        Returns:
+            bytes: The font file contents
+        """
+        buffer = self._buffers.get(name)
+        if buffer is not None:
+            with self._lock:
+                self.hits += 1
+            return buffer
+
+        with self._lock:
+            # Another thread may have loaded it while we waited for the lock
+            buffer = self._buffers.get(name)
+            if buffer is not None:
+                self.hits += 1
+                return buffer
+
+            with open(self.path_for(name), 'rb') as f:
+                buffer = f.read()
+            self._buffers[name] = buffer
+            self.misses += 1
+            return buffer
+
+    def insert_font(self, page, name):
+        """
+        Register font ``name`` on a fitz page from the cached buffer.
+
+        fitz maps characters to glyphs through a table built per document, up
+        to the highest codepoint drawn so far (e.g. 8227 entries for a bullet).
+        A copy of the longest table kept by keep_glyph_tables() is handed to
+        the new document, so it is not built again (about 15 ms per Turkish CV).
+
+        This goes through fitz.CheckFontInfo and the document's FontInfos, which
+        are not public API: it is written against PyMuPDF 1.25 (pinned in
+        requirements.txt). Should they change, the tables are just built per
+        document again.
+
+        Returns:
+            int: The xref of the font in the page's document
+        """
+        xref = page.insert_font(fontname=name, fontbuffer=self.get_buffer(name))
+
+        with self._lock:
+            glyphs = self._glyph_tables.get(name)
+        if glyphs is not None:
+            try:
+                info = fitz.CheckFontInfo(page.parent, xref)
+                if info is not None and len(glyphs) > len(info[1]['glyphs'] or ()):
+                    # Each document gets its own list, fitz may extend it in place
+                    info[1]['glyphs'] = list(glyphs)
+            except (AttributeError, LookupError, TypeError):
+                pass
+        return xref
+
+    def keep_glyph_tables(self, doc, xrefs):
+        """
+        Remember the glyph tables fitz built while drawing a document.
+
+        Args:
+            doc (fitz.Document): The document, once drawn
+            xrefs (dict): Font name -> xref, as returned by insert_font()
+        """
+        for name, xref in xrefs.items():
+            try:
+                info = fitz.CheckFontInfo(doc, xref)
+                glyphs = info[1]['glyphs'] if info is not None else None
+            except (AttributeError, LookupError, TypeError):
+                continue
+            with self._lock:
+                if glyphs and len(glyphs) > len(self._glyph_tables.get(name) or ()):
+                    # A copy: the document may still change its own table
+                    self._glyph_tables[name] = list(glyphs)
+
+    def preload(self, names=None):
+        """Load the given fonts (all known fonts by default) into the cache."""
+        for name in names or self.font_files:
+            self.get_buffer(name)
+
+    def stats(self):
+        """Return cache counters and the fonts currently held in memory."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'fonts': sorted(self._buffers),
+                'bytes': sum(len(b) for b in self._buffers.values()),
+            }
+
+    def clear(self):
+        """Drop all cached buffers and reset the counters."""
+        with self._lock:
+            self._buffers.clear()
+            self._glyph_tables.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every CVGenerator in the process
+font_registry = FontRegistry()
@@ -0,0 +1,133 @@
+"""
+Built-in vector icons for the contact details of a CV.
+
+Icons are outlines drawn with round strokes on a 24 x 24 grid, stored as
+polylines (curves are flattened once, at import). They carry no color: the
+color is chosen where the icon is drawn, so the same path data serves every
+``icon_color``. Drawing them as paths instead of emoji glyphs means no
+font has to be loaded or embedded, and every PDF viewer shows the same
+shapes.
+"""
+import math
+import threading
+
+GRID = 24  # Icons are designed on a GRID x GRID square
+STROKE_WIDTH = 2  # In grid units
+
+# Where the icon square sits relative to the text baseline, as a fraction of
+# its size: most of it above the baseline, like a capital letter.
+ASCENT = 0.85
+
+
+def _arc(cx, cy, r, start, end, step=15):
+    """Points of a circular arc, angles in degrees, counterclockwise with y up"""
+    count = max(2, math.ceil(abs(end - start) / step) + 1)
+    points = []
+    for i in range(count):
+        angle = math.radians(start + (end - start) * i / (count - 1))
+        points.append((cx + r * math.cos(angle), cy - r * math.sin(angle)))
+    return points
+
+
+def _circle(cx, cy, r):
+    return (tuple(_arc(cx, cy, r, 0, 360)[:-1]), True)
+
+
+def _closed(*points):
+    return (tuple(points), True)
+
+
+def _open(*points):
+    return (tuple(points), False)
+
+
+# Icon name -> ((points, closed), ...) in grid units, y pointing down
+ICON_SHAPES = {
+    'email': (
+        _closed((3, 5), (21, 5), (21, 19), (3, 19)),
+        _open((3, 6), (12, 13), (21, 6)),
+    ),
+    'phone': (
+        (tuple(_arc(15, 4, 2, 90, 0) + _arc(15, 20, 2, 0, -90) + _arc(9, 20, 2, 270, 180)
+               + _arc(9, 4, 2, 180, 90)), True),
+        _open((11, 18), (13, 18)),
+    ),
+    'location': (
+        (tuple(_arc(12, 10, 7, -30, 210)) + ((12, 22),), True),
+        _circle(12, 10, 2.5),
+    ),
+    'home': (
+        _closed((3, 9), (12, 2), (21, 9), (21, 21), (3, 21)),
+        _open((9, 21), (9, 13), (15, 13), (15, 21)),
+    ),
+    'web': (
+        _circle(12, 12, 10),
+        _open((2, 12), (22, 12)),
+        (tuple((12 + 4 * math.cos(math.radians(a)), 12 + 10 * math.sin(math.radians(a)))
+               for a in range(0, 360, 15)), True),
+    ),
+    'linkedin': (
+        _closed((2, 9), (6, 9), (6, 21), (2, 21)),
+        _circle(4, 4, 2),
+        _open((10, 9), (10, 21)),
+        (tuple(_arc(15, 14, 5, 180, 0)) + ((20, 21),), False),
+    ),
+}
+
+
+class IconLibrary:
+    """
+    Path data of the built-in icons, prebuilt once per icon and size.
+
+    Paths are relative to the icon origin, the left end of the text baseline
+    the icon sits on, so placing an icon only adds its position.
+    """
+
+    def __init__(self, shapes=ICON_SHAPES):
+        self.shapes = shapes
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.shapes
+
+    @property
+    def names(self):
+        return sorted(self.shapes)
+
+    def paths(self, name, size):
+        """
+        Get the path data of an icon drawn ``size`` points wide.
+
+        Args:
+            name (str): Icon name, e.g. 'email'
+            size (float): Icon width and height in points (usually the font size)
+
+        Returns:
+            tuple: The stroke width in points, and ((points, closed), ...) where
+            points are (x, y) offsets from the icon origin
+        """
+        key = (name, size)
+        paths = self._paths.get(key)
+        if paths is None:
+            try:
+                shapes = self.shapes[name]
+            except KeyError:
+                raise KeyError(f"Unknown icon '{name}'")
+
+            scale = size / GRID
+            top = -ASCENT * size
+            paths = (STROKE_WIDTH * scale,
+                     tuple((tuple((x * scale, top + y * scale) for x, y in points), closed)
+                           for points, closed in shapes))
+            with self._lock:
+                paths = self._paths.setdefault(key, paths)
+        return paths
+
+    def clear(self):
+        with self._lock:
+            self._paths.clear()
+
+
+# Shared by every CVGenerator in the process
+icon_library = IconLibrary()
@@ -0,0 +1,338 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+from app import db
+from .models import RenderJobState
+
+BACKENDS = ('sync', 'thread', 'process')
+
+# Seconds between two deletions of expired rows of the render_jobs table
+PRUNE_INTERVAL = 60
+
+# Set in each render worker process by init_render_worker()
+_worker_app = None
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+def init_render_worker(config_name):
+    """Create an app for a render worker process and preload the render resources once."""
+    global _worker_app
+    from app import create_app
+
+    _worker_app = create_app(config_name)
+    _worker_app.app_context().push()
+    preload_render_resources()
+
+
+def preload_render_resources():
+    """Load the fonts and advance tables every render needs"""
+    from .cv_generator import BASE_FONTS, TURKISH_FONTS
+    from .font_fallback import font_fallback
+    from .fonts import font_registry
+    from .text_metrics import text_measurer
+
+    font_registry.preload()
+    font_fallback.preload(BASE_FONTS + TURKISH_FONTS)
+    text_measurer.preload(BASE_FONTS + TURKISH_FONTS)
+
+
+class RenderJob:
+    """
+    A unit of work in the JobQueue.
+
+    ``status`` goes from 'queued' to 'running' and then 'done' (``result`` is
+    set) or 'failed' (``error`` is set). Waiters are notified on every change.
+    """
+
+    def __init__(self, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def _set(self, status, **fields):
+        with self._changed:
+            self.status = status
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def wait(self, status, timeout=None):
+        """
+        Block until the job leaves ``status`` (or ``timeout`` seconds pass).
+
+        Returns:
+            str: The job's current status
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.status != status, timeout)
+            return self.status
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of render jobs run by a local pool of worker threads.
+
+    Backends:
+        'sync': jobs run inline when submitted (tests, debugging)
+        'thread': jobs run in the worker threads
+        'process': worker threads hand the compute step to a process pool,
+            so rendering does not hold the web worker's GIL
+
+    A job is a ``compute`` callable (which must be picklable for the process
+    backend) and an optional ``finish`` callable that receives its result in
+    this process, inside an app context; the job result is what ``finish``
+    returns, and must be JSON serializable.
+
+    Jobs run in the web worker that queued them, but every status change is
+    also written to the ``render_jobs`` table: the status, events and finish
+    requests of a job may reach another worker of a pre-forking server, which
+    then reads it from there (``get``) and polls it (``wait``). Jobs completed
+    at once from the render cache are not written, their submitter finishes
+    them in the same request. Sharing needs PERSIST_GENERATED_CV, since the
+    other workers could not serve a PDF kept in this worker's memory; without
+    it jobs stay local. Rows older than ``max_age`` are deleted by the worker
+    threads, at most every PRUNE_INTERVAL seconds.
+
+    The process pool is created by the first job, from a render worker thread
+    of a web worker that already runs other threads (the other render workers,
+    the draft writer, the server's own). It is forked, so the children only
+    inherit the forking thread, and a lock another thread held at that moment
+    stays locked in them; each child creates a fresh app with
+    init_render_worker() and only runs ``compute``, which takes no such lock.
+    Prefer 'thread' unless rendering really contends for the GIL.
+    """
+
+    def __init__(self, app, backend='thread', workers=2, max_queued=32, max_jobs=1000, max_age=3600,
+                 poll_interval=0.5):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown job backend '{backend}', expected one of {BACKENDS}")
+
+        self.app = app
+        self.backend = backend
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self._pruned_at = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pool = None
+
+    def submit(self, compute, args=(), finish=None):
+        """
+        Queue a job and return it immediately.
+
+        Raises:
+            JobQueueFull: If ``max_queued`` jobs are already waiting
+        """
+        job = RenderJob()
+        self._remember(job)
+        self._publish(job)
+
+        if self.backend == 'sync':
+            self._run(job, compute, args, finish)
+            return job
+
+        self._start_workers()
+        try:
+            self._queue.put_nowait((job, compute, args, finish))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            self._update(job, 'failed', error='Queue full', finished_at=time.time())
+            raise JobQueueFull('Too many render jobs queued, try again shortly')
+        return job
+
+    def completed(self, result):
+        """Record a job whose result is already known (e.g. served from a cache)"""
+        job = RenderJob()
+        now = time.time()
+        job._set('done', result=result, started_at=now, finished_at=now)
+        self._remember(job)
+        return job
+
+    def get(self, job_id):
+        """Return a job of this process, a snapshot of a job run by another worker, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None or not self.shared else self._load(job_id)
+
+    def wait(self, job, status, timeout=None):
+        """
+        Block until ``job`` leaves ``status`` (or ``timeout`` seconds pass).
+
+        A job of another worker is read again every ``poll_interval`` seconds.
+
+        Returns:
+            RenderJob: The job as it is now
+        """
+        with self._lock:
+            local = self._jobs.get(job.id) is job
+        if local:
+            job.wait(status, timeout)
+            return job
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self._load(job.id) or job
+            if job.status != status:
+                return job
+            remaining = self.poll_interval if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            time.sleep(min(self.poll_interval, remaining))
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'backend': self.backend,
+            'workers': self.workers,
+            'queued': self._queue.qsize(),
+            **{status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')},
+        }
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _remember(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            if len(self._jobs) > self.max_jobs:
+                for job_id in [job_id for job_id, old in self._jobs.items() if old.finished]:
+                    del self._jobs[job_id]
+                    if len(self._jobs) <= self.max_jobs:
+                        break
+
+    def _update(self, job, status, **fields):
+        job._set(status, **fields)
+        self._publish(job)
+
+    @property
+    def shared(self):
+        """Whether jobs are shared with the other web workers (see the class docstring)"""
+        return self.app.config.get('PERSIST_GENERATED_CV', True)
+
+    def _publish(self, job):
+        """Write the state of a job to the database, for the other web workers"""
+        if not self.shared:
+            return
+        try:
+            with self.app.app_context():
+                db.session.merge(RenderJobState(
+                    id=job.id, status=job.status, error=job.error,
+                    result=None if job.result is None else self.app.json.dumps(job.result),
+                    created_at=job.created_at, started_at=job.started_at, finished_at=job.finished_at))
+                db.session.commit()
+        except Exception as e:
+            # The job still runs, only workers other than this one will not find it
+            self.app.logger.error(f"Could not record render job {job.id}: {str(e)}")
+
+    def _prune(self):
+        """Delete the expired rows of the render_jobs table, at most every PRUNE_INTERVAL seconds"""
+        now = time.time()
+        with self._lock:
+            if not self.shared or now - self._pruned_at < PRUNE_INTERVAL:
+                return
+            self._pruned_at = now
+        try:
+            with self.app.app_context():
+                RenderJobState.query.filter(RenderJobState.created_at < now - self.max_age).delete()
+                db.session.commit()
+        except Exception as e:
+            self.app.logger.error(f"Could not prune render jobs: {str(e)}")
+
+    def _load(self, job_id):
+        """Read a job from the database; it runs in another worker, so it is a snapshot"""
+        with self.app.app_context():
+            state = db.session.get(RenderJobState, job_id)
+            if state is None:
+                return None
+            job = RenderJob(state.id)
+            job.status, job.error = state.status, state.error
+            job.result = None if state.result is None else self.app.json.loads(state.result)
+            job.created_at, job.started_at, job.finished_at = state.created_at, state.started_at, state.finished_at
+            return job
+
+    def _start_workers(self):
+        # Started on first use so nothing runs before a pre-forking server forks
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"render-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _process_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=init_render_worker,
+                                                 initargs=(self.app.config.get('CONFIG_NAME', 'default'),))
+            return self._pool
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._run(*item)
+            self._prune()
+
+    def _run(self, job, compute, args, finish):
+        self._update(job, 'running', started_at=time.time())
+        try:
+            with self.app.app_context():
+                if self.backend == 'process':
+                    result = self._process_pool().submit(compute, *args).result()
+                else:
+                    result = compute(*args)
+                if finish is not None:
+                    result = finish(result)
+            self._update(job, 'done', result=result, finished_at=time.time())
+        except Exception as e:
+            self.app.logger.error(f"Render job {job.id} failed: {str(e)}", exc_info=True)
+            self._update(job, 'failed', error=str(e), finished_at=time.time())
+
+
+def get_job_queue():
+    """Return the render job queue of the current app"""
+    return current_app.extensions['render_jobs']
@@ -0,0 +1,126 @@
+"""
+Layout primitives for the CV renderer.
+
+Rendering happens in two passes: the layout pass measures all content once
+and turns it into rows of drawing operations, positioned relative to the
+top of their row; pagination then places those rows on as many pages as
+needed, as display lists (see display_list.py) that a backend draws.
+
+Drawing operations are plain tuples whose first item is the kind:
+
+    ('text', x, dy, text, fontname, fontsize, color)
+    ('line', x0, dy0, x1, dy1, color, width)
+    ('circle', x, dy, radius, color, fill)
+    ('rect', x0, dy0, x1, dy1, color, fill)
+    ('image', x0, dy0, x1, dy1, stream)
+    ('icon', x, dy, name, size, color)   (see icons.py; x, dy is on the text baseline)
+"""
+
+
+class Row:
+    """
+    A horizontal slice of a column that is never split across pages.
+
+    ``height`` is how far the row moves the column cursor. A row without
+    operations is a spacer: it never causes a page break and is dropped at
+    the bottom of a page. ``keep_with_next`` keeps the row on the same page as
+    the row that follows it (e.g. a section title and its first entry).
+    """
+    __slots__ = ('height', 'ops', 'keep_with_next')
+
+    def __init__(self, height, ops=None, keep_with_next=False):
+        self.height = height
+        self.ops = ops if ops is not None else []
+        self.keep_with_next = keep_with_next
+
+    @property
+    def is_spacer(self):
+        return not self.ops
+
+
+class Block:
+    """
+    Consecutive rows belonging to one entry.
+
+    A block can carry a vertical ``rail`` (x, color, extent), the timeline
+    line drawn next to its rows: ``extent`` is its length when the whole
+    block fits on one page, otherwise it spans the block's rows on each page.
+    """
+    __slots__ = ('rows', 'rail')
+
+    def __init__(self, rows=None, rail=None):
+        self.rows = rows if rows is not None else []
+        self.rail = rail
+
+
+class Flow:
+    """
+    A column of blocks laid out top to bottom.
+
+    Args:
+        first_top (float): Cursor position at the top of the first page
+        top (float): Cursor position at the top of continuation pages
+        bottom (float): Position content rows must end above
+    """
+
+    def __init__(self, first_top, top, bottom):
+        self.first_top = first_top
+        self.top = top
+        self.bottom = bottom
+        self.blocks = []
+
+    def add(self, *blocks):
+        self.blocks.extend(blocks)
+
+    def add_rows(self, *rows):
+        self.blocks.append(Block(list(rows)))
+
+    def paginate(self):
+        """
+        Place every row on a page.
+
+        Returns:
+            list: One list per page of (y, op) pairs, where ``y`` is the
+            absolute position the op's relative coordinates are based on
+        """
+        rows = [(block, row) for block in self.blocks for row in block.rows]
+        pages = [[]]
+        page_top = y = self.first_top
+        rail_segments = {}  # id(block) -> [[page, start, end], ...]
+
+        for index, (block, row) in enumerate(rows):
+            if not row.is_spacer:
+                # Height of this row plus any rows it must stay with
+                group_height = row.height
+                next_index = index
+                while rows[next_index][1].keep_with_next and next_index + 1 < len(rows):
+                    next_index += 1
+                    group_height += rows[next_index][1].height
+
+                if y + group_height > self.bottom and y > page_top:
+                    pages.append([])
+                    page_top = y = self.top
+
+                page = len(pages) - 1
+                pages[page].extend((y, op) for op in row.ops)
+
+                if block.rail is not None:
+                    segments = rail_segments.setdefault(id(block), [])
+                    if not segments or segments[-1][0] != page:
+                        segments.append([page, y, y])
+                    segments[-1][2] = y + row.height
+
+            y += row.height
+
+        # Timeline rails are drawn once we know where their rows ended up
+        for block in self.blocks:
+            segments = rail_segments.get(id(block))
+            if not segments:
+                continue
+            x, color, extent = block.rail
+            for page, start, end in segments:
+                length = extent if len(segments) == 1 else end - start
+                pages[page].append((start, ('line', x, 0, x, length, color, 1)))
+
+        return pages
+
@@ -0,0 +1,110 @@
+"""
+Memoized layouts of CV sections and entries.
+
+Editing a CV in the preview replaces the whole cv_data, but usually changes a
+single entry. Layout results (wrapped lines, row heights, drawing
+operations) are cached per entry under its content and everything that
+affects its measurement: fonts, sizes and widths. A re-render only measures
+the entries that changed and replays the cached layout of the others.
+
+Cached layouts are stored frozen (tuples only) and thawed into new Row and
+Block objects on every use, so a render may adjust its rows (e.g. keep a row
+with the next one) and identical entries never share a Block.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from .layout import Block, Row
+
+
+def freeze(layout):
+    """Turn a Row, a Block or a list of them into nested tuples"""
+    if isinstance(layout, Row):
+        return ('row', layout.height, tuple(layout.ops), layout.keep_with_next)
+    if isinstance(layout, Block):
+        return ('block', tuple(freeze(row) for row in layout.rows), layout.rail)
+    return ('list', tuple(freeze(item) for item in layout))
+
+
+def thaw(frozen):
+    """Build new Row and Block objects from a frozen layout"""
+    kind = frozen[0]
+    if kind == 'row':
+        _, height, ops, keep_with_next = frozen
+        return Row(height, list(ops), keep_with_next)
+    if kind == 'block':
+        _, rows, rail = frozen
+        return Block([thaw(row) for row in rows], rail)
+    return [thaw(item) for item in frozen[1]]
+
+
+class LayoutCache:
+    """
+    In-memory LRU of frozen layouts, shared by the whole process.
+
+    Keys are plain tuples of the layout method, the generator's layout
+    signature and the method arguments.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the frozen layout for ``key``, or None"""
+        with self._lock:
+            frozen = self._layouts.get(key)
+            if frozen is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._layouts.move_to_end(key)
+            return frozen
+
+    def put(self, key, frozen):
+        with self._lock:
+            self._layouts[key] = frozen
+            self._layouts.move_to_end(key)
+            while len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._layouts), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def clear(self):
+        with self._lock:
+            self._layouts.clear()
+            self.hits = self.misses = 0
+
+
+# Shared by every CVGenerator in the process
+layout_cache = LayoutCache()
+
+
+def memoize_layout(method):
+    """
+    Cache what a CVGenerator layout method returns, per argument values.
+
+    The generator's ``LAYOUT_SIGNATURE`` (language, fonts, sizes, page
+    geometry) is part of the key, so only arguments that vary between
+    entries need to be passed explicitly. Arguments must be hashable.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, self.LAYOUT_SIGNATURE, args, tuple(sorted(kwargs.items())))
+        frozen = layout_cache.get(key)
+        if frozen is None:
+            frozen = freeze(method(self, *args, **kwargs))
+            layout_cache.put(key, frozen)
+        return thaw(frozen)
+
+    return wrapper
@@ -0,0 +1,191 @@
+"""
+Vectorized line breaking.
+
+A text is measured in one pass: its codepoints are looked up in the glyph
+advance table of the font and turned into a cumulative sum, so the width of
+any substring is the difference of two prefix values. Break points are then
+found with searchsorted, one call per output line instead of one
+measurement per word or character.
+"""
+import threading
+
+import numpy as np
+
+from .text_metrics import TABLE_SIZE, text_measurer
+
+
+class LineBreaker:
+    """
+    Greedy line breaking on top of the advance tables of a TextMeasurer.
+
+    Lines are substrings of the text with whitespace runs collapsed to single
+    spaces, exactly as ' '.join(text.split()) would give.
+    """
+
+    def __init__(self, measurer=text_measurer):
+        self.measurer = measurer
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _table(self, font_name):
+        table = self._tables.get(font_name)
+        if table is None:
+            table = np.array(self.measurer.metrics(font_name).advances, dtype=np.float64)
+            with self._lock:
+                table = self._tables.setdefault(font_name, table)
+        return table
+
+    def prefix_widths(self, text, font_name):
+        """
+        Cumulative advance widths of ``text`` at font size 1.
+
+        Returns:
+            numpy.ndarray: ``len(text) + 1`` values; text[a:b] is prefix[b] - prefix[a] wide
+        """
+        codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        table = self._table(font_name)
+
+        wide = codepoints >= TABLE_SIZE
+        if wide.any():
+            advance = self.measurer.metrics(font_name).advance
+            widths = np.empty(len(codepoints), dtype=np.float64)
+            widths[~wide] = table[codepoints[~wide]]
+            widths[wide] = [advance(cp) for cp in codepoints[wide].tolist()]
+        else:
+            widths = table[codepoints]
+
+        prefix = np.zeros(len(codepoints) + 1, dtype=np.float64)
+        widths.cumsum(out=prefix[1:])
+        return prefix
+
+    @staticmethod
+    def _words(text):
+        """Collapse whitespace and return the line, its word start and end offsets"""
+        words = text.split()
+        lengths = np.fromiter(map(len, words), dtype=np.intp, count=len(words))
+        ends = (lengths + 1).cumsum() - 1
+        return ' '.join(words), (ends - lengths).tolist(), ends
+
+    @staticmethod
+    def _split_chars(prefix, start, end, limit):
+        """
+        Split text[start:end] character by character into lines no wider than ``limit``.
+
+        A character wider than ``limit`` still gets a line of its own (preceded
+        by an empty line when it is the first one).
+
+        Returns:
+            tuple: The (start, end) offsets of the full lines, and the start of
+            the remainder, which is left open for what follows
+        """
+        pieces = []
+        first = True
+        while True:
+            stop = int(prefix.searchsorted(prefix[start] + limit, side='right')) - 1
+            if stop >= end:
+                return pieces, start
+            if stop <= start:
+                if first:
+                    pieces.append((start, start))
+                stop = start + 1
+                if stop >= end:
+                    return pieces, start
+            pieces.append((start, stop))
+            start = stop
+            first = False
+
+    def wrap_words(self, text, font_name, font_size, max_width):
+        """
+        Wrap text at word boundaries; a word wider than a line is left whole.
+
+        Returns:
+            list: The lines of text
+        """
+        line, starts, ends = self._words(text)
+        if not starts:
+            return []
+
+        prefix = self.prefix_widths(line, font_name)
+        end_widths = prefix[ends]
+        ends = ends.tolist()
+        limit = max_width / font_size
+
+        lines = []
+        i, count = 0, len(starts)
+        while i < count:
+            j = int(end_widths.searchsorted(prefix[starts[i]] + limit, side='right'))
+            j = max(j, i + 1)
+            lines.append(line[starts[i]:ends[j - 1]])
+            i = j
+        return lines
+
+    def _break_part(self, part, font_name, limit):
+        """Lines of a text broken character by character (used for email addresses)"""
+        prefix = self.prefix_widths(part, font_name)
+        pieces, rest = self._split_chars(prefix, 0, len(part), limit)
+        return [part[a:b] for a, b in pieces] + [part[rest:]]
+
+    def break_lines(self, text, font_name, font_size, max_width):
+        """
+        Break text into lines no wider than ``max_width``.
+
+        Text that fits is returned as is. Email addresses are split before the
+        '@', then by character; other text is wrapped at spaces, and words wider
+        than a line are split by character, their last piece continuing with the
+        next words.
+
+        Returns:
+            list: The lines of text
+        """
+        if self.measurer.text_width(text, font_name, font_size) <= max_width:
+            return [text]
+
+        limit = max_width / font_size
+
+        if '@' in text:
+            parts = text.split('@')
+            lines = []
+            for part in (parts[0], '@' + parts[1]):
+                if not part:
+                    continue
+                if self.measurer.text_width(part, font_name, font_size) <= max_width:
+                    lines.append(part)
+                else:
+                    lines.extend(self._break_part(part, font_name, limit))
+            return lines
+
+        line, starts, ends = self._words(text)
+        prefix = self.prefix_widths(line, font_name)
+        end_widths = prefix[ends]
+        ends = ends.tolist()
+
+        lines = []
+        current = None  # Start offset of the line being filled
+        i, count = 0, len(starts)
+        while i < count:
+            if current is None:
+                if prefix[ends[i]] - prefix[starts[i]] <= limit:
+                    current = starts[i]
+                else:
+                    pieces, current = self._split_chars(prefix, starts[i], ends[i], limit)
+                    lines.extend(line[a:b] for a, b in pieces)
+                i += 1
+                continue
+
+            # Every following word that still fits joins the current line
+            i = max(i, int(end_widths.searchsorted(prefix[current] + limit, side='right')))
+            if i < count:
+                lines.append(line[current:ends[i - 1]])
+                current = None
+
+        if current is not None:
+            lines.append(line[current:ends[count - 1]])
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+# Shared by every CVGenerator in the process
+line_breaker = LineBreaker()
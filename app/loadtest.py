@@ -0,0 +1,349 @@
+"""
+Load testing of the CV flow.
+
+Virtual users walk through create -> edit -> render -> preview -> pay ->
+download, either in process with the Flask test client or against a running
+server. Each flow starts from a fresh session, with its own copy of one of
+the benchmark fixtures, so the free-usage limits and the render cache behave
+as they would for distinct visitors. Wave and Gemini are replaced by local
+stubs when running in process.
+"""
+import json
+import os
+import re
+import resource
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+import requests
+from flask import Flask, jsonify, request, url_for
+from werkzeug.serving import make_server
+
+from .benchmarks import benchmark_cases, write_benchmark_photo
+
+# Steps of a flow, in order
+STEPS = ('create', 'edit', 'summary', 'render', 'thumbnail', 'payment', 'download')
+
+# Steps calling Wave or Gemini: only stubbed when running in process
+EXTERNAL_STEPS = ('summary', 'payment')
+
+_CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+class StepFailed(Exception):
+    """A response that does not move the flow forward"""
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class LoadStats:
+    """Latencies and errors per route, shared by every virtual user"""
+
+    def __init__(self):
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self._latencies[route].append(seconds * 1000)
+            if not ok:
+                self._errors[route] += 1
+
+    def routes(self):
+        """
+        Returns:
+            dict: Route -> count, errors, p50/p95/p99/max latency in milliseconds
+        """
+        with self._lock:
+            latencies = {route: sorted(values) for route, values in self._latencies.items()}
+            errors = dict(self._errors)
+
+        return {route: {
+            'count': len(values),
+            'errors': errors.get(route, 0),
+            'p50_ms': round(percentile(values, 0.50), 2),
+            'p95_ms': round(percentile(values, 0.95), 2),
+            'p99_ms': round(percentile(values, 0.99), 2),
+            'max_ms': round(values[-1], 2),
+        } for route, values in latencies.items()}
+
+
+class AppClient:
+    """Talks to the app in process through the Flask test client"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, form=None, json=None, files=None):
+        data = dict(form or {})
+        for name, (filename, content) in (files or {}).items():
+            data[name] = (BytesIO(content), filename)
+        response = self._client.open(path, method=method, data=data or None, json=json)
+        return response.status_code, response.headers, response.get_data()
+
+
+class HttpClient:
+    """Talks to a running server; secure session cookies need an https URL"""
+
+    def __init__(self, base_url, timeout=60):
+        self._base_url = base_url.rstrip('/')
+        self._session = requests.Session()
+        self._timeout = timeout
+
+    def request(self, method, path, form=None, json=None, files=None):
+        url = path if path.startswith('http') else self._base_url + path
+        response = self._session.request(method, url, data=form, json=json, files=files,
+                                         allow_redirects=False, timeout=self._timeout)
+        return response.status_code, response.headers, response.content
+
+
+class VirtualUser:
+    """
+    One visitor going through the CV flow with a fresh session.
+
+    Args:
+        client: AppClient or HttpClient, owned by this user
+        stats (LoadStats): Where every request is recorded
+        case (BenchmarkCase): The CV this visitor fills in
+        photo (bytes): JPEG uploaded when the case has a photo
+        steps (iterable): Steps of STEPS to go through
+        poll_interval (float): Seconds between two render job status requests
+    """
+
+    def __init__(self, client, stats, case, photo=None, steps=STEPS, poll_interval=0.05):
+        self.client = client
+        self.stats = stats
+        self.case = case
+        self.photo = photo
+        self.steps = steps
+        self.poll_interval = poll_interval
+
+    def call(self, route, method, path, expected=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            status, headers, body = self.client.request(method, path, **kwargs)
+        except Exception as e:
+            self.stats.record(route, time.perf_counter() - start, False)
+            raise StepFailed(f"{route}: {type(e).__name__}: {e}")
+
+        ok = status in expected
+        self.stats.record(route, time.perf_counter() - start, ok)
+        if not ok:
+            raise StepFailed(f"{route}: unexpected status {status}")
+        return status, headers, body
+
+    def run(self):
+        """Go through the steps, stopping at the first failure; returns True if all of them succeeded"""
+        try:
+            for step in STEPS:
+                if step in self.steps:
+                    getattr(self, f"step_{step}")()
+        except StepFailed:
+            return False
+        return True
+
+    def step_create(self):
+        _, _, body = self.call('GET /create-cv', 'GET', '/create-cv')
+        token = _CSRF_TOKEN.search(body.decode('utf-8', 'replace'))
+        info = self.case.cv_data['personal_info']
+
+        form = {key: info[key] for key in ('first_name', 'last_name', 'email', 'phone', 'address', 'city',
+                                           'professional_summary')}
+        form['csrf_token'] = token.group(1) if token else ''
+        files = {'photo': ('photo.jpg', self.photo)} if self.case.photo and self.photo else None
+
+        _, headers, _ = self.call('POST /create-cv', 'POST', '/create-cv', expected=(302,), form=form, files=files)
+        if not headers.get('Location', '').endswith('/preview-cv'):
+            raise StepFailed('POST /create-cv: form rejected')
+        self.call('GET /preview-cv', 'GET', '/preview-cv')
+
+    def step_edit(self):
+        self.call('POST /save-cv-edits', 'POST', '/save-cv-edits', json=self.case.cv_data)
+
+    def step_summary(self):
+        info = self.case.cv_data['personal_info']
+        self.call('POST /generate-professional-summary', 'POST', '/generate-professional-summary',
+                  json={'first_name': info['first_name'], 'last_name': info['last_name'],
+                        'guidance': 'Huit ans en développement logiciel', 'ui_lang': self.case.language})
+
+    def step_render(self):
+        start = time.perf_counter()
+        status, headers, body = self.call('POST /process-pdf', 'POST', '/process-pdf', expected=(202, 302))
+
+        if status == 202:
+            job = json.loads(body)
+            while job['status'] not in ('done', 'failed'):
+                time.sleep(self.poll_interval)
+                _, _, body = self.call('GET /render-jobs/<id>', 'GET', job['status_url'])
+                job = json.loads(body)
+            if job['status'] == 'failed':
+                self.stats.record('render (end to end)', time.perf_counter() - start, False)
+                raise StepFailed(f"render failed: {job.get('error')}")
+            self.call('GET /render-jobs/<id>/finish', 'GET', job['redirect'], expected=(302,))
+
+        self.stats.record('render (end to end)', time.perf_counter() - start, True)
+
+    def step_thumbnail(self):
+        self.call('GET /preview-pdf-thumbnail', 'GET', '/preview-pdf-thumbnail')
+
+    def step_payment(self):
+        self.call('GET /payment-page', 'GET', '/payment-page')
+        _, _, body = self.call('POST /initiate-payment', 'POST', '/initiate-payment')
+        payment_url = json.loads(body)['payment_url']
+        payment_id = payment_url.rstrip('/').rsplit('/', 1)[-1]
+        _, headers, _ = self.call('GET /payment-callback', 'GET',
+                                  f"/payment-callback?id={payment_id}&status=successful", expected=(302,))
+        if not headers.get('Location', '').endswith('/preview-pdf'):
+            raise StepFailed('GET /payment-callback: payment not verified')
+
+    def step_download(self):
+        _, headers, body = self.call('GET /download-pdf', 'GET', '/download-pdf')
+        if not body.startswith(b'%PDF'):
+            raise StepFailed('GET /download-pdf: not a PDF')
+
+
+def wave_stub_app(latency=0.0):
+    """A Flask app answering the two Wave checkout calls made by the payment routes"""
+    stub = Flask('wave_stub')
+
+    @stub.route('/checkout/sessions', methods=['POST'])
+    def create_session():
+        time.sleep(latency)
+        session_id = f"cos-{os.urandom(6).hex()}"
+        return jsonify({'id': session_id, 'payment_url': url_for('checkout', session_id=session_id, _external=True),
+                        'amount': (request.json or {}).get('amount')})
+
+    @stub.route('/checkout/sessions/<session_id>')
+    def checkout(session_id):
+        time.sleep(latency)
+        return jsonify({'id': session_id, 'status': 'successful'})
+
+    return stub
+
+
+class StubGenerativeModel:
+    """Stands in for google.generativeai.GenerativeModel, streaming a canned answer"""
+    latency = 0.0
+    chunks = ("Ingénieure logicielle ", "avec huit ans d'expérience ", "dans les paiements mobiles.")
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        time.sleep(self.latency)
+        if stream:
+            return [self.Chunk(text) for text in self.chunks]
+        return self.Chunk(''.join(self.chunks))
+
+
+@contextmanager
+def local_stubs(app, wave_latency=0.0, gemini_latency=0.0):
+    """Serve Wave from a local thread and replace the Gemini model for the duration of the block"""
+    from . import routes
+
+    server = make_server('127.0.0.1', 0, wave_stub_app(wave_latency), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    wave_url, model = app.config['WAVE_API_URL'], routes.generative_model
+    app.config['WAVE_API_URL'] = f"http://127.0.0.1:{server.server_port}"
+    StubGenerativeModel.latency = gemini_latency
+    routes.generative_model = StubGenerativeModel
+    try:
+        yield
+    finally:
+        app.config['WAVE_API_URL'], routes.generative_model = wave_url, model
+        server.shutdown()
+        thread.join()
+
+
+def _unique_case(case, flow):
+    """Copy of a fixture with a distinct name, so that each flow misses the render cache"""
+    cv_data = dict(case.cv_data, personal_info=dict(case.cv_data['personal_info']))
+    cv_data['personal_info']['last_name'] = f"{cv_data['personal_info']['last_name']} {flow}"
+    return case._replace(cv_data=cv_data)
+
+
+def peak_rss_mib(server_pid=None):
+    """Peak resident memory of a server process, or of this process and its children"""
+    if server_pid:
+        with open(f"/proc/{server_pid}/status") as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+        return None
+
+    # ru_maxrss is in KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round((own + children) / 1024, 1)
+
+
+def run_load_test(app=None, base_url=None, users=4, flows=5, steps=STEPS, case_names=None, workdir=None,
+                  server_pid=None, poll_interval=0.05):
+    """
+    Drive ``users`` concurrent virtual users, each going through ``flows`` flows.
+
+    Args:
+        app (Flask): App tested in process; ignored when ``base_url`` is given
+        base_url (str): URL of a running server
+        users (int): Concurrent virtual users
+        flows (int): Flows per virtual user, each with a fresh session
+        steps (iterable): Steps of STEPS to go through
+        case_names (iterable, optional): Benchmark fixtures used, in turn (default: all)
+        workdir (str): Folder for the synthetic upload photo
+        server_pid (int, optional): Process whose peak RSS is reported, for a running server
+        poll_interval (float): Seconds between two render job status requests
+
+    Returns:
+        dict: Per-route latencies, throughput, error rate and peak RSS
+    """
+    cases = [case for case in benchmark_cases() if not case_names or case.name in case_names]
+    photo = None
+    if workdir:
+        with open(write_benchmark_photo(os.path.join(workdir, 'loadtest_photo.jpg')), 'rb') as f:
+            photo = f.read()
+
+    stats = LoadStats()
+    outcomes = []
+
+    def user(index):
+        for flow in range(flows):
+            number = index * flows + flow
+            client = HttpClient(base_url) if base_url else AppClient(app)
+            case = _unique_case(cases[number % len(cases)], number)
+            outcomes.append(VirtualUser(client, stats, case, photo, steps, poll_interval).run())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - start
+
+    routes = stats.routes()
+    requests_made = sum(r['count'] for name, r in routes.items() if name.split(' ', 1)[0] in ('GET', 'POST'))
+    errors = sum(r['errors'] for name, r in routes.items() if name.split(' ', 1)[0] in ('GET', 'POST'))
+    return {
+        'users': users,
+        'flows': len(outcomes),
+        'failed_flows': outcomes.count(False),
+        'wall_seconds': round(elapsed, 3),
+        'flows_per_second': round(len(outcomes) / elapsed, 2) if elapsed else 0.0,
+        'requests_per_second': round(requests_made / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(errors / requests_made, 4) if requests_made else 0.0,
+        'peak_rss_mib': peak_rss_mib(server_pid if base_url else None),
+        'routes': routes,
+    }
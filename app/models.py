@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+from app import db
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class User(db.Model):
+    """Anonymous owner of drafts, identified by the random token of its draft cookie"""
+    __tablename__ = 'users'
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=_now)
+
+    drafts = db.relationship('Draft', back_populates='user', cascade='all, delete-orphan')
+
+
+class Draft(db.Model):
+    """A CV being edited; its content is in one DraftSection row per cv_data section"""
+    __tablename__ = 'drafts'
+    __table_args__ = (db.Index('ix_drafts_user_updated', 'user_id', 'updated_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    language = db.Column(db.String(8))
+    template = db.Column(db.String(32))
+    created_at = db.Column(db.DateTime, nullable=False, default=_now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=_now)
+
+    user = db.relationship('User', back_populates='drafts')
+    sections = db.relationship('DraftSection', back_populates='draft', cascade='all, delete-orphan')
+
+
+class DraftSection(db.Model):
+    """One section of a draft (personal_info, experience, ...) as JSON, read and written on its own"""
+    __tablename__ = 'draft_sections'
+    __table_args__ = (db.UniqueConstraint('draft_id', 'name', name='uq_draft_sections_draft_name'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    draft_id = db.Column(db.Integer, db.ForeignKey('drafts.id', ondelete='CASCADE'), nullable=False)
+    name = db.Column(db.String(32), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=_now)
+
+    draft = db.relationship('Draft', back_populates='sections')
+
+
+class RenderJobState(db.Model):
+    """Status of a render job, written by the worker running it and read by the others"""
+    __tablename__ = 'render_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), nullable=False)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    created_at = db.Column(db.Float, nullable=False, index=True)  # time.time(), as RenderJob
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
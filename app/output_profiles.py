@@ -0,0 +1,98 @@
+"""
+PDF output profiles: how a laid out CV is written to bytes.
+
+Without options, fitz writes every embedded font whole (the Turkish fonts
+add more than 800 KB) and leaves streams uncompressed.
+A profile decides whether fonts are subset to the glyphs actually used,
+which streams are deflated, how unused and duplicate objects are
+collected and whether the file is linearized.
+"""
+from collections import namedtuple
+
+from flask import current_app
+
+_OutputProfile = namedtuple('_OutputProfile', ('name', 'subset_fonts', 'garbage', 'deflate', 'clean',
+                                               'object_streams', 'linear'))
+
+
+class OutputProfile(_OutputProfile):
+    """
+    Save options of a generated PDF.
+
+    Attributes:
+        name (str): Profile name, as chosen with PDF_OUTPUT_PROFILE
+        subset_fonts (bool): Keep only the glyphs the CV uses in embedded fonts
+        garbage (int): fitz garbage collection level (0-4)
+        deflate (bool): Compress content, font and image streams
+        clean (bool): Rewrite content streams (sanitized and compacted)
+        object_streams (bool): Pack objects into object streams (PDF 1.5)
+        linear (bool): Linearize, so viewers can show the first page while downloading
+    """
+    __slots__ = ()
+
+    def save_options(self):
+        """Keyword arguments of fitz Document.save() and Document.tobytes()"""
+        return {
+            'garbage': self.garbage,
+            'deflate': self.deflate,
+            'deflate_fonts': self.deflate,
+            'deflate_images': self.deflate,
+            'clean': self.clean,
+            'use_objstms': int(self.object_streams),
+            'linear': self.linear,
+        }
+
+    def prepare(self, doc):
+        """Apply the changes to the document that happen before it is written"""
+        if self.subset_fonts:
+            doc.subset_fonts()
+
+    def to_bytes(self, doc):
+        """
+        Write an open fitz document with this profile.
+
+        Args:
+            doc (fitz.Document): The document; its fonts are subset in place
+
+        Returns:
+            bytes: The PDF
+        """
+        self.prepare(doc)
+        return doc.tobytes(**self.save_options())
+
+
+OUTPUT_PROFILES = {
+    # Smallest file, for downloads over mobile data
+    'web': OutputProfile('web', subset_fonts=True, garbage=3, deflate=True, clean=False,
+                         object_streams=True, linear=False),
+    # Classic PDF 1.4 structure (no object streams), which older print workflows expect
+    'print': OutputProfile('print', subset_fonts=True, garbage=3, deflate=True, clean=False,
+                           object_streams=False, linear=False),
+    # Complete fonts, so the file can still be edited later; duplicate objects merged
+    'archive': OutputProfile('archive', subset_fonts=False, garbage=4, deflate=True, clean=True,
+                             object_streams=False, linear=False),
+}
+
+DEFAULT_OUTPUT_PROFILE = 'web'
+
+
+def get_output_profile(name=None):
+    """
+    Return the output profile called ``name``, or the configured one.
+
+    PDF_OUTPUT_PROFILE picks the default profile and PDF_LINEARIZE turns on
+    linearization for every profile.
+
+    Raises:
+        ValueError: If there is no profile of that name
+    """
+    config = current_app.config
+    name = name or config.get('PDF_OUTPUT_PROFILE', DEFAULT_OUTPUT_PROFILE)
+
+    profile = OUTPUT_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown PDF output profile '{name}'; choose from {', '.join(OUTPUT_PROFILES)}")
+
+    if config.get('PDF_LINEARIZE'):
+        profile = profile._replace(linear=True)
+    return profile
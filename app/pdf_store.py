@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class GeneratedCVStore:
+    """
+    In-process store for generated CV PDFs, keyed by filename.
+
+    Used instead of the upload folder when PERSIST_GENERATED_CV is off. The
+    least recently used PDFs are dropped once ``max_entries`` is reached.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._pdfs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, filename, data):
+        with self._lock:
+            self._pdfs[filename] = data
+            self._pdfs.move_to_end(filename)
+            while len(self._pdfs) > self.max_entries:
+                self._pdfs.popitem(last=False)
+
+    def get(self, filename):
+        with self._lock:
+            data = self._pdfs.get(filename)
+            if data is not None:
+                self._pdfs.move_to_end(filename)
+            return data
+
+    def discard(self, filename):
+        with self._lock:
+            self._pdfs.pop(filename, None)
+
+    def __contains__(self, filename):
+        with self._lock:
+            return filename in self._pdfs
+
+    def __len__(self):
+        return len(self._pdfs)
+
+
+def get_cv_store():
+    """Return the generated CV store of the current app"""
+    return current_app.extensions['generated_cvs']
+
+
+def save_generated_cv(filename, pdf):
+    """Keep a generated CV on disk in UPLOAD_FOLDER, or in memory when PERSIST_GENERATED_CV is off"""
+    if current_app.config.get('PERSIST_GENERATED_CV', True):
+        with open(os.path.join(current_app.config['UPLOAD_FOLDER'], filename), 'wb') as f:
+            f.write(pdf)
+    else:
+        get_cv_store().put(filename, pdf)
+
+
+def delete_generated_cv(filename):
+    """Remove a generated CV from wherever save_generated_cv() put it"""
+    get_cv_store().discard(filename)
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    if os.path.exists(path):
+        os.remove(path)
+        current_app.logger.info(f'Deleted old CV file: {filename}')
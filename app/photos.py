@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Profile photos are drawn at 80% of the CV sidebar width (A4 width * 0.3)
+PHOTO_MAX_SIZE = int(595 * 0.3 * 0.8)
+
+# Sub-folder of UPLOAD_FOLDER holding normalized, content-addressed photos
+PHOTO_FOLDER = 'photos'
+
+
+class Photo:
+    """A normalized profile photo: PNG bytes and their pixel size"""
+    __slots__ = ('data', 'width', 'height')
+
+    def __init__(self, data, width, height):
+        self.data = data
+        self.width = width
+        self.height = height
+
+
+def normalize_photo(stream, max_size=PHOTO_MAX_SIZE):
+    """
+    Normalize an uploaded photo for the CV sidebar.
+
+    Applies the EXIF orientation, converts to RGBA and downscales the image
+    so that it fits in a ``max_size`` square, keeping the aspect ratio.
+
+    Args:
+        stream: Path or binary file-like object of the original image
+        max_size (int): Largest allowed width/height in pixels
+
+    Returns:
+        Photo: The normalized image encoded as PNG
+    """
+    img = Image.open(stream)
+    img = ImageOps.exif_transpose(img).convert("RGBA")
+
+    if img.width > max_size or img.height > max_size:
+        img.thumbnail((max_size, max_size), Image.LANCZOS)  # High-quality resize
+
+    output = BytesIO()
+    img.save(output, format='PNG', optimize=True)
+    return Photo(output.getvalue(), img.width, img.height)
+
+
+def save_photo(stream, upload_folder):
+    """
+    Normalize an uploaded photo and store it under a name derived from its content.
+
+    Identical photos share one file and different users never overwrite
+    each other's photo.
+
+    Returns:
+        str: Path of the stored photo
+    """
+    photo = normalize_photo(stream)
+    digest = hashlib.sha256(photo.data).hexdigest()
+
+    folder = os.path.join(upload_folder, PHOTO_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{digest}.png")
+
+    if not os.path.exists(path):
+        # Write to a temporary file first so readers never see a partial photo
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(photo.data)
+        os.replace(tmp_path, path)
+
+    photo_cache.add(path, photo)
+    return path
+
+
+class PhotoCache:
+    """
+    In-memory LRU of normalized photos, keyed by path.
+
+    Content-addressed photos never change, so they are read from disk once.
+    Other paths (photos uploaded before normalization existed) are keyed by
+    path, size and modification time, and normalized when first loaded.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._photos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, path):
+        if os.path.dirname(path).endswith(PHOTO_FOLDER):
+            return path
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def add(self, path, photo):
+        with self._lock:
+            self._photos[self._key(path)] = photo
+            self._trim()
+
+    def load(self, path, max_size=PHOTO_MAX_SIZE):
+        """Return the normalized Photo stored at ``path``"""
+        key = self._key(path)
+        with self._lock:
+            photo = self._photos.get(key)
+            if photo is not None:
+                self._photos.move_to_end(key)
+                return photo
+
+        if key == path:
+            # Already normalized at upload: only the image header needs parsing
+            with open(path, 'rb') as f:
+                data = f.read()
+            width, height = Image.open(BytesIO(data)).size
+            photo = Photo(data, width, height)
+        else:
+            photo = normalize_photo(path, max_size)
+
+        with self._lock:
+            self._photos[key] = photo
+            self._trim()
+        return photo
+
+    def _trim(self):
+        while len(self._photos) > self.max_entries:
+            self._photos.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._photos.clear()
+
+
+# Shared by every CVGenerator in the process
+photo_cache = PhotoCache()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+# Bump whenever the drawing code changes what a given cv_data renders to,
+# so artifacts cached by an older version are never served.
+RENDER_VERSION = '6'
+
+
+def render_cache_key(cv_data, language, template=None, photo_path=None):
+    """
+    Build a stable content hash for a render.
+
+    Args:
+        cv_data (dict): The CV data as stored in the session
+        language (str): Language code of the CV
+        template (str, optional): Selected template id
+        photo_path (str, optional): Path of the profile photo; its content is hashed
+
+    Returns:
+        str: Hex digest identifying the render
+    """
+    digest = hashlib.sha256()
+    digest.update(RENDER_VERSION.encode())
+    digest.update(b'\0')
+    digest.update(json.dumps(cv_data, sort_keys=True, ensure_ascii=False,
+                             separators=(',', ':'), default=str).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(f"{language}\0{template or ''}\0".encode('utf-8'))
+
+    if photo_path and os.path.exists(photo_path):
+        with open(photo_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class RenderArtifact:
+    """A cached render: the PDF bytes plus anything derived from them"""
+    __slots__ = ('key', 'pdf', 'derived')
+
+    def __init__(self, key, pdf):
+        self.key = key
+        self.pdf = pdf
+        self.derived = {}
+
+    @property
+    def size(self):
+        return len(self.pdf) + sum(len(data) for data in self.derived.values())
+
+
+class RenderCache:
+    """
+    Size-bounded LRU cache of rendered CVs, keyed by render_cache_key().
+
+    Entries are evicted least recently used first once either the total
+    number of bytes or the number of entries goes over its limit.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=512):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._artifacts = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached RenderArtifact for ``key``, or None"""
+        with self._lock:
+            artifact = self._artifacts.get(key)
+            if artifact is None:
+                self.misses += 1
+                return None
+            self._artifacts.move_to_end(key)
+            self.hits += 1
+            return artifact
+
+    def put(self, key, pdf):
+        """Cache the PDF bytes rendered for ``key`` and return the new artifact"""
+        artifact = RenderArtifact(key, pdf)
+        with self._lock:
+            old = self._artifacts.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            self._artifacts[key] = artifact
+            self.total_bytes += artifact.size
+            self._evict()
+        return artifact
+
+    def derive(self, key, name, build):
+        """
+        Return data derived from the PDF cached for ``key``, building it once.
+
+        Derived data (e.g. thumbnails) is kept on the artifact: it counts
+        towards the cache size and is evicted or invalidated with it.
+
+        Args:
+            key (str): Render cache key
+            name: Identifies the derived data, e.g. ('thumbnail', 72, 'png')
+            build (callable): Called with the PDF bytes on the first request
+
+        Returns:
+            bytes: The derived data, or None if nothing is cached for ``key``
+        """
+        with self._lock:
+            artifact = self._artifacts.get(key)
+        if artifact is None:
+            return None
+
+        data = artifact.derived.get(name)
+        if data is None:
+            data = build(artifact.pdf)
+            with self._lock:
+                # Only account for it if the artifact was not evicted meanwhile
+                if self._artifacts.get(key) is artifact and name not in artifact.derived:
+                    artifact.derived[name] = data
+                    self.total_bytes += len(data)
+                    self._evict()
+        return data
+
+    def invalidate(self, key):
+        with self._lock:
+            artifact = self._artifacts.pop(key, None)
+            if artifact is not None:
+                self.total_bytes -= artifact.size
+
+    def clear(self):
+        with self._lock:
+            self._artifacts.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._artifacts),
+                'bytes': self.total_bytes,
+            }
+
+    def _evict(self):
+        # Never evict the entry that was just added, even if it alone is too big
+        while len(self._artifacts) > 1 and (self.total_bytes > self.max_bytes
+                                            or len(self._artifacts) > self.max_entries):
+            _, artifact = self._artifacts.popitem(last=False)
+            self.total_bytes -= artifact.size
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._artifacts)
+
+
+def get_render_cache():
+    """Return the render cache of the current app"""
+    return current_app.extensions['render_cache']
@@ -3,25 +3,51 @@ import traceback
 import uuid
 from functools import wraps
 from io import BytesIO
-from pdf2image import convert_from_path
-import requests
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
 from flask import (Blueprint, render_template, request, redirect, url_for,
-                   flash, session, send_file, make_response, jsonify, Response, g, current_app)
+                   flash, session, send_file, make_response, jsonify, Response, g, current_app,
+                   stream_with_context)
 import json
 
-from .cv_generator import generate_cv_from_form_data
+from .drafts import autosave_cv_data, restore_cv_data
+from .jobs import JobQueueFull, get_job_queue
+from .layout_cache import layout_cache
+from .pdf_store import get_cv_store, save_generated_cv, delete_generated_cv
+from .render_cache import get_render_cache, render_cache_key
+from .tracing import get_render_tracer
+from .warmup import get_render_warmup
 from .forms import CVForm, EducationForm, ExperienceForm, SkillForm, LanguageForm, CertificationForm, HobbyForm, \
     ReferenceForm, SoftwareEntryForm
-from werkzeug.utils import secure_filename
 from datetime import datetime
 from flask_babel import gettext as _, get_locale
 import os
+import threading
 
 main = Blueprint('main', __name__)
 
-genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
+# google.generativeai takes longer to import than the rest of the app; it is
+# imported and configured by the first request that asks for a model
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def generative_model(model_name):
+    """
+    Get a Gemini model, importing and configuring google.generativeai on first use.
+
+    Args:
+        model_name (str): e.g. 'gemini-2.0-flash'
+
+    Returns:
+        google.generativeai.GenerativeModel
+    """
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
+                _genai = genai
+    return _genai.GenerativeModel(model_name)
 
 datepicker_translations = {
     'fr': {
@@ -108,86 +134,103 @@ def toggle_test_mode():
     return redirect(url_for('main.create_cv'))
 
 
-@main.route('/preview-pdf-thumbnail')
-def preview_pdf_thumbnail():
-    pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], session.get('generated_cv'))
+def load_generated_cv():
+    """
+    Get the CV generated for the current session.
 
-    if not os.path.exists(pdf_path):
-        return "PDF file not found", 404
+    Returns:
+        bytes, str or None: The PDF bytes when it is kept in memory, its path when
+        it was saved to the upload folder, or None if it no longer exists
+    """
+    filename = session.get('generated_cv')
+    if not filename:
+        return None
+
+    data = get_cv_store().get(filename)
+    if data is not None:
+        return data
 
-    # Generate an image filename based on the session
-    image_filename = f"{session.get('generated_cv').split('.')[0]}_preview.png"
-    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image_filename)
+    cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    return cv_path if os.path.exists(cv_path) else None
 
-    # Convert only the first page of the PDF to an image (if it doesn’t already exist)
-    if not os.path.exists(image_path):
-        images = convert_from_path(pdf_path, first_page=1, last_page=1)
-        images[0].save(image_path, 'PNG')
 
-    return send_file(image_path, mimetype='image/png')
+def send_generated_cv(cv, as_attachment=False):
+    """Stream a CV returned by load_generated_cv() to the client"""
+    if isinstance(cv, bytes):
+        return send_file(BytesIO(cv), mimetype='application/pdf', as_attachment=as_attachment,
+                         download_name=session['generated_cv'])
 
+    if as_attachment:
+        return send_file(cv, as_attachment=True, download_name=session['generated_cv'])
+    return send_file(cv, as_attachment=False)
 
-def add_preview_watermark(input_path, output_path):
+
+def derive_generated_cv(name, build):
     """
-    Add a watermark to the PDF preview.
-    This function requires PyPDF2 and reportlab packages.
+    Build data from the session's generated CV, cached with its render cache entry.
+
+    Args:
+        name: Identifies the derived data, e.g. ('thumbnail', 72, 'png')
+        build (callable): Called with the PDF bytes when nothing is cached yet
 
-    pip install PyPDF2 reportlab
+    Returns:
+        bytes or None: The derived data, or None if the CV no longer exists
     """
-    try:
-        from PyPDF2 import PdfReader, PdfWriter
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        import io
-
-        # Create watermark
-        watermark_stream = io.BytesIO()
-        c = canvas.Canvas(watermark_stream, pagesize=letter)
-
-        # Draw diagonal watermark text
-        c.saveState()
-        c.translate(100, 400)  # Reduced x translation to move left
-        c.rotate(45)
-        c.setFont("Helvetica", 60)
-        c.setFillColorRGB(0, 0, 1, alpha=0.3)
-        c.drawString(0, 0, _("APERÇU SEULEMENT"))
-        c.drawString(0, -100, _("PAIEMENT REQUIS"))
-        c.restoreState()
-
-        # Finalize the watermark
-        c.save()
-        watermark_stream.seek(0)
-
-        # Create watermark PDF
-        from PyPDF2 import PdfReader as Reader  # Renamed to avoid conflict
-        watermark_pdf = Reader(watermark_stream)
-        watermark_page = watermark_pdf.pages[0]
-
-        # Apply watermark to each page
-        pdf_reader = PdfReader(input_path)
-        pdf_writer = PdfWriter()
-
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            page.merge_page(watermark_page)
-            pdf_writer.add_page(page)
-
-        # Save the watermarked PDF
-        with open(output_path, 'wb') as out_file:
-            pdf_writer.write(out_file)
-
-        return True
-    except ImportError:
-        # If PyPDF2 or reportlab is not installed, just copy the file
-        import shutil
-        shutil.copy(input_path, output_path)
-        current_app.logger.warning("PyPDF2 or reportlab not installed. Watermark not applied.")
-        return False
-    except Exception as e:
-        current_app.logger.error(f"Error applying watermark: {str(e)}")
-        import shutil
-        shutil.copy(input_path, output_path)
-        return False
+    cache = get_render_cache()
+    key = session.get('generated_cv_key')
+    data = cache.derive(key, name, build) if key else None
+    if data is not None:
+        return data
+
+    cv = load_generated_cv()
+    if cv is None:
+        return None
+
+    if not isinstance(cv, bytes):
+        with open(cv, 'rb') as f:
+            cv = f.read()
+
+    if key:
+        # The render was evicted from the cache: the generated CV is that render
+        cache.put(key, cv)
+        return cache.derive(key, name, build)
+    return build(cv)
+
+
+def preview_language():
+    """Language of the preview watermark, or None when previews are shown without one"""
+    # Paid CVs, and testers, see the original
+    if session.get('payment_verified') or session.get('tester_mode'):
+        return None
+    return str(get_locale() or 'fr')
+
+
+def watermarked(pdf, language):
+    from .watermark import watermark_cache
+
+    return watermark_cache.apply(pdf, language) if language else pdf
+
+
+@main.route('/preview-pdf-thumbnail')
+def preview_pdf_thumbnail():
+    """Image of the first page of the generated CV, cached with its render cache entry"""
+    from .thumbnails import THUMBNAIL_MIMETYPES, render_thumbnail
+
+    config = current_app.config
+    image_format = config.get('THUMBNAIL_FORMAT', 'png')
+    options = {
+        'dpi': config.get('THUMBNAIL_DPI', 72),
+        'max_size': config.get('THUMBNAIL_MAX_SIZE'),
+        'image_format': image_format,
+        'quality': config.get('THUMBNAIL_QUALITY', 80),
+    }
+
+    thumbnail = derive_generated_cv(('thumbnail',) + tuple(options.values()),
+                                    lambda pdf: render_thumbnail(pdf, **options))
+    if thumbnail is None:
+        return "PDF file not found", 404
+
+    return send_file(BytesIO(thumbnail), mimetype=THUMBNAIL_MIMETYPES[image_format])
 
 
 @main.route('/payment-page')
@@ -196,9 +239,8 @@ def payment_page():
         flash('No CV has been generated yet.', 'error')
         return redirect(url_for('main.create_cv'))
 
-    # Get the CV path to preview
-    cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], session['generated_cv'])
-    if not os.path.exists(cv_path):
+    # Make sure the CV to preview still exists
+    if load_generated_cv() is None:
         flash('Generated CV file not found.', 'error')
         return redirect(url_for('main.create_cv'))
 
@@ -242,6 +284,7 @@ def initiate_payment():
             'Content-Type': 'application/json'
         }
 
+        import requests
         response = requests.post(
             f"{current_app.config['WAVE_API_URL']}/checkout/sessions",
             headers=headers,
@@ -276,10 +319,11 @@ def payment_callback():
     if payment_id and status == 'successful':
         # Verify with Wave API
         headers = {
-            'Authorization': f'Bearer {current_app.config.WAVE_API_KEY}',
+            'Authorization': f"Bearer {current_app.config['WAVE_API_KEY']}",
             'Content-Type': 'application/json'
         }
 
+        import requests
         response = requests.get(
             f"{current_app.config['WAVE_API_URL']}/checkout/sessions/{payment_id}",
             headers=headers
@@ -393,12 +437,22 @@ def create_cv():
             if form.photo.data:
                 file = form.photo.data
                 if file and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    session['photo_path'] = filepath
+                    from PIL import Image
+                    from .photos import save_photo
+
+                    # Normalized once here (orientation, size) and stored under its content hash
+                    try:
+                        session['photo_path'] = save_photo(file.stream, current_app.config['UPLOAD_FOLDER'])
+                    except (OSError, Image.DecompressionBombError) as e:  # Includes UnidentifiedImageError
+                        current_app.logger.warning(f'Invalid photo upload: {str(e)}')
+                        message = _('Photo illisible. Veuillez choisir une image JPG ou PNG valide.')
+                        form.photo.errors.append(message)
+                        flash(message, 'error')
+                        return render_template('cv_form.html', form=form, now=datetime.now(),
+                                               translations=jsonify(translations).get_json())
 
             # Store form data in session with cleaned values
+            previous = session.get('cv_data')
             session['cv_data'] = {
                 'personal_info': clean_dict({
                     'first_name': form.first_name.data,
@@ -419,6 +473,7 @@ def create_cv():
                 'softwares': [clean_dict(dict(ref)) for ref in form.softwares.data if any(ref.values())]
 
             }
+            autosave_cv_data(session['cv_data'], previous)
 
             return redirect(url_for('main.preview_cv'))
         else:
@@ -429,8 +484,8 @@ def create_cv():
 
 @main.route('/preview-cv')
 def preview_cv():
-    # Get CV data from session
-    cv_data = session.get('cv_data')
+    # Get CV data from session, or from the saved draft once the session expired
+    cv_data = session.get('cv_data') or restore_cv_data()
     if not cv_data:
         flash('No CV data found. Please fill out the form first.', 'error')
         return redirect(url_for('main.create_cv'))
@@ -464,12 +519,21 @@ def preview_pdf():
             flash('No CV has been generated yet.', 'error')
             return redirect(url_for('main.create_cv'))
 
-        cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], session['generated_cv'])
-        if not os.path.exists(cv_path):
+        language = preview_language()
+        if language:
+            # The watermarked copy is cached next to the original, which stays as is for after payment
+            pdf = derive_generated_cv(('preview', language), lambda pdf: watermarked(pdf, language))
+            if pdf is None:
+                flash('Generated CV file not found.', 'error')
+                return redirect(url_for('main.create_cv'))
+            return send_file(BytesIO(pdf), mimetype='application/pdf', download_name=session['generated_cv'])
+
+        cv = load_generated_cv()
+        if cv is None:
             flash('Generated CV file not found.', 'error')
             return redirect(url_for('main.create_cv'))
 
-        return send_file(cv_path, as_attachment=False)
+        return send_generated_cv(cv, as_attachment=False)
     except Exception as e:
         flash(f'Error previewing CV: {str(e)}', 'error')
         return redirect(url_for('main.create_cv'))
@@ -484,13 +548,13 @@ def download_pdf():
             flash('No CV has been generated yet.', 'error')
             return redirect(url_for('main.create_cv'))
 
-        cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], session['generated_cv'])
-        if not os.path.exists(cv_path):
+        cv = load_generated_cv()
+        if cv is None:
             flash('Generated CV file not found.', 'error')
             return redirect(url_for('main.create_cv'))
 
         # Send file as attachment (for downloading)
-        return send_file(cv_path, as_attachment=True, download_name=session['generated_cv'])
+        return send_generated_cv(cv, as_attachment=True)
     except Exception as e:
         flash(f'Error downloading CV: {str(e)}', 'error')
         return redirect(url_for('main.create_cv'))
@@ -509,9 +573,11 @@ def save_cv_edits():
                 'message': 'No data received'
             }), 400
 
-        # Simply replace the entire CV data in the session
+        # Simply replace the entire CV data in the session, and save the sections that changed
+        previous = session.get('cv_data')
         session['cv_data'] = updated_cv_data
         session.modified = True
+        autosave_cv_data(updated_cv_data, previous)
 
         # Log the updated session data
         # print("Updated session data:")
@@ -533,44 +599,187 @@ def save_cv_edits():
         }), 500
 
 
+def submit_render_job(cv_data, language):
+    """
+    Queue the render of a CV, or complete it at once when the render cache has it.
+
+    The render cache key covers cv_data, the language, the selected template
+    and the content of the session's profile photo.
+
+    Returns:
+        RenderJob: The job; its result holds the generated CV ``filename`` and its ``render_key``
+    """
+    from .cv_generator import new_cv_filename, render_pdf
+
+    photo_path = session.get('photo_path', '')
+    template = session.get('selected_template')
+    key = render_cache_key(cv_data, language, template, photo_path)
+    cache = get_render_cache()
+    filename = new_cv_filename()
+
+    artifact = cache.get(key)
+    if artifact is not None:
+        current_app.logger.info(f"Serving CV from render cache: {key[:12]}")
+        save_generated_cv(filename, artifact.pdf)
+        return get_job_queue().completed({'filename': filename, 'render_key': key})
+
+    def finish(pdf):
+        cache.put(key, pdf)
+        save_generated_cv(filename, pdf)
+        return {'filename': filename, 'render_key': key}
+
+    return get_job_queue().submit(render_pdf, (cv_data, language, photo_path, template), finish)
+
+
+def get_session_job(job_id):
+    """Return the render job if it belongs to the current session, else None"""
+    if session.get('render_job') != job_id:
+        return None
+    return get_job_queue().get(job_id)
+
+
+def job_response(job):
+    """JSON description of a render job, with the URLs the client follows"""
+    data = job.to_dict()
+    data['status_url'] = url_for('main.render_job_status', job_id=job.id)
+    data['events_url'] = url_for('main.render_job_events', job_id=job.id)
+    if job.status == 'done':
+        data['redirect'] = url_for('main.finish_render_job', job_id=job.id)
+    return data
+
+
 @main.route('/process-pdf', methods=['POST'])
 @limit_free_usage(max_uses=3)  # Allow 3 free uses
 def process_pdf():
     try:
         # Ensure session has CV data
-        if 'cv_data' not in session:
+        if 'cv_data' not in session and restore_cv_data() is None:
             raise ValueError('No CV data found in session.')
 
         # Retrieve selected language (default to 'fr' if not set)
         selected_lang = session.get('lang', 'fr')
 
-        # Delete old CV file if it exists
-        old_cv_filename = session.get('generated_cv')
-        if old_cv_filename:
-            old_cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], old_cv_filename)
-            if os.path.exists(old_cv_path):
-                os.remove(old_cv_path)
-                current_app.logger.info(f'Deleted old CV file: {old_cv_filename}')
-
-        # Generate new CV
-        cv_filename = generate_cv_from_form_data(
-            session['cv_data'],
-            current_app.config['UPLOAD_FOLDER'],
-            selected_lang
-        )
-        session['generated_cv'] = cv_filename
+        job = submit_render_job(session['cv_data'], selected_lang)
+        session['render_job'] = job.id
+
+        if job.finished:
+            # Served from the render cache, or rendered inline by the 'sync' backend
+            return finish_render_job(job.id)
 
-        # Redirect logic
-        if current_app.config.get('TEST_MODE_ENABLED') and session.get('tester_mode'):
-            return redirect(url_for('main.preview_pdf'))
+        # Rendering in the background: the client follows the job until it is done
+        return jsonify(job_response(job)), 202
 
-        return redirect(url_for('main.payment_page'))
+    except JobQueueFull as e:
+        current_app.logger.warning(f'Render queue full: {str(e)}')
+        return jsonify({'error': str(e)}), 503
 
     except Exception as e:
         current_app.logger.error(f'Error processing PDF: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
 
+@main.route('/render-jobs/<job_id>')
+def render_job_status(job_id):
+    """Polling endpoint for a render job started by /process-pdf"""
+    job = get_session_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown render job'}), 404
+    return jsonify(job_response(job))
+
+
+@main.route('/render-jobs/<job_id>/events')
+def render_job_events(job_id):
+    """Server-sent events stream of a render job's status, closed once it finishes"""
+    job = get_session_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown render job'}), 404
+
+    jobs = get_job_queue()
+
+    def stream():
+        current, status = job, None
+        while True:
+            if current.status != status:
+                status = current.status
+                yield f"data: {json.dumps(job_response(current))}\n\n"
+                if current.finished:
+                    return
+            else:
+                yield ": keep-alive\n\n"
+            current = jobs.wait(current, status, timeout=15)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main.route('/render-jobs/<job_id>/finish')
+def finish_render_job(job_id):
+    """Make a finished render job's CV the session's generated CV and move on to payment or preview"""
+    job = get_session_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown render job'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify(job_response(job)), 409
+
+    # Delete the previously generated CV
+    old_cv_filename = session.get('generated_cv')
+    if old_cv_filename and old_cv_filename != job.result['filename']:
+        delete_generated_cv(old_cv_filename)
+    session['generated_cv'] = job.result['filename']
+    session['generated_cv_key'] = job.result['render_key']
+
+    # Redirect logic
+    if current_app.config.get('TEST_MODE_ENABLED') and session.get('tester_mode'):
+        return redirect(url_for('main.preview_pdf'))
+
+    return redirect(url_for('main.payment_page'))
+
+
+def trace_endpoint(f):
+    """Only serve render tracing endpoints when RENDER_TRACE_ENDPOINTS is on"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.config.get('RENDER_TRACE_ENDPOINTS'):
+            return jsonify({'error': 'Not found'}), 404
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+@main.route('/ready')
+def ready():
+    """
+    Readiness probe: 503 until the render resources are warm when PREFORK_WARMUP
+    asks for them, 200 otherwise. The body reports the warm-up state.
+    """
+    status = get_render_warmup().status()
+    status['ready'] = status['state'] == 'warm' or not current_app.config.get('PREFORK_WARMUP', False)
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@main.route('/debug/render-stats')
+@trace_endpoint
+def render_stats():
+    """Per-stage render timing histograms, plus the render cache, layout cache and job queue counters"""
+    return jsonify({
+        'stages': get_render_tracer().stats(),
+        'render_cache': get_render_cache().stats(),
+        'layout_cache': layout_cache.stats(),
+        'render_jobs': get_job_queue().stats(),
+    })
+
+
+@main.route('/debug/render-trace')
+@trace_endpoint
+def render_trace():
+    """Recent render spans in the Trace Event Format (open in chrome://tracing or Perfetto)"""
+    response = jsonify(get_render_tracer().export_trace())
+    response.headers['Content-Disposition'] = 'attachment; filename=render-trace.json'
+    return response
+
+
 @main.route('/add-field/<field_type>')
 def add_field(field_type):
     """AJAX endpoint for dynamically adding form fields"""
@@ -650,7 +859,7 @@ def generate_experience_description():
         """
 
         # Initialisation du modèle
-        model = GenerativeModel('gemini-2.0-flash')
+        model = generative_model('gemini-2.0-flash')
 
         # Génération de contenu avec flux
         response = model.generate_content(prompt, stream=True)
@@ -700,7 +909,7 @@ def generate_professional_summary():
         """
 
         # Initialize the model
-        model = GenerativeModel('gemini-2.0-flash')
+        model = generative_model('gemini-2.0-flash')
 
         # Generate content with streaming
         response = model.generate_content(prompt, stream=True)
@@ -761,7 +970,7 @@ def customize_cv_for_job():
         """
 
         # Initialize the model
-        model = GenerativeModel('gemini-2.0-flash')
+        model = generative_model('gemini-2.0-flash')
 
         # Generate content
         response = model.generate_content(prompt)
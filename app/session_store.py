@@ -0,0 +1,309 @@
+"""
+Server-side storage for the large session values.
+
+The CV being edited (``cv_data``, with long descriptions and generated text)
+used to travel in the signed session cookie: sent and verified again with
+every request, and silently dropped by browsers past about 4 KB. The keys
+listed in SESSION_SERVER_KEYS are now kept in a session store, under an
+opaque id that is the only thing the cookie carries for them; the rest of
+the session (language, flags, file names) stays in the cookie.
+
+Stored values are only read on the first access to one of those keys, so
+requests that do not touch the CV do not load it. Entries expire with
+PERMANENT_SESSION_LIFETIME, counted from the last request that used them.
+
+SESSION_STORE selects the backend:
+- 'memory': in-process LRU, for a single process (development, tests)
+- 'sqlite': a SQLite file shared by the workers of a host
+- 'cookie': no server-side storage, everything stays in the cookie
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface
+
+STORES = ('cookie', 'memory', 'sqlite')
+
+# Cookie key holding the id of the server-side entry
+SID_KEY = '_sid'
+
+
+class MemorySessionStore:
+    """
+    In-process session store, keyed by session id.
+
+    The least recently used entries are dropped once ``max_entries`` is reached.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # sid -> (data, expires)
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """Return the data stored for ``sid``, or None if there is none or it expired"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry[0]
+
+    def put(self, sid, data, lifetime):
+        """
+        Store ``data`` for ``sid``.
+
+        Args:
+            sid (str): Session id
+            data (str): Serialized session values
+            lifetime (float): Seconds before the entry expires
+        """
+        with self._lock:
+            self._entries[sid] = (data, time.time() + lifetime)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteSessionStore:
+    """
+    Session store in a SQLite file, shared by every process of the host.
+
+    Each thread uses its own connection; expired entries are skipped when
+    read and deleted every ``purge_every`` writes.
+    """
+
+    def __init__(self, path, purge_every=100):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS sessions '
+                       '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+
+    def _connect(self):
+        # Connections are not shared across threads, nor inherited by forked workers
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def get(self, sid):
+        """Return the data stored for ``sid``, or None if there is none or it expired"""
+        row = self._connect().execute('SELECT data FROM sessions WHERE sid = ? AND expires > ?',
+                                      (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def put(self, sid, data, lifetime):
+        """
+        Store ``data`` for ``sid``.
+
+        Args:
+            sid (str): Session id
+            data (str): Serialized session values
+            lifetime (float): Seconds before the entry expires
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)',
+                       (sid, data, now + lifetime))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                db.execute('DELETE FROM sessions WHERE expires <= ?', (now,))
+
+    def delete(self, sid):
+        with self._connect() as db:
+            db.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM sessions WHERE expires > ?',
+                                       (time.time(),)).fetchone()[0]
+
+
+class ServerSideSession(SecureCookieSession):
+    """
+    Cookie session whose server keys are read from the session store on first access.
+
+    Every dict method that reads or changes them loads them first, so they are
+    saved back whole; whole-session reads (iteration, len, items...) load them too.
+    """
+    store = None
+    server_keys = frozenset()
+    loaded = False
+    cleared_sid = None  # Entry of a cleared session, deleted when the session is saved
+
+    def _load(self, key):
+        if key in self.server_keys:
+            self._load_all()
+
+    def _load_all(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        sid = dict.get(self, SID_KEY)
+        data = self.store.get(sid) if sid else None
+        if data:
+            # Not a modification: bypass the update callback
+            dict.update(self, SecureCookieSessionInterface.serializer.loads(data))
+
+    def __getitem__(self, key):
+        self._load(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._load(key)
+        return super().__contains__(key)
+
+    def __setitem__(self, key, value):
+        self._load(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._load(key)
+        super().__delitem__(key)
+
+    def get(self, key, default=None):
+        self._load(key)
+        return super().get(key, default)
+
+    def pop(self, key, *args):
+        self._load(key)
+        return super().pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        self._load(key)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        values = dict(*args, **kwargs)
+        if self.server_keys.intersection(values):
+            self._load_all()
+        super().update(values)
+
+    def popitem(self):
+        self._load_all()
+        return super().popitem()
+
+    def clear(self):
+        self.cleared_sid = dict.get(self, SID_KEY) or self.cleared_sid
+        self.loaded = True  # Nothing left to load
+        super().clear()
+
+    def __iter__(self):
+        self._load_all()
+        return super().__iter__()
+
+    def __len__(self):
+        self._load_all()
+        return super().__len__()
+
+    def keys(self):
+        self._load_all()
+        return super().keys()
+
+    def values(self):
+        self._load_all()
+        return super().values()
+
+    def items(self):
+        self._load_all()
+        return super().items()
+
+    def copy(self):
+        self._load_all()
+        return super().copy()
+
+
+class ServerSideSessionInterface(SecureCookieSessionInterface):
+    """Signed cookie sessions, with the values of ``server_keys`` kept in ``store``"""
+    session_class = ServerSideSession
+
+    def __init__(self, store, server_keys):
+        self.store = store
+        self.server_keys = frozenset(server_keys)
+
+    def open_session(self, app, request):
+        session = super().open_session(app, request)
+        if session is not None:
+            session.store, session.server_keys = self.store, self.server_keys
+        return session
+
+    def save_session(self, app, session, response):
+        if session.cleared_sid and session.cleared_sid != dict.get(session, SID_KEY):
+            self.store.delete(session.cleared_sid)
+
+        # Values still in the cookie from before they moved server side are moved too
+        if session.loaded or any(dict.__contains__(session, key) for key in self.server_keys):
+            self._save_server_values(app, session)
+
+        cookie = SecureCookieSession({key: value for key, value in dict.items(session)
+                                      if key not in self.server_keys})
+        cookie.modified, cookie.accessed = session.modified, session.accessed
+        super().save_session(app, cookie, response)
+
+    def _save_server_values(self, app, session):
+        """Write the server keys back to the store, which also renews their lifetime"""
+        values = {key: dict.__getitem__(session, key) for key in self.server_keys if dict.__contains__(session, key)}
+        sid = dict.get(session, SID_KEY)
+
+        if values:
+            if sid is None:
+                sid = secrets.token_urlsafe(32)
+                dict.__setitem__(session, SID_KEY, sid)
+                session.modified = True
+            self.store.put(sid, self.serializer.dumps(values), app.permanent_session_lifetime.total_seconds())
+        elif sid is not None:
+            self.store.delete(sid)
+            dict.__delitem__(session, SID_KEY)
+            session.modified = True
+
+
+def init_session_store(app):
+    """
+    Install the session store selected by SESSION_STORE on ``app``.
+
+    Raises:
+        ValueError: If SESSION_STORE is not one of STORES
+    """
+    backend = app.config.get('SESSION_STORE', 'memory')
+    if backend not in STORES:
+        raise ValueError(f"Unknown SESSION_STORE '{backend}', choose from {', '.join(STORES)}")
+
+    if backend == 'memory':
+        store = MemorySessionStore(app.config.get('SESSION_STORE_SIZE', 10000))
+    elif backend == 'sqlite':
+        store = SQLiteSessionStore(app.config.get('SESSION_STORE_PATH')
+                                   or os.path.join(app.instance_path, 'sessions.sqlite3'))
+    else:
+        store = None
+
+    app.extensions['session_store'] = store
+    if store is None:
+        app.session_interface = SecureCookieSessionInterface()
+    else:
+        app.session_interface = ServerSideSessionInterface(store, app.config.get('SESSION_SERVER_KEYS', ('cv_data',)))
+
+
+def get_session_store():
+    """Return the session store of the current app (None when sessions live in the cookie)"""
+    return current_app.extensions['session_store']
@@ -0,0 +1,76 @@
+"""
+Startup benchmark.
+
+Imports the app and calls create_app in a fresh interpreter run with
+``python -X importtime``, so that nothing is already imported, and reports
+how long it took, the slowest imports and which of the heavy dependencies
+got loaded. Rendering (fitz, Pillow, numpy), Gemini and the payment HTTP
+client are only needed by some requests: they are imported on first use,
+so that a web worker boots, and starts answering, quickly.
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Imported on first use, never by create_app
+HEAVY_MODULES = ('fitz', 'PIL', 'numpy', 'google.generativeai', 'requests')
+
+# Run in the child interpreter; the result is printed as the last line of stdout
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app({config_name!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'create_app_ms': elapsed * 1000,
+                  'heavy_modules': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse the ``-X importtime`` report written to stderr.
+
+    Returns:
+        list: (module, depth, self ms, cumulative ms) tuples in import order; depth
+        is 0 for modules imported directly, 1 for their imports, and so on
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():  # Header line
+            continue
+        # Each level of nesting is indented by two more spaces
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        imports.append((module.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return imports
+
+
+def measure_startup(config_name='testing', top=10):
+    """
+    Import the app and create it in a new interpreter.
+
+    Args:
+        config_name (str): Configuration passed to create_app
+        top (int): Number of slowest imports to report
+
+    Returns:
+        dict: ``create_app_ms`` (import included), ``heavy_modules`` loaded by it and
+        ``slowest`` imports as (module, cumulative ms), among the modules imported directly
+        and their own imports
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = _SCRIPT.format(config_name=config_name, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=root, env=env,
+                             capture_output=True, text=True, check=True)
+
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    imports = [(module, cumulative) for module, depth, _, cumulative in parse_importtime(process.stderr)
+               if depth <= 1]
+    result['slowest'] = sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+    return result
@@ -49,6 +49,41 @@ class CVExporter {
         }
     }
 
+    waitForJob(job) {
+        if (window.EventSource) {
+            return new Promise((resolve, reject) => {
+                const source = new EventSource(job.events_url);
+                source.onmessage = (event) => {
+                    const data = JSON.parse(event.data);
+                    if (data.status === 'done' || data.status === 'failed') {
+                        source.close();
+                        data.status === 'done' ? resolve(data) : reject(new Error(data.error || cvTranslations.unknownError));
+                    }
+                };
+                source.onerror = () => {
+                    // Stream interrupted (e.g. by a proxy): fall back to polling
+                    source.close();
+                    this.pollJob(job).then(resolve, reject);
+                };
+            });
+        }
+        return this.pollJob(job);
+    }
+
+    async pollJob(job, interval = 1000) {
+        while (true) {
+            const response = await fetch(job.status_url);
+            const data = await response.json();
+            if (!response.ok || data.status === 'failed') {
+                throw new Error(data.error || cvTranslations.unknownError);
+            }
+            if (data.status === 'done') {
+                return data;
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    }
+
     async generatePDF() {
         try {
             this.updateButtonState(true, cvTranslations.generatingCV);
@@ -95,6 +130,13 @@ class CVExporter {
                 throw new Error(errorData.error || 'Failed to generate CV');
             }
 
+            // Rendering in the background: wait for the job, then let it redirect us
+            if (response.status === 202) {
+                const job = await this.waitForJob(await response.json());
+                window.location.href = job.redirect;
+                return;
+            }
+
             const contentType = response.headers.get('content-type');
             if (contentType && contentType.includes('application/json')) {
                 const data = await response.json();
@@ -0,0 +1,55 @@
+import threading
+
+import fitz
+
+
+class TemplateLayerCache:
+    """
+    Static page skeletons of the CV templates, shared by the whole process.
+
+    Each skeleton (backgrounds and other fixed elements) is drawn once per
+    (template, language, page size) into a one-page PDF. Renders stamp it on
+    their pages with show_pdf_page: the skeleton is embedded once per
+    document as a form XObject and each page only references it.
+    """
+
+    def __init__(self):
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, draw, width, height):
+        """
+        Return the skeleton PDF for ``key``, drawing it on first use.
+
+        Args:
+            key (tuple): Identifies the skeleton, e.g. (template, language, width, height)
+            draw (callable): Draws the skeleton on the fitz page it is given
+            width (float): Page width in points
+            height (float): Page height in points
+
+        Returns:
+            bytes: The one-page skeleton PDF
+        """
+        layer = self._layers.get(key)
+        if layer is None:
+            doc = fitz.open()
+            draw(doc.new_page(width=width, height=height))
+            layer = doc.tobytes(garbage=3, deflate=True)
+            with self._lock:
+                layer = self._layers.setdefault(key, layer)
+        return layer
+
+    def open(self, key, draw, width, height):
+        """Open the skeleton for ``key`` as a fitz document, ready to be passed to show_pdf_page"""
+        return fitz.open(stream=self.get(key, draw, width, height), filetype='pdf')
+
+    def __len__(self):
+        return len(self._layers)
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+
+# Shared by every CVGenerator in the process
+template_layers = TemplateLayerCache()
@@ -0,0 +1,70 @@
+"""Sample CV data and app set-up shared by the test modules"""
+import copy
+import unittest
+
+from app import create_app
+
+# A small CV, with one entry in each of the main sections
+CV_DATA = {
+    'personal_info': {
+        'first_name': 'Awa',
+        'last_name': 'Ndiaye',
+        'email': 'awa.ndiaye@example.com',
+        'phone': '+221 77 123 45 67',
+        'address': 'Dakar',
+        'city': 'Dakar',
+        'professional_summary': 'Ingénieure logicielle avec huit ans d\'expérience.'
+    },
+    'education': [{'institution': 'UCAD', 'degree': 'Master', 'start_date': '2012-09-01', 'end_date': '2014-07-01'}],
+    'experience': [{'company': 'Orange', 'position': 'Engineer', 'start_date': '2019-03-01',
+                    'description_': 'Built and ran the billing platform.'}],
+    'skills': [{'skill': 'Python'}],
+    'languages': [{'language': 'Français', 'level': 'Natif'}],
+    'certifications': [],
+    'hobbys': [],
+    'references': [],
+    'softwares': []
+}
+
+
+def make_cv_data(personal_info=None, **sections):
+    """
+    Return a copy of CV_DATA that a test may change freely.
+
+    Args:
+        personal_info (dict): Fields replacing those of CV_DATA's personal_info
+        **sections: Sections replacing CV_DATA's, e.g. ``experience=[]``
+
+    Returns:
+        dict: The cv_data
+    """
+    cv_data = copy.deepcopy(CV_DATA)
+    cv_data['personal_info'].update(personal_info or {})
+    cv_data.update(copy.deepcopy(sections))
+    return cv_data
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    Runs each test against a fresh 'testing' app, with ``self.client``.
+
+    ``config`` is applied to the app before the test, and ``context`` tells
+    which context is pushed around it: 'app', 'request' or None.
+    """
+    config = {}
+    context = None
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config.update(self.config)
+        self.client = self.app.test_client()
+
+        if self.context is not None:
+            ctx = self.app.test_request_context() if self.context == 'request' else self.app.app_context()
+            ctx.push()
+            self.addCleanup(ctx.pop)
+
+    def set_session(self, **values):
+        """Put values in the session of ``self.client``"""
+        with self.client.session_transaction() as sess:
+            sess.update(values)
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.benchmarks import benchmark_cases, compare_to_baseline, load_baseline
+from app.tests.fixtures import AppTestCase
+
+
+class BenchmarkTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.runner = self.app.test_cli_runner()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.baseline_path = os.path.join(self.tmp.name, 'baseline.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _bench(self, *args):
+        return self.runner.invoke(args=['cv', 'bench', '--case', 'minimal', '--repeat', '1',
+                                        '--baseline', self.baseline_path, *args])
+
+    def test_fixtures_cover_the_requested_shapes(self):
+        cases = {case.name: case for case in benchmark_cases()}
+
+        self.assertEqual(len(cases['large'].cv_data['experience']), 50)
+        self.assertEqual(cases['turkish'].language, 'tr')
+        self.assertEqual({case.photo for case in cases.values()}, {True, False})
+        self.assertGreater(len(cases['long_email'].cv_data['personal_info']['email']), 60)
+
+    def test_regressions_past_the_threshold(self):
+        baseline = {'minimal': {'wall_ms': 100.0, 'alloc_peak_kib': 1000.0, 'bytes': 5000}}
+        results = {'minimal': {'wall_ms': 124.0, 'alloc_peak_kib': 1300.0, 'bytes': 4000},
+                   'large': {'wall_ms': 900.0, 'alloc_peak_kib': 2000.0, 'bytes': 9000}}
+
+        regressions = compare_to_baseline(results, baseline, threshold=0.25)
+
+        self.assertEqual([(r['case'], r['metric'], r['ratio']) for r in regressions],
+                         [('minimal', 'alloc_peak_kib', 1.3)])
+
+    def test_bench_writes_then_checks_the_baseline(self):
+        result = self._bench('--update-baseline')
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        baseline = load_baseline(self.baseline_path)
+        self.assertEqual(list(baseline), ['minimal'])
+        self.assertEqual(baseline['minimal']['pages'], 1)
+        self.assertTrue(all(baseline['minimal'][metric] > 0 for metric in ('wall_ms', 'alloc_peak_kib', 'bytes')))
+
+        result = self._bench('--threshold', '100')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('No regression', result.output)
+
+    def test_bench_fails_on_regression(self):
+        with open(self.baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'cases': {'minimal': {'wall_ms': 0.01, 'alloc_peak_kib': 0.01, 'bytes': 1}}}, f)
+
+        result = self._bench()
+
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn('REGRESSION minimal bytes', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+class RenderBatchTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.runner = self.app.test_cli_runner()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'records.jsonl')
+        self.output_dir = os.path.join(self.tmp.name, 'out')
+
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'id': 'ba-fr', 'language': 'fr', 'cv_data': CV_DATA}) + '\n')
+            f.write(json.dumps(CV_DATA) + '\n')  # bare cv_data record
+            f.write('{"not json\n')
+            f.write(json.dumps({'id': 'incomplete', 'cv_data': {'personal_info': {}}}) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_batch_in_process(self):
+        result = self.runner.invoke(args=['cv', 'render-batch', self.input_path, self.output_dir, '--workers', '0'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rendered 2/4 CVs', result.output)
+
+        for filename in ('ba-fr.pdf', '2.pdf'):
+            with open(os.path.join(self.output_dir, filename), 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF'))
+
+        with open(os.path.join(self.output_dir, 'errors.jsonl'), encoding='utf-8') as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual([(e['line'], e['id']) for e in errors], [(3, '3'), (4, 'incomplete')])
+
+        with open(os.path.join(self.output_dir, 'summary.json'), encoding='utf-8') as f:
+            summary = json.load(f)
+        self.assertEqual((summary['records'], summary['rendered'], summary['failed']), (4, 2, 2))
+        self.assertEqual(sorted(t['id'] for t in summary['timings']), ['2', 'ba-fr'])
+
+    def test_render_batch_process_pool(self):
+        result = self.runner.invoke(args=['cv', 'render-batch', self.input_path, self.output_dir, '--workers', '2'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rendered 2/4 CVs', result.output)
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['2.pdf', 'ba-fr.pdf', 'errors.jsonl', 'summary.json'])
+
+        with open(os.path.join(self.output_dir, 'summary.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['workers'], 2)
+
+    def test_unsafe_and_duplicate_ids(self):
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            for record_id in ('../escape', 'ba', 'ba', 'a/b'):
+                f.write(json.dumps({'id': record_id, 'cv_data': CV_DATA}) + '\n')
+
+        result = self.runner.invoke(args=['cv', 'render-batch', self.input_path, self.output_dir, '--workers', '0'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rendered 1/4 CVs', result.output)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'escape.pdf')))
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['ba.pdf', 'errors.jsonl', 'summary.json'])
+
+        with open(os.path.join(self.output_dir, 'errors.jsonl'), encoding='utf-8') as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual([e['line'] for e in errors], [1, 3, 4])
+        self.assertIn('Duplicate id', errors[1]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from app.dates import normalize_cv_dates, parse_date, sniff_date, split_date_range
+
+
+class ParseDateTestCase(unittest.TestCase):
+    def test_formats(self):
+        for text in ('Fri, 01 Mar 2019 00:00:00 GMT', 'Mar 2019', 'March 2019', '2019-03-01',
+                     '03/15/2019', '15/03/2019', ' Mar \n 2019 '):
+            self.assertEqual(parse_date(text, 'en'), 'Mar 2019', text)
+
+    def test_month_names_follow_language(self):
+        self.assertEqual(parse_date('2019-02-01', 'fr'), 'Fév 2019')
+        self.assertEqual(parse_date('2019-02-01', 'tr'), 'Şub 2019')
+        self.assertEqual(parse_date('2019-02-01', 'de'), 'Fév 2019')
+
+    def test_invalid_dates_are_returned_as_is(self):
+        self.assertIsNone(parse_date('', 'fr'))
+        self.assertIsNone(parse_date(None, 'fr'))
+        self.assertEqual(parse_date('Sept 2019', 'fr'), 'Sept 2019')
+        self.assertEqual(parse_date('2019-02-30', 'fr'), '2019-02-30')
+        self.assertEqual(parse_date('29/02/2019', 'fr'), '29/02/2019')
+        self.assertEqual(parse_date('29/02/2020', 'fr'), 'Fév 2020')
+
+    def test_range_keeps_its_start(self):
+        self.assertEqual(parse_date('Mar 2019 - Jan 2023', 'en'), 'Mar 2019')
+
+    def test_results_are_memoized(self):
+        parse_date.cache_clear()
+        parse_date('Apr 2020', 'en')
+        parse_date('Apr 2020', 'en')
+        self.assertEqual(parse_date.cache_info().hits, 1)
+
+    def test_sniff_date(self):
+        self.assertEqual(sniff_date('Tue, 31 Dec 2024 00:00:00 GMT'), (12, 2024))
+        self.assertIsNone(sniff_date('Xyz, 31 Dec 2024 00:00:00 GMT'))
+
+
+class NormalizeCVDatesTestCase(unittest.TestCase):
+    def test_split_date_range(self):
+        self.assertEqual(split_date_range('Mar 2019 - Jan 2023'), ('Mar 2019', 'Jan 2023'))
+        self.assertEqual(split_date_range('2019-03-01'), ('2019-03-01', ''))
+        self.assertEqual(split_date_range(''), ('', ''))
+
+    def test_payload(self):
+        cv_data = {
+            'experience': [
+                {'start_date': 'Mar 2019 - Jan 2023'},
+                {'start_date': 'Fri, 01 Feb 2019 00:00:00 GMT', 'end_date': 'Sun, 01 Dec 2019 00:00:00 GMT'},
+                {'start_date': '2020-01-01', 'end_date': '2021-01-01', 'is_current': True},
+            ],
+            'education': [{'start_date': '2012-09-01', 'end_date': '2014-07-01'}],
+            'certifications': [{'date': ''}],
+        }
+
+        dates = normalize_cv_dates(cv_data, 'tr')
+
+        self.assertEqual(dates['experience'], [('Mar 2019', 'Oca 2023'), ('Şub 2019', 'Ara 2019'),
+                                               ('Oca 2020', None)])
+        self.assertEqual(dates['education'], [('Eyl 2012', 'Tem 2014')])
+        self.assertEqual(dates['certifications'], [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
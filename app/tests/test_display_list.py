@@ -0,0 +1,85 @@
+import json
+import pickle
+import unittest
+
+import fitz
+
+from app.backends import paint_fitz
+from app.cv_generator import CVGenerator
+from app.display_list import DisplayList, build_display_lists
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+BLACK = (0, 0, 0)
+
+
+class DisplayListTestCase(unittest.TestCase):
+    def test_layout_ops_are_placed_and_styles_shared(self):
+        display_list = DisplayList(595, 842)
+        display_list.extend([(100, ('text', 10, 5, 'a', 'helv', 10, BLACK)),
+                             (120, ('text', 10, 5, 'b', 'helv', 10, BLACK)),
+                             (100, ('line', 0, 3, 50, 3, BLACK, 1)),
+                             (100, ('circle', 20, 2, 3, BLACK, BLACK))])
+
+        self.assertEqual(list(display_list), [('text', 10, 105, 'a', 'helv', 10, BLACK),
+                                              ('text', 10, 125, 'b', 'helv', 10, BLACK),
+                                              ('line', 0, 103, 50, 103, BLACK, 1),
+                                              ('circle', 20, 102, 3, BLACK, BLACK)])
+        self.assertEqual(len(display_list.style_table), 3)
+
+    def test_serialization_round_trip(self):
+        display_list = DisplayList(595, 842)
+        display_list.rect(0, 0, 10, 10, (0.5, 0.5, 0.5), None)
+        display_list.image(0, 0, 10, 10, b'\x89PNG')
+        display_list.text(5, 5, 'Şükrü', 'Turkish-Roman', 10, BLACK)
+
+        from_json = DisplayList.from_dict(json.loads(json.dumps(display_list.to_dict())))
+        from_pickle = pickle.loads(pickle.dumps(display_list))
+
+        self.assertEqual(list(from_json), list(display_list))
+        self.assertEqual(list(from_pickle), list(display_list))
+
+    def test_pages_merge_flows_in_order(self):
+        sidebar = [[(0, ('text', 0, 10, 'side', 'helv', 10, BLACK))]]
+        main = [[(0, ('text', 200, 10, 'main 1', 'helv', 10, BLACK))],
+                [(0, ('text', 200, 10, 'main 2', 'helv', 10, BLACK))]]
+
+        pages = build_display_lists(595, 842, sidebar, main)
+
+        self.assertEqual([[op[3] for op in page] for page in pages], [['side', 'main 1'], ['main 2']])
+
+
+class DisplayListBackendTestCase(AppTestCase):
+    context = 'request'
+
+    def test_layout_without_a_pdf(self):
+        display_lists = CVGenerator(CV_DATA, None, 'fr').display_lists()
+
+        texts = [op[3] for op in display_lists[0] if op[0] == 'text']
+        self.assertEqual(len(display_lists), 1)
+        self.assertEqual(texts[0], 'Awa Ndiaye')
+        self.assertIn('Orange', texts)
+
+    def test_fitz_backend_writes_one_content_stream(self):
+        display_list = CVGenerator(CV_DATA, None, 'fr').display_lists()[0]
+
+        with fitz.open() as doc:
+            page = doc.new_page(width=595, height=842)
+            paint_fitz(page, display_list)
+
+            self.assertEqual(len(page.get_contents()), 1)
+            self.assertIn('Awa Ndiaye', page.get_text())
+
+    def test_raster_preview(self):
+        generator = CVGenerator(CV_DATA, None, 'fr')
+        image = generator.preview_image(dpi=36)
+
+        self.assertEqual(image.size, (298, 421))
+        sidebar = tuple(round(c * 255) for c in generator.SIDEBAR_COLOR)
+        self.assertEqual(image.getpixel((5, 400)), sidebar)
+        # The name is drawn in black on the sidebar
+        self.assertEqual(min(image.crop((10, 15, 80, 30)).convert('L').getdata()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.drafts import DraftStore, get_draft_store
+from app.models import Draft, DraftSection
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+class DraftTestCase(AppTestCase):
+    context = 'app'
+
+    def setUp(self):
+        super().setUp()
+        self.store = get_draft_store()
+
+    def tearDown(self):
+        db.session.remove()
+
+    def test_sections_stored_one_row_each(self):
+        self.client.post('/save-cv-edits', json=CV_DATA)
+
+        draft = Draft.query.one()
+        self.assertEqual([section.name for section in DraftSection.query.order_by(DraftSection.position)],
+                         list(CV_DATA))
+        self.assertEqual(self.store.load(draft.id), CV_DATA)
+
+        with patch.object(self.app.json, 'loads', wraps=self.app.json.loads) as loads:
+            self.assertEqual(self.store.load_sections(draft.id, ['skills']), {'skills': CV_DATA['skills']})
+            self.assertEqual(loads.call_count, 1)
+
+    def test_autosave_writes_changed_sections(self):
+        self.client.post('/save-cv-edits', json=CV_DATA)
+
+        edited = dict(CV_DATA, skills=[{'skill': 'Python'}, {'skill': 'SQL'}])
+        with patch.object(self.store, '_write', wraps=self.store._write) as write:
+            self.client.post('/save-cv-edits', json=edited)
+
+        (items,), _ = write.call_args
+        self.assertEqual(list(items), [(Draft.query.one().id, 'skills')])
+        self.assertEqual(self.store.load(Draft.query.one().id), edited)
+
+    def test_batched_writes(self):
+        store = DraftStore(self.app, flush_interval=60, batch_size=3)
+        draft_id = store.create_draft('token')
+
+        store.autosave(draft_id, {'skills': [], 'hobbys': []})
+        store.autosave(draft_id, {'skills': [{'skill': 'Contrats'}]})
+        self.assertEqual(store.load(draft_id), None)
+
+        store.flush()
+        self.assertEqual(store.flushes, 1)
+        self.assertEqual(store.load(draft_id), {'skills': [{'skill': 'Contrats'}], 'hobbys': []})
+
+        # A full batch is written without waiting for the interval
+        store.autosave(draft_id, {'experience': [], 'languages': [], 'softwares': []})
+        deadline = time.time() + 5
+        while store.flushes < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(store.flushes, 2)
+
+    def test_draft_restored_after_session_expiry(self):
+        self.client.post('/save-cv-edits', json=CV_DATA)
+        self.client.delete_cookie('session')
+
+        response = self.client.get('/preview-cv')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Awa', response.data)
+
+        # Another visitor has no draft
+        self.assertEqual(self.app.test_client().get('/preview-cv').status_code, 302)
+
+    def test_failed_flush_keeps_sections_queued(self):
+        store = DraftStore(self.app, flush_interval=60)
+        draft_id = store.create_draft('token')
+        store.autosave(draft_id, {'skills': [], 'hobbys': []})
+
+        with patch.object(store, '_write', side_effect=RuntimeError('database is locked')):
+            store.flush()
+        store.autosave(draft_id, {'skills': [{'skill': 'Contrats'}]})
+        store.flush()
+
+        self.assertEqual(store.load(draft_id), {'skills': [{'skill': 'Contrats'}], 'hobbys': []})
+
+
+class ForkedWorkerTestCase(unittest.TestCase):
+    def test_forked_worker_opens_its_own_connection(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = 'sqlite:///' + os.path.join(tmp, 'cv.sqlite3')
+            with patch.object(TestingConfig, 'SQLALCHEMY_DATABASE_URI', url):
+                app = create_app('testing')
+
+            with app.app_context():
+                # No connection is left in the pool for a forked worker to inherit
+                self.assertEqual(db.engine.pool.checkedin(), 0)
+
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    with app.app_context():
+                        get_draft_store().create_draft('child')
+                        db.session.remove()
+                        status = 0 if db.engine.pool.checkedin() == 1 else 2
+                finally:
+                    os._exit(status)
+
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            with app.app_context():
+                self.assertIsNotNone(get_draft_store().user_for('child'))
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+import fitz
+
+from app.cv_generator import CVGenerator
+from app.display_list import DisplayList
+from app.font_fallback import Coverage, FontFallback
+from app.fonts import font_registry
+from app.tests.fixtures import AppTestCase, make_cv_data
+from app.text_metrics import TextMeasurer
+
+
+# Characters the base-14 fonts lack: ŋ, typographic quotes and dashes, €
+CV_DATA = make_cv_data({'first_name': 'Ndèye', 'last_name': 'Ngoŋ', 'email': 'ndeye.ngon@example.com',
+                        'professional_summary': 'Chargée de communication – 6 ans d’expérience, budget 20 000 €.'})
+
+
+class CoverageTestCase(unittest.TestCase):
+    def test_bitmap(self):
+        coverage = Coverage([0x41, 0x14b, 0x2022])
+        self.assertIn(0x14b, coverage)
+        self.assertNotIn(0x14c, coverage)
+        self.assertNotIn(0x1F4E7, coverage)  # Past the end of the bitmap
+        self.assertEqual(len(coverage), 3)
+        self.assertFalse(coverage.ascii)
+
+
+class FontFallbackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fallback = FontFallback()
+
+    def test_base14_fonts_cover_latin1_only(self):
+        """fitz writes base-14 fonts with a single-byte encoding"""
+        coverage = self.fallback.coverage('Times-Roman')
+        self.assertTrue(coverage.ascii)
+        self.assertIn(ord('é'), coverage)
+        self.assertNotIn(ord('’'), coverage)
+        self.assertNotIn(ord('ş'), coverage)
+
+    def test_first_covering_font_of_the_chain(self):
+        self.assertEqual(self.fallback.font_for(ord('é'), 'Times-Roman'), 'Times-Roman')
+        self.assertEqual(self.fallback.font_for(ord('ş'), 'Times-Roman'), 'Turkish-Roman')
+        self.assertEqual(self.fallback.font_for(ord('ɓ'), 'Times-Roman'), 'DejaVuSans')
+        self.assertEqual(self.fallback.font_for(ord('ɓ'), 'Turkish-Bold'), 'DejaVuSans')
+        # Nothing covers it: the font itself draws its missing glyph
+        self.assertEqual(self.fallback.font_for(0x1F4E7, 'Times-Roman'), 'Times-Roman')
+
+    def test_runs(self):
+        self.assertEqual(self.fallback.runs('Ndèye Diop', 'Times-Roman'), [('Ndèye Diop', 'Times-Roman')])
+        self.assertEqual(self.fallback.runs('Ngoŋ d’Ɓambey', 'Times-Roman'),
+                         [('Ngo', 'Times-Roman'), ('ŋ', 'Turkish-Roman'), (' d', 'Times-Roman'),
+                          ('’', 'Turkish-Roman'), ('Ɓ', 'DejaVuSans'), ('ambey', 'Times-Roman')])
+
+    def test_fallback_glyphs_are_measured_with_their_font(self):
+        measurer = TextMeasurer(fallback=self.fallback)
+        expected = self.fallback.font('DejaVuSans').text_length('ɓ', fontsize=10)
+        self.assertAlmostEqual(measurer.text_width('ɓ', 'Times-Roman', 10), expected, places=3)
+
+    def test_display_list_places_runs_side_by_side(self):
+        display_list = DisplayList(200, 100)
+        display_list.text(10, 50, 'Ngoŋ', 'Times-Roman', 10, (0, 0, 0))
+
+        ops = list(display_list)
+        self.assertEqual([(op[3], op[4]) for op in ops], [('Ngo', 'Times-Roman'), ('ŋ', 'Turkish-Roman')])
+        self.assertEqual(ops[0][1], 10)
+        self.assertAlmostEqual(ops[1][1], 10 + fitz.Font('Times-Roman').text_length('Ngo', fontsize=10), places=3)
+        self.assertEqual(display_list.fonts(), {'Times-Roman', 'Turkish-Roman'})
+
+
+class FallbackRenderingTestCase(AppTestCase):
+    context = 'request'
+
+    def test_every_character_is_drawn(self):
+        """Characters missing from the base-14 fonts are drawn, not replaced by a dot"""
+        pdf = CVGenerator(CV_DATA, None, 'fr').render()
+
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            text = doc[0].get_text()
+            fonts = {font[3] for font in doc.get_page_fonts(0)}
+
+        self.assertIn('Ngoŋ', text)
+        self.assertIn('d’expérience', text)
+        self.assertIn('20 000 €', text)
+        # Only the fallback fonts that were needed are embedded, not DejaVu Sans or the italic
+        self.assertEqual(fonts, {'Helvetica-Bold', 'Times-Roman', 'Oswald Regular', 'Open Sans Regular'})
+
+    def test_glyph_tables_reused_across_documents(self):
+        with fitz.open() as doc:
+            page = doc.new_page()
+            xref = font_registry.insert_font(page, 'Turkish-Roman')
+            page.insert_text((50, 50), '•', fontname='Turkish-Roman')
+            font_registry.keep_glyph_tables(doc, {'Turkish-Roman': xref})
+
+        tables = []
+        for _ in range(2):
+            with fitz.open() as doc:
+                xref = font_registry.insert_font(doc.new_page(), 'Turkish-Roman')
+                tables.append(fitz.CheckFontInfo(doc, xref)[1]['glyphs'])
+        self.assertGreater(len(tables[0]), ord('•'))
+        # Every document gets its own copy of the shared table
+        self.assertIsNot(tables[0], tables[1])
+        self.assertIsNot(tables[0], font_registry._glyph_tables['Turkish-Roman'])
+
+
+if __name__ == '__main__':
+    unittest.main()
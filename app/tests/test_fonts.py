@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import fitz
+
+from app.fonts import FontRegistry, FONTS_DIR, FONT_FILES
+
+
+class FontRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = FontRegistry()
+
+    def test_all_known_fonts_exist(self):
+        """Every registered font name points to a shipped font file"""
+        for name in FONT_FILES:
+            self.assertTrue(os.path.exists(self.registry.path_for(name)), name)
+
+    def test_buffer_loaded_once(self):
+        """The first lookup reads the file, later lookups hit the cache"""
+        first = self.registry.get_buffer('Turkish-Bold')
+        second = self.registry.get_buffer('Turkish-Bold')
+
+        self.assertIs(first, second)
+        self.assertEqual(self.registry.misses, 1)
+        self.assertEqual(self.registry.hits, 1)
+        with open(os.path.join(FONTS_DIR, 'Turkish-Bold.ttf'), 'rb') as f:
+            self.assertEqual(first, f.read())
+
+    def test_concurrent_lookups_share_one_load(self):
+        """Threads racing on a cold font still trigger a single disk read"""
+        threads = [threading.Thread(target=self.registry.get_buffer, args=('Turkish-Italic',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.registry.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 7)
+        self.assertEqual(stats['fonts'], ['Turkish-Italic'])
+
+    def test_insert_font_does_not_depend_on_cwd(self):
+        """Fonts can be registered on a page whatever the working directory is"""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                doc = fitz.open()
+                page = doc.new_page()
+                self.registry.insert_font(page, 'Turkish-Roman')
+                page.insert_text((50, 50), 'İletişim Bilgileri', fontname='Turkish-Roman')
+            finally:
+                os.chdir(cwd)
+
+    def test_unknown_font(self):
+        with self.assertRaises(KeyError):
+            self.registry.get_buffer('Comic-Sans')
+
+    def test_clear(self):
+        self.registry.preload(['Turkish-Italic'])
+        self.registry.clear()
+        self.assertEqual(self.registry.stats(), {'hits': 0, 'misses': 0, 'fonts': [], 'bytes': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
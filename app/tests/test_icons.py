@@ -0,0 +1,69 @@
+import unittest
+
+import fitz
+
+from app.backends import paint_fitz, rasterize
+from app.cv_generator import CVGenerator
+from app.display_list import DisplayList
+from app.icons import ASCENT, IconLibrary, icon_library
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+class IconLibraryTestCase(unittest.TestCase):
+    def test_paths_prebuilt_once_per_size(self):
+        library = IconLibrary()
+        width, paths = library.paths('email', 12)
+
+        self.assertIs(library.paths('email', 12)[1], paths)
+        self.assertAlmostEqual(width, 1)  # 2 grid units of 24, at 12pt
+        for points, closed in paths:
+            for x, y in points:
+                self.assertTrue(0 <= x <= 12)
+                self.assertTrue(-ASCENT * 12 <= y <= (1 - ASCENT) * 12)
+
+    def test_unknown_icon(self):
+        with self.assertRaises(KeyError):
+            icon_library.paths('fax', 10)
+
+    def test_icon_ops_survive_serialization(self):
+        display_list = DisplayList(100, 100)
+        display_list.icon(10, 20, 'web', 9, (0.2, 0.4, 0.8))
+
+        copy = DisplayList.from_dict(display_list.to_dict())
+        self.assertEqual(list(copy), [('icon', 10, 20, 'web', 9, (0.2, 0.4, 0.8))])
+
+
+class ContactIconsTestCase(AppTestCase):
+    context = 'request'
+
+    def test_contact_icons_are_paths_in_their_color(self):
+        """Only base-14 fonts are used; each contact icon is stroked in its own color"""
+        pdf = CVGenerator(CV_DATA, None, 'fr').render()
+
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            self.assertEqual({font[3] for font in doc.get_page_fonts(0)}, {'Helvetica-Bold', 'Times-Roman'})
+            colors = {tuple(round(c, 1) for c in drawing['color'])
+                      for drawing in doc[0].get_drawings() if drawing['color'] and drawing['width'] < 1}
+
+        self.assertTrue({(0.2, 0.4, 0.8), (0.2, 0.7, 0.2), (0.8, 0.3, 0.3)} <= colors)
+
+    def test_icon_drawn_by_both_backends(self):
+        display_list = DisplayList(40, 40)
+        display_list.icon(8, 30, 'phone', 24, (0, 0, 0))
+
+        with fitz.open() as doc:
+            page = doc.new_page(width=40, height=40)
+            paint_fitz(page, display_list)
+            self.assertEqual(len(page.get_drawings()), len(icon_library.paths('phone', 24)[1]))
+
+        image = rasterize([display_list]).convert('L')
+        self.assertEqual(min(image.crop((8, 10, 32, 30)).getdata()), 0)
+
+    def test_unknown_icon_name(self):
+        generator = CVGenerator(CV_DATA, None, 'fr')
+        with self.assertRaises(ValueError):
+            generator.layout_text('Dakar', 10, icon='📍')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import json
+import tempfile
+import threading
+import unittest
+
+from app import db
+from app.jobs import JobQueue, JobQueueFull
+from app.models import RenderJobState
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+def _fail():
+    raise RuntimeError('boom')
+
+
+class JobQueueTestCase(AppTestCase):
+    def test_sync_backend_runs_inline(self):
+        jobs = JobQueue(self.app, 'sync')
+        job = jobs.submit(lambda a, b: a + b, (2, 3), finish=lambda total: total * 10)
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.result, 50)
+        self.assertIs(jobs.get(job.id), job)
+
+    def test_failure_is_recorded(self):
+        job = JobQueue(self.app, 'sync').submit(_fail)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'boom')
+
+    def test_thread_backend(self):
+        jobs = JobQueue(self.app, 'thread', workers=1)
+        release = threading.Event()
+        job = jobs.submit(release.wait)
+        try:
+            self.assertIn(job.wait('queued', timeout=5), ('running', 'done'))
+            release.set()
+            self.assertEqual(job.wait('running', timeout=5), 'done')
+            self.assertTrue(job.result)
+        finally:
+            release.set()
+            jobs.shutdown()
+
+    def test_queue_is_bounded(self):
+        jobs = JobQueue(self.app, 'thread', workers=1, max_queued=1)
+        release = threading.Event()
+        try:
+            running = jobs.submit(release.wait)
+            running.wait('queued', timeout=5)
+            jobs.submit(release.wait)  # Waits in the queue
+            with self.assertRaises(JobQueueFull):
+                jobs.submit(release.wait)
+        finally:
+            release.set()
+            jobs.shutdown()
+
+    def test_jobs_shared_with_other_workers(self):
+        """The queue of another web worker finds a job in the database, and follows it"""
+        jobs = JobQueue(self.app, 'thread', workers=1)
+        other = JobQueue(self.app, 'sync', poll_interval=0.01)
+        release = threading.Event()
+        try:
+            job = jobs.submit(lambda: release.wait() and {'filename': 'cv.pdf'})
+            snapshot = other.get(job.id)
+            self.assertIsNot(snapshot, job)
+            snapshot = other.wait(snapshot, 'queued', timeout=5)
+            self.assertEqual(snapshot.status, 'running')
+
+            release.set()
+            snapshot = other.wait(snapshot, 'running', timeout=5)
+            self.assertEqual((snapshot.status, snapshot.result), ('done', {'filename': 'cv.pdf'}))
+            self.assertIsNone(other.get('unknown'))
+        finally:
+            release.set()
+            jobs.shutdown()
+
+    def test_cache_hits_not_recorded(self):
+        """Jobs completed from the render cache are finished by their request, without a database write"""
+        job = JobQueue(self.app, 'sync').completed({'filename': 'cv.pdf'})
+
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(RenderJobState, job.id))
+
+    def test_expired_jobs_pruned_by_workers(self):
+        jobs = JobQueue(self.app, 'thread', workers=1, max_age=0)
+        old = JobQueue(self.app, 'sync').submit(lambda: True)
+        try:
+            jobs.submit(lambda: True).wait('queued', timeout=5)
+            jobs.shutdown()  # Waits for the worker, which prunes after its job
+
+            with self.app.app_context():
+                self.assertIsNone(db.session.get(RenderJobState, old.id))
+        finally:
+            jobs.shutdown()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            JobQueue(self.app, 'celery')
+
+
+class RenderJobRoutesTestCase(AppTestCase):
+    config = {'SESSION_COOKIE_SECURE': False, 'PERSIST_GENERATED_CV': False}
+
+    def setUp(self):
+        super().setUp()
+        self.set_session(cv_data=CV_DATA, tester_mode=True)
+
+    def test_background_render(self):
+        """With a background backend /process-pdf answers 202 and the client follows the job"""
+        jobs = self.app.extensions['render_jobs'] = JobQueue(self.app, 'thread', workers=1)
+        try:
+            response = self.client.post('/process-pdf')
+            self.assertEqual(response.status_code, 202)
+            job = response.get_json()
+
+            response = self.client.get(job['events_url'])
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            events = [json.loads(line[len('data: '):]) for line in response.get_data(as_text=True).splitlines()
+                      if line.startswith('data: ')]
+            self.assertEqual(events[-1]['status'], 'done')
+
+            status = self.client.get(job['status_url']).get_json()
+            self.assertEqual(status['status'], 'done')
+
+            response = self.client.get(status['redirect'])
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response.location.endswith('/preview-pdf'))
+            with self.client.session_transaction() as sess:
+                self.assertEqual(sess['generated_cv'], jobs.get(job['id']).result['filename'])
+        finally:
+            jobs.shutdown()
+
+    def test_job_followed_from_another_worker(self):
+        """Status, events and finish requests may reach a worker that did not run the job"""
+        self.app.config['PERSIST_GENERATED_CV'] = True
+        self.app.config['UPLOAD_FOLDER'] = self.enterContext(tempfile.TemporaryDirectory())
+        self.client.post('/process-pdf')
+        with self.client.session_transaction() as sess:
+            job_id = sess['render_job']
+            generated_cv = sess['generated_cv']
+            sess.pop('generated_cv')
+
+        self.app.extensions['render_jobs'] = JobQueue(self.app, 'sync')
+
+        self.assertEqual(self.client.get(f'/render-jobs/{job_id}').get_json()['status'], 'done')
+        self.assertIn('"status": "done"', self.client.get(f'/render-jobs/{job_id}/events').get_data(as_text=True))
+        response = self.client.get(f'/render-jobs/{job_id}/finish')
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['generated_cv'], generated_cv)
+
+    def test_jobs_not_shared_without_persisted_pdfs(self):
+        """Another worker could not serve a PDF kept in memory, so it does not find the job"""
+        self.client.post('/process-pdf')
+        with self.client.session_transaction() as sess:
+            job_id = sess['render_job']
+
+        self.app.extensions['render_jobs'] = JobQueue(self.app, 'sync')
+
+        self.assertEqual(self.client.get(f'/render-jobs/{job_id}').status_code, 404)
+
+    def test_sync_render_redirects(self):
+        response = self.client.post('/process-pdf')
+        self.assertEqual(response.status_code, 302)
+
+    def test_jobs_are_private_to_their_session(self):
+        self.client.post('/process-pdf')
+        with self.client.session_transaction() as sess:
+            job_id = sess['render_job']
+
+        other = self.app.test_client()
+        self.assertEqual(other.get(f'/render-jobs/{job_id}').status_code, 404)
+        self.assertEqual(self.client.get(f'/render-jobs/{job_id}').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from app.benchmarks import benchmark_cases
+from app.cv_generator import CVGenerator
+from app.layout import Block, Flow, Row
+from app.tests.fixtures import AppTestCase, make_cv_data
+
+
+def text_row(height, text='x'):
+    return Row(height, [('text', 0, 0, text, 'Helvetica', 10, (0, 0, 0))])
+
+
+class FlowTestCase(unittest.TestCase):
+    def test_rows_move_to_next_page(self):
+        flow = Flow(first_top=50, top=30, bottom=100)
+        flow.add_rows(*[text_row(20, str(i)) for i in range(5)])
+
+        pages = flow.paginate()
+
+        self.assertEqual([[(y, op[3]) for y, op in page] for page in pages],
+                         [[(50, '0'), (70, '1')], [(30, '2'), (50, '3'), (70, '4')]])
+
+    def test_keep_with_next(self):
+        """A title never ends up alone at the bottom of a page"""
+        flow = Flow(first_top=0, top=0, bottom=50)
+        flow.add_rows(text_row(40, 'filler'))
+        title = text_row(5, 'title')
+        title.keep_with_next = True
+        flow.add_rows(title, text_row(20, 'entry'))
+
+        pages = flow.paginate()
+
+        self.assertEqual([op[3] for _, op in pages[1]], ['title', 'entry'])
+
+    def test_spacers_do_not_create_pages(self):
+        flow = Flow(first_top=0, top=0, bottom=50)
+        flow.add_rows(text_row(40), Row(500))
+        self.assertEqual(len(flow.paginate()), 1)
+
+    def test_rail_is_split_across_pages(self):
+        flow = Flow(first_top=0, top=10, bottom=50)
+        flow.add(Block([text_row(20) for _ in range(4)], rail=(5, (0, 0, 0), 80)))
+
+        pages = flow.paginate()
+        rails = [[(y, op) for y, op in page if op[0] == 'line'] for page in pages]
+
+        self.assertEqual(rails[0], [(0, ('line', 5, 0, 5, 40, (0, 0, 0), 1))])
+        self.assertEqual(rails[1], [(10, ('line', 5, 0, 5, 40, (0, 0, 0), 1))])
+
+
+class PaginationTestCase(AppTestCase):
+    context = 'request'
+
+    def setUp(self):
+        super().setUp()
+        self.cv_data = make_cv_data(experience=[{'company': f'Entreprise {i}', 'position': 'Chef de projet',
+                                                 'start_date': '2015-01-01',
+                                                 'description_': 'Pilotage des projets. ' * 20}
+                                                for i in range(15)])
+
+    def test_long_cv_spans_several_pages(self):
+        """Nothing is clipped at the bottom of the first page any more"""
+        doc = CVGenerator(self.cv_data, None, 'fr').build_document()
+
+        self.assertGreater(len(doc), 1)
+        for page in doc:
+            for block in page.get_text('blocks'):
+                self.assertLessEqual(block[3], page.rect.height)
+        text = ''.join(page.get_text() for page in doc)
+        for i in range(15):
+            self.assertIn(f'Entreprise {i}', text)
+
+    def test_sidebar_repeated_on_continuation_pages(self):
+        doc = CVGenerator(self.cv_data, None, 'fr').build_document()
+        for page in doc:
+            self.assertTrue(any(drawing['fill'] for drawing in page.get_drawings()
+                                if drawing['rect'].x0 == 0 and drawing['rect'].y1 == page.rect.height))
+
+    def test_short_cv_single_page(self):
+        self.cv_data['experience'] = self.cv_data['experience'][:1]
+        doc = CVGenerator(self.cv_data, None, 'fr').build_document()
+        self.assertEqual(len(doc), 1)
+
+    def test_entry_header_kept_with_its_description(self):
+        """No experience, education or certification header is left at the bottom of a page alone"""
+        typical = next(case for case in benchmark_cases() if case.name == 'typical')
+        for cv_data, language in ((self.cv_data, 'fr'), (typical.cv_data, typical.language)):
+            _, main = CVGenerator(cv_data, None, language).layout()
+            page_of = {id(op): number for number, page in enumerate(main.paginate()) for _, op in page}
+
+            entries = [block for block in main.blocks if block.rail is not None and not block.rows[1].is_spacer]
+            self.assertTrue(entries)
+            for block in entries:
+                header, first_line = block.rows[0], block.rows[1]
+                self.assertEqual(page_of[id(header.ops[-1])], page_of[id(first_line.ops[0])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import copy
+import unittest
+
+import fitz
+
+from app.cv_generator import CVGenerator, render_pdf
+from app.layout import Block, Row
+from app.layout_cache import freeze, layout_cache, thaw
+from app.tests.fixtures import AppTestCase, make_cv_data
+
+
+# Two experiences with long descriptions, whose layouts are cached per entry
+CV_DATA = make_cv_data(
+    experience=[
+        {'company': 'SODAGRI', 'position': 'Cheffe de projet', 'start_date': 'Mar 2015 - Jan 2020',
+         'description_': 'Coordination de coopératives rizicoles dans la vallée du fleuve. ' * 3},
+        {'company': 'ISRA', 'position': 'Assistante de recherche', 'start_date': 'Feb 2013 - Feb 2015',
+         'description_': 'Essais variétaux et suivi des parcelles. ' * 3},
+    ],
+    references=[{'name': 'M. Diouf', 'contact': '77 111 22 33', 'company': 'SODAGRI'}])
+
+
+def _content(pdf):
+    with fitz.open(stream=pdf, filetype='pdf') as doc:
+        return [(page.get_text('words'), len(page.get_drawings())) for page in doc]
+
+
+def _layout_misses(cv_data):
+    before = layout_cache.stats()['misses']
+    CVGenerator(cv_data, None, 'fr').layout()
+    return layout_cache.stats()['misses'] - before
+
+
+class LayoutCacheTestCase(AppTestCase):
+    context = 'app'
+
+    def setUp(self):
+        super().setUp()
+        layout_cache.clear()
+
+    def test_thawed_layouts_are_new_objects(self):
+        block = Block([Row(15, [('text', 0, 0, 'a', 'helv', 10, (0, 0, 0))], keep_with_next=True), Row(5)],
+                      rail=(10, (0, 0, 0), 50))
+        frozen = freeze([block])
+
+        first, second = thaw(frozen), thaw(frozen)
+        self.assertIsNot(first[0], second[0])
+        self.assertIsNot(first[0].rows[0].ops, second[0].rows[0].ops)
+        self.assertEqual(freeze(first), frozen)
+
+    def test_only_edited_entries_are_laid_out_again(self):
+        with self.app.test_request_context():
+            _layout_misses(CV_DATA)
+            self.assertEqual(_layout_misses(CV_DATA), 0)
+
+            edited = copy.deepcopy(CV_DATA)
+            edited['experience'][1]['description_'] += 'Rédaction des rapports.'
+            self.assertEqual(_layout_misses(edited), 1)
+
+    def test_replayed_layouts_render_the_same_pdf(self):
+        duplicated = copy.deepcopy(CV_DATA)
+        duplicated['experience'].append(copy.deepcopy(CV_DATA['experience'][0]))
+
+        cold = render_pdf(duplicated, 'fr')
+        warm = render_pdf(duplicated, 'fr')
+        layout_cache.clear()
+        turkish = render_pdf(duplicated, 'tr')
+
+        self.assertEqual(_content(cold), _content(warm))
+        self.assertGreater(layout_cache.stats()['hits'], 0)  # the duplicated entry
+        self.assertNotEqual(_content(cold), _content(turkish))
+
+    def test_identical_entries_keep_their_own_rail(self):
+        duplicated = copy.deepcopy(CV_DATA)
+        duplicated['experience'].append(copy.deepcopy(CV_DATA['experience'][0]))
+
+        with self.app.test_request_context():
+            _, main = CVGenerator(duplicated, None, 'fr').layout()
+            rails = [op for page in main.paginate() for _, op in page if op[0] == 'line' and op[1] == op[3]]
+
+        self.assertEqual(len(rails), 4)  # three experiences and one education entry
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from app.line_breaking import LineBreaker
+from app.text_metrics import TextMeasurer
+
+
+class LineBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.measurer = TextMeasurer()
+        self.breaker = LineBreaker(self.measurer)
+
+    def width(self, text, size=10):
+        return self.measurer.text_width(text, 'Helvetica', size)
+
+    def test_prefix_widths_match_measurer(self):
+        """Substring widths come out of the prefix sums, including glyphs outside the table"""
+        text = "Développeur € İstanbul"
+        prefix = self.breaker.prefix_widths(text, 'Helvetica')
+
+        self.assertEqual(len(prefix), len(text) + 1)
+        self.assertAlmostEqual(prefix[-1] * 10, self.width(text))
+        self.assertAlmostEqual((prefix[12] - prefix[4]) * 10, self.width(text[4:12]))
+
+    def test_wrap_words_greedy(self):
+        text = "Built   and maintained\nthe payment platform used by several teams"
+        max_width = self.width("Built and maintained the")
+
+        lines = self.breaker.wrap_words(text, 'Helvetica', 10, max_width)
+
+        self.assertEqual(lines[0], "Built and maintained the")
+        self.assertEqual(' '.join(lines), ' '.join(text.split()))
+        for line in lines:
+            self.assertLessEqual(self.width(line), max_width)
+
+    def test_wrap_words_keeps_long_words_whole(self):
+        lines = self.breaker.wrap_words("a supercalifragilistic b", 'Helvetica', 10, self.width("abc"))
+        self.assertEqual(lines, ["a", "supercalifragilistic", "b"])
+        self.assertEqual(self.breaker.wrap_words("   ", 'Helvetica', 10, 100), [])
+
+    def test_break_lines_returns_fitting_text_unchanged(self):
+        self.assertEqual(self.breaker.break_lines("Dakar  Senegal", 'Helvetica', 10, 500), ["Dakar  Senegal"])
+
+    def test_break_lines_splits_long_words_by_character(self):
+        """The last piece of a split word continues with the next words"""
+        max_width = self.width("abcdef")
+
+        self.assertEqual(self.breaker.break_lines("abcdefghijkl m n", 'Helvetica', 10, max_width),
+                         ["abcdef", "ghijkl", "m n"])
+        self.assertEqual(self.breaker.break_lines("abcdefgh i j", 'Helvetica', 10, max_width),
+                         ["abcdef", "gh i j"])
+
+    def test_break_lines_splits_emails_before_the_at_sign(self):
+        email = "firstname.lastname@example-company.com"
+        lines = self.breaker.break_lines(email, 'Helvetica', 10, self.width("@example-company.com"))
+        self.assertEqual(lines, ["firstname.lastname", "@example-company.com"])
+
+        narrow = self.breaker.break_lines(email, 'Helvetica', 10, self.width("example"))
+        self.assertEqual(narrow, ["firstnam", "e.lastna", "me", "@exam", "ple-com", "pany.co", "m"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+
+from app.loadtest import LoadStats, STEPS, local_stubs, run_load_test
+from app.tests.fixtures import AppTestCase
+
+
+class LoadTestTestCase(AppTestCase):
+    context = 'app'
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app.config['UPLOAD_FOLDER'] = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_flows_go_through_every_step_with_stubs(self):
+        with local_stubs(self.app):
+            report = run_load_test(self.app, users=2, flows=1, case_names=['minimal'])
+
+        self.assertEqual((report['flows'], report['failed_flows']), (2, 0))
+        self.assertEqual(report['error_rate'], 0.0)
+        self.assertGreater(report['peak_rss_mib'], 0)
+        for route in ('POST /create-cv', 'POST /save-cv-edits', 'POST /generate-professional-summary',
+                      'POST /process-pdf', 'GET /preview-pdf-thumbnail', 'GET /payment-callback',
+                      'GET /download-pdf'):
+            self.assertEqual(report['routes'][route]['count'], 2, route)
+
+        # The real Wave URL is back once the stubs are gone
+        self.assertNotIn('127.0.0.1', self.app.config['WAVE_API_URL'])
+
+    def test_failed_step_ends_the_flow(self):
+        # Nothing listens there: the payment fails and the download is never reached
+        self.app.config['WAVE_API_URL'] = 'http://127.0.0.1:9'
+        report = run_load_test(self.app, users=1, flows=1, case_names=['minimal'],
+                               steps=[step for step in STEPS if step != 'summary'])
+
+        self.assertEqual(report['failed_flows'], 1)
+        self.assertEqual(report['routes']['POST /initiate-payment']['errors'], 1)
+        self.assertNotIn('GET /download-pdf', report['routes'])
+        self.assertGreater(report['error_rate'], 0)
+
+    def test_route_percentiles(self):
+        stats = LoadStats()
+        for ms in (10, 20, 30, 40):
+            stats.record('GET /', ms / 1000, ok=ms != 40)
+
+        route = stats.routes()['GET /']
+        self.assertEqual((route['count'], route['errors']), (4, 1))
+        self.assertEqual((route['p50_ms'], route['p99_ms'], route['max_ms']), (30.0, 40.0, 40.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import fitz
+
+from app.cv_generator import CVGenerator
+from app.output_profiles import OUTPUT_PROFILES, get_output_profile
+from app.tests.fixtures import CV_DATA, AppTestCase
+from app.tracing import get_render_tracer
+
+
+class OutputProfileTestCase(AppTestCase):
+    context = 'request'
+
+    def render(self, profile=None, language='fr'):
+        return CVGenerator(CV_DATA, None, language, output_profile=profile).render()
+
+    def test_default_profile_from_config(self):
+        self.assertEqual(get_output_profile().name, 'web')
+        self.app.config['PDF_OUTPUT_PROFILE'] = 'print'
+        self.assertEqual(get_output_profile().name, 'print')
+        self.assertIs(get_output_profile('archive'), OUTPUT_PROFILES['archive'])
+
+        with self.assertRaises(ValueError):
+            get_output_profile('fax')
+
+    def test_linearize_applies_to_every_profile(self):
+        self.app.config['PDF_LINEARIZE'] = True
+        self.assertTrue(get_output_profile('print').linear)
+        self.assertFalse(OUTPUT_PROFILES['print'].linear)
+
+    def test_web_profile_subsets_fonts(self):
+        """The Turkish fonts are no longer embedded whole, and the content is unchanged"""
+        web = self.render('web', language='tr')
+        archive = self.render('archive', language='tr')
+
+        self.assertLess(len(web), 64 * 1024)
+        self.assertGreater(len(archive), 256 * 1024)
+
+        with fitz.open(stream=web, filetype='pdf') as small, fitz.open(stream=archive, filetype='pdf') as full:
+            self.assertEqual(small[0].get_text('words'), full[0].get_text('words'))
+            self.assertEqual(small[0].get_pixmap(dpi=50).samples, full[0].get_pixmap(dpi=50).samples)
+
+    def test_print_profile_has_no_object_streams(self):
+        pdf = self.render('print', language='tr')
+        self.assertNotIn(b'/ObjStm', pdf)
+        self.assertIn(b'/ObjStm', self.render('web', language='tr'))
+
+    def test_size_reported_on_save_span(self):
+        tracer = get_render_tracer()
+        tracer.clear()
+
+        pdf = self.render('web')
+
+        saves = [event for event in tracer.export_trace()['traceEvents'] if event['name'] == 'save']
+        self.assertEqual(saves[-1]['args'], {'profile': 'web', 'bytes': len(pdf)})
+
+
+if __name__ == '__main__':
+    unittest.main()
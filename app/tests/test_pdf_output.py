@@ -0,0 +1,57 @@
+import os
+import unittest
+from io import BytesIO
+
+from app.cv_generator import CVGenerator, new_cv_filename
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+class PDFOutputTestCase(AppTestCase):
+    config = {'SESSION_COOKIE_SECURE': False}
+    context = 'request'
+
+    def test_render_returns_bytes(self):
+        """Rendering in memory returns a PDF and writes nothing to the upload folder"""
+        before = set(os.listdir(self.app.config['UPLOAD_FOLDER']))
+
+        data = CVGenerator(CV_DATA, None, 'fr').render()
+
+        self.assertTrue(data.startswith(b'%PDF'))
+        self.assertEqual(set(os.listdir(self.app.config['UPLOAD_FOLDER'])), before)
+
+    def test_render_to_sink(self):
+        sink = BytesIO()
+        self.assertIsNone(CVGenerator(CV_DATA, None, 'en').render(sink))
+        self.assertTrue(sink.getvalue().startswith(b'%PDF'))
+
+    def test_filenames_do_not_collide(self):
+        """Two CVs generated in the same second get different names"""
+        names = {new_cv_filename() for _ in range(50)}
+        self.assertEqual(len(names), 50)
+
+    def test_in_memory_preview_and_download(self):
+        """With persistence off, the routes stream the PDF from memory"""
+        self.app.config['PERSIST_GENERATED_CV'] = False
+        with self.client.session_transaction() as sess:
+            sess['cv_data'] = CV_DATA
+            sess['tester_mode'] = True
+
+        response = self.client.post('/process-pdf')
+        self.assertEqual(response.status_code, 302)
+
+        with self.client.session_transaction() as sess:
+            filename = sess['generated_cv']
+        self.assertFalse(os.path.exists(os.path.join(self.app.config['UPLOAD_FOLDER'], filename)))
+
+        response = self.client.get('/preview-pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertTrue(response.data.startswith(b'%PDF'))
+
+        response = self.client.get('/download-pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'attachment; filename={filename}', response.headers['Content-Disposition'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import re
+import tempfile
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from app.cv_generator import CVGenerator
+from app.photos import PHOTO_MAX_SIZE, PhotoCache, normalize_photo, save_photo
+from app.tests.fixtures import AppTestCase
+
+
+def make_jpeg(width, height, orientation=None, color=(200, 30, 30)):
+    img = Image.new('RGB', (width, height), color)
+    stream = BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation  # Orientation tag
+        img.save(stream, format='JPEG', exif=exif)
+    else:
+        img.save(stream, format='JPEG')
+    stream.seek(0)
+    return stream
+
+
+class PhotoPipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalize_downscales_and_keeps_ratio(self):
+        photo = normalize_photo(make_jpeg(1200, 600))
+        self.assertEqual((photo.width, photo.height), (PHOTO_MAX_SIZE, PHOTO_MAX_SIZE // 2))
+        self.assertEqual(Image.open(BytesIO(photo.data)).format, 'PNG')
+
+    def test_normalize_applies_exif_orientation(self):
+        """A landscape JPEG tagged 'rotate 90' comes out as a portrait"""
+        photo = normalize_photo(make_jpeg(400, 200, orientation=6))
+        self.assertGreater(photo.height, photo.width)
+
+    def test_small_photo_not_upscaled(self):
+        photo = normalize_photo(make_jpeg(50, 80))
+        self.assertEqual((photo.width, photo.height), (50, 80))
+
+    def test_save_photo_is_content_addressed(self):
+        first = save_photo(make_jpeg(300, 300), self.tmp.name)
+        same = save_photo(make_jpeg(300, 300), self.tmp.name)
+        other = save_photo(make_jpeg(300, 300, color=(10, 10, 200)), self.tmp.name)
+
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(os.listdir(os.path.dirname(first))), 2)
+
+    def test_cache_reads_stored_photo_once(self):
+        path = save_photo(make_jpeg(300, 300), self.tmp.name)
+        cache = PhotoCache()
+
+        photo = cache.load(path)
+        os.remove(path)  # served from memory from now on
+
+        self.assertIs(cache.load(path), photo)
+
+
+class ProfilePictureLayoutTestCase(AppTestCase):
+    context = 'app'
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_photo_inserted_from_memory(self):
+        """The photo is embedded without writing any intermediate file"""
+        path = save_photo(make_jpeg(640, 480), self.tmp.name)
+        cv_data = {
+            'personal_info': {'first_name': 'Aminata', 'last_name': 'Diallo', 'email': '', 'phone': '',
+                              'address': '', 'city': ''},
+            'education': [], 'experience': [], 'skills': [], 'languages': [],
+            'certifications': [], 'hobbys': [], 'references': [], 'softwares': []
+        }
+        cwd_before = set(os.listdir('.'))
+
+        doc = CVGenerator(cv_data, None, 'en', photo_path=path).build_document()
+
+        self.assertEqual(len(doc[0].get_images()), 1)
+        self.assertEqual(set(os.listdir('.')), cwd_before)
+
+
+class PhotoUploadTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app.config['UPLOAD_FOLDER'] = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def post_form(self, photo):
+        page = self.client.get('/create-cv').get_data(as_text=True)
+        token = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', page).group(1)
+        form = {'csrf_token': token, 'first_name': 'Aminata', 'last_name': 'Diallo',
+                'email': 'aminata@example.com', 'phone': '770000000', 'address': 'Dakar', 'city': 'Dakar',
+                'professional_summary': '', 'photo': (photo, 'photo.jpg')}
+        return self.client.post('/create-cv', data=form, content_type='multipart/form-data')
+
+    def test_valid_photo_saved(self):
+        response = self.post_form(make_jpeg(300, 300))
+
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as sess:
+            self.assertTrue(os.path.exists(sess['photo_path']))
+
+    def test_invalid_photo_rejected(self):
+        response = self.post_form(BytesIO(b'not an image'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Photo illisible', response.get_data(as_text=True))
+        with self.client.session_transaction() as sess:
+            self.assertNotIn('photo_path', sess)
+            self.assertNotIn('cv_data', sess)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
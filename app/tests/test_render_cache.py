@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.pdf_store import get_cv_store
+from app.render_cache import RenderCache, render_cache_key, get_render_cache
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+class RenderCacheKeyTestCase(unittest.TestCase):
+    def test_key_ignores_dict_order(self):
+        reordered = dict(reversed(list(CV_DATA.items())))
+        self.assertEqual(render_cache_key(CV_DATA, 'fr'), render_cache_key(reordered, 'fr'))
+
+    def test_key_depends_on_language_template_and_photo(self):
+        base = render_cache_key(CV_DATA, 'fr')
+        self.assertNotEqual(base, render_cache_key(CV_DATA, 'en'))
+        self.assertNotEqual(base, render_cache_key(CV_DATA, 'fr', template='template2'))
+
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as photo:
+            photo.write(b'first photo')
+        try:
+            with_photo = render_cache_key(CV_DATA, 'fr', photo_path=photo.name)
+            self.assertNotEqual(base, with_photo)
+
+            # Same path, new content: the key must change
+            with open(photo.name, 'wb') as f:
+                f.write(b'second photo')
+            self.assertNotEqual(with_photo, render_cache_key(CV_DATA, 'fr', photo_path=photo.name))
+        finally:
+            os.remove(photo.name)
+
+
+class RenderCacheTestCase(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = RenderCache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', b'%PDF-a')
+        self.assertEqual(cache.get('a').pdf, b'%PDF-a')
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_lru_eviction_by_size(self):
+        cache = RenderCache(max_bytes=25)
+        cache.put('a', b'x' * 10)
+        cache.put('b', b'x' * 10)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.put('c', b'x' * 10)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['bytes'], 20)
+
+    def test_lru_eviction_by_entries(self):
+        cache = RenderCache(max_entries=2)
+        for key in 'abc':
+            cache.put(key, b'x')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a'))
+
+    def test_derived_data_is_built_once_and_dropped_with_the_artifact(self):
+        cache = RenderCache()
+        cache.put('a', b'%PDF-a')
+        builds = []
+
+        def build(pdf):
+            builds.append(pdf)
+            return b'thumb'
+
+        self.assertEqual(cache.derive('a', 'thumbnail', build), b'thumb')
+        self.assertEqual(cache.derive('a', 'thumbnail', build), b'thumb')
+        self.assertEqual(builds, [b'%PDF-a'])
+        self.assertEqual(cache.stats()['bytes'], len(b'%PDF-a') + len(b'thumb'))
+
+        cache.invalidate('a')
+        self.assertIsNone(cache.derive('a', 'thumbnail', build))
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+
+class CachedGenerationTestCase(AppTestCase):
+    config = {'PERSIST_GENERATED_CV': False}
+    context = 'request'
+
+    def render(self, language):
+        """Render through the job queue, as /process-pdf does, and return the generated PDF"""
+        from app.routes import submit_render_job
+
+        job = submit_render_job(CV_DATA, language)
+        self.assertEqual(job.status, 'done', job.error)
+        return get_cv_store().get(job.result['filename'])
+
+    def test_repeated_render_is_served_from_cache(self):
+        first = self.render('fr')
+
+        with patch('app.cv_generator.render_pdf') as render_pdf:
+            second = self.render('fr')
+            render_pdf.assert_not_called()
+
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertEqual(first, second)
+        stats = get_render_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_changed_language_renders_again(self):
+        self.assertNotEqual(self.render('fr'), self.render('en'))
+        self.assertEqual(get_render_cache().stats()['misses'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import session
+
+from app.session_store import MemorySessionStore, SQLiteSessionStore, init_session_store
+from app.tests.fixtures import AppTestCase, make_cv_data
+
+
+# Long enough that it would not fit in a cookie
+CV_DATA = make_cv_data({'professional_summary': 'Ingénieure logicielle avec huit ans d\'expérience. ' * 100})
+
+
+class SessionStoreTestCase(unittest.TestCase):
+    def test_memory_store_lru_and_expiry(self):
+        store = MemorySessionStore(max_entries=2)
+        store.put('a', '1', 60)
+        store.put('b', '2', 60)
+        store.get('a')
+        store.put('c', '3', 60)
+
+        self.assertEqual((store.get('a'), store.get('b'), store.get('c')), ('1', None, '3'))
+
+        store.put('d', '4', 0)
+        self.assertIsNone(store.get('d'))
+
+    def test_sqlite_store_shared_by_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sessions.sqlite3')
+            SQLiteSessionStore(path).put('a', '{"cv_data": {}}', 60)
+
+            store = SQLiteSessionStore(path)
+            self.assertEqual(store.get('a'), '{"cv_data": {}}')
+            store.put('b', '2', -1)
+            self.assertIsNone(store.get('b'))
+            self.assertEqual(len(store), 1)
+
+            store.delete('a')
+            self.assertIsNone(store.get('a'))
+
+
+class ServerSideSessionTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = self.app.extensions['session_store']
+
+    def session_cookie(self):
+        return self.client.get_cookie('session').value
+
+    def test_cv_data_kept_out_of_the_cookie(self):
+        response = self.client.post('/save-cv-edits', json=CV_DATA)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertLess(len(self.session_cookie()), 200)
+        self.assertEqual(len(self.store), 1)
+        self.assertIn(b'Awa', self.client.get('/preview-cv').data)
+
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['cv_data'], CV_DATA)
+
+    def test_loaded_only_by_routes_using_cv_data(self):
+        self.client.post('/save-cv-edits', json=CV_DATA)
+
+        with patch.object(self.store, 'get', wraps=self.store.get) as get:
+            self.client.get('/templates')
+            self.assertEqual(get.call_count, 0)
+
+            self.client.get('/preview-cv')
+            self.assertEqual(get.call_count, 1)
+
+    def test_sessions_do_not_share_cv_data(self):
+        self.client.post('/save-cv-edits', json=CV_DATA)
+
+        other = self.app.test_client()
+        response = other.get('/preview-cv')
+        self.assertEqual(response.status_code, 302)
+
+    def test_clear_deletes_server_entry(self):
+        self.app.add_url_rule('/clear', 'clear', lambda: session.clear() or '')
+        self.client.post('/save-cv-edits', json=CV_DATA)
+        self.assertEqual(len(self.store), 1)
+
+        self.client.get('/clear')
+
+        self.assertEqual(len(self.store), 0)
+        with self.client.session_transaction() as sess:
+            self.assertNotIn('cv_data', sess)
+            self.assertEqual(dict(sess), {})
+
+    def test_update_keeps_server_values(self):
+        """Updating one server key saves the others back too"""
+        self.app.config['SESSION_SERVER_KEYS'] = ('cv_data', 'notes')
+        init_session_store(self.app)
+        self.store = self.app.extensions['session_store']
+        self.app.add_url_rule('/notes', 'notes', lambda: session.update(notes='relire', lang='en') or '')
+        self.client.post('/save-cv-edits', json=CV_DATA)
+
+        self.client.get('/notes')
+
+        with self.client.session_transaction() as sess:
+            self.assertEqual((sess['cv_data'], sess['notes'], sess['lang']), (CV_DATA, 'relire', 'en'))
+            self.assertIn('cv_data', list(sess))  # Iteration loads the server values too
+        self.assertEqual(len(self.store), 1)
+
+    def test_cookie_store(self):
+        self.app.config['SESSION_STORE'] = 'cookie'
+        init_session_store(self.app)
+        self.assertIsNone(self.app.extensions['session_store'])
+
+        self.client.post('/save-cv-edits', json=CV_DATA)
+        self.assertGreater(len(self.session_cookie()), 200)
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['cv_data'], CV_DATA)
+
+    def test_unknown_store(self):
+        self.app.config['SESSION_STORE'] = 'redis'
+        with self.assertRaises(ValueError):
+            init_session_store(self.app)
+
+
+if __name__ == '__main__':
+    unittest.main()
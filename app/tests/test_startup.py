@@ -0,0 +1,38 @@
+import unittest
+
+from app.startup import measure_startup, parse_importtime
+from app.tests.fixtures import AppTestCase
+
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       950 |       1070 |   flask
+import time:      2000 |       3070 | app
+"""
+
+
+class StartupTestCase(AppTestCase):
+    def test_parse_importtime(self):
+        self.assertEqual(parse_importtime(IMPORTTIME),
+                         [('_io', 2, 0.12, 0.12), ('flask', 1, 0.95, 1.07), ('app', 0, 2.0, 3.07)])
+
+    def test_measure_startup(self):
+        """Rendering, Gemini and payment dependencies are imported by the requests needing them"""
+        result = measure_startup('testing')
+
+        # The time budget is enforced by `flask cv startup`, not by the unit tests
+        self.assertEqual(set(result), {'create_app_ms', 'heavy_modules', 'slowest'})
+        self.assertGreater(result['create_app_ms'], 0)
+        self.assertEqual(result['heavy_modules'], [])
+        self.assertIn('app', [module for module, _ in result['slowest']])
+        self.assertTrue(all(ms > 0 for _, ms in result['slowest']))
+
+    def test_startup_command(self):
+        result = self.app.test_cli_runner().invoke(args=['cv', 'startup', '--budget', '0'])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('create_app:', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
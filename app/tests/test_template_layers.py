@@ -0,0 +1,52 @@
+import unittest
+
+import fitz
+
+from app.cv_generator import CVGenerator
+from app.template_layers import TemplateLayerCache, template_layers
+from app.tests.fixtures import CV_DATA, AppTestCase
+
+
+def _draw_box(page):
+    page.draw_rect(fitz.Rect(0, 0, 100, page.rect.height), color=(0, 0, 0), fill=(0.5, 0.5, 0.5))
+
+
+class TemplateLayerCacheTestCase(AppTestCase):
+    context = 'app'
+
+    def test_layer_is_drawn_once_per_key(self):
+        cache = TemplateLayerCache()
+        calls = []
+
+        def draw(page):
+            calls.append(page.rect)
+            _draw_box(page)
+
+        first = cache.get(('template1', 'fr', 595, 842), draw, 595, 842)
+        self.assertIs(cache.get(('template1', 'fr', 595, 842), draw, 595, 842), first)
+        cache.get(('template1', 'tr', 595, 842), draw, 595, 842)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(cache), 2)
+
+        with cache.open(('template1', 'fr', 595, 842), draw, 595, 842) as doc:
+            self.assertEqual(doc.page_count, 1)
+            self.assertEqual(tuple(doc[0].rect), (0, 0, 595, 842))
+            self.assertTrue(doc[0].get_drawings())
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_rendered_pages_reference_the_skeleton(self):
+        template_layers.clear()
+        with self.app.test_request_context():
+            pdf = CVGenerator(CV_DATA, self.app.config['UPLOAD_FOLDER'], 'fr').render()
+
+        self.assertEqual(len(template_layers), 1)
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            for page in doc:
+                self.assertTrue(any(xobj[1].startswith('fzFrm') for xobj in page.get_xobjects()))
+
+
+if __name__ == '__main__':
+    unittest.main()
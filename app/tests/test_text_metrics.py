@@ -0,0 +1,47 @@
+import unittest
+
+import fitz
+
+from app.fonts import font_registry
+from app.text_metrics import TextMeasurer, TABLE_SIZE
+
+
+class TextMeasurerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.measurer = TextMeasurer()
+
+    def test_base14_widths_match_fitz(self):
+        """Widths match what fitz computes for the base-14 fonts we draw with"""
+        text = "Expérience professionnelle: Développeur Python (Dakar)"
+        for font_name in ('Helvetica-Bold', 'Times-Roman', 'Times-Italic'):
+            expected = fitz.Font(font_name).text_length(text, fontsize=10)
+            self.assertAlmostEqual(self.measurer.text_width(text, font_name, 10), expected, places=3)
+
+    def test_turkish_font_uses_its_own_metrics(self):
+        """Turkish text is measured with the embedded Turkish font, not Helvetica"""
+        text = "İletişim Bilgileri Ağustos Şubat"
+        font = fitz.Font(fontbuffer=font_registry.get_buffer('Turkish-Roman'))
+
+        self.assertAlmostEqual(self.measurer.text_width(text, 'Turkish-Roman', 10),
+                               font.text_length(text, fontsize=10), places=3)
+        self.assertNotAlmostEqual(self.measurer.text_width(text, 'Turkish-Roman', 10),
+                                  self.measurer.text_width(text, 'Helvetica', 10), places=1)
+
+    def test_metrics_built_once_per_font(self):
+        first = self.measurer.metrics('Times-Roman')
+        self.assertIs(first, self.measurer.metrics('Times-Roman'))
+
+    def test_codepoints_outside_table_use_fallback(self):
+        """Rare glyphs are looked up once and kept in the fallback dict"""
+        metrics = self.measurer.metrics('Helvetica')
+        text = "a€—b"  # euro sign and em dash are outside the dense table
+        self.assertGreaterEqual(ord('€'), TABLE_SIZE)
+
+        width = metrics.text_width(text, 10)
+
+        self.assertIn(ord('€'), metrics.fallback)
+        self.assertAlmostEqual(width, sum(metrics.advance(ord(c)) for c in text) * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from io import BytesIO
+
+import fitz
+from PIL import Image
+
+from app.tests.fixtures import CV_DATA, AppTestCase
+from app.thumbnails import render_thumbnail
+
+
+def _pdf():
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    return doc.tobytes()
+
+
+class RenderThumbnailTestCase(unittest.TestCase):
+    def test_size_follows_dpi_and_max_size(self):
+        image = Image.open(BytesIO(render_thumbnail(_pdf(), dpi=72)))
+        self.assertEqual(image.size, (595, 842))
+
+        image = Image.open(BytesIO(render_thumbnail(_pdf(), dpi=144, max_size=421)))
+        self.assertEqual(max(image.size), 421)
+
+    def test_formats(self):
+        for image_format, pil_format in (('png', 'PNG'), ('jpeg', 'JPEG'), ('webp', 'WEBP')):
+            data = render_thumbnail(_pdf(), image_format=image_format)
+            self.assertEqual(Image.open(BytesIO(data)).format, pil_format)
+
+        with self.assertRaises(ValueError):
+            render_thumbnail(_pdf(), image_format='gif')
+
+
+class ThumbnailRouteTestCase(AppTestCase):
+    config = {'SESSION_COOKIE_SECURE': False, 'PERSIST_GENERATED_CV': False}
+
+    def setUp(self):
+        super().setUp()
+        self.set_session(cv_data=CV_DATA, tester_mode=True)
+
+    def test_thumbnail_is_cached_with_the_render(self):
+        self.client.post('/process-pdf')
+        cache = self.app.extensions['render_cache']
+
+        first = self.client.get('/preview-pdf-thumbnail')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.mimetype, 'image/png')
+        cached_bytes = cache.stats()['bytes']
+
+        second = self.client.get('/preview-pdf-thumbnail')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(cache.stats()['bytes'], cached_bytes)
+
+        # A thumbnail is rebuilt once its render is evicted
+        cache.clear()
+        third = self.client.get('/preview-pdf-thumbnail')
+        self.assertEqual(third.data, first.data)
+
+    def test_webp_thumbnail(self):
+        self.app.config['THUMBNAIL_FORMAT'] = 'webp'
+        self.client.post('/process-pdf')
+
+        response = self.client.get('/preview-pdf-thumbnail')
+        self.assertEqual(response.mimetype, 'image/webp')
+
+
+if __name__ == '__main__':
+    unittest.main()
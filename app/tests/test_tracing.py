@@ -0,0 +1,71 @@
+import unittest
+
+from app.cv_generator import CVGenerator
+from app.tests.fixtures import CV_DATA, AppTestCase
+from app.tracing import Tracer
+
+
+class TracerTestCase(unittest.TestCase):
+    def test_histogram(self):
+        tracer = Tracer()
+        for ms in (0.05, 3, 3, 40):
+            tracer.record('stage', 0, int(ms * 1e6))
+
+        stats = tracer.stats()['stage']
+        self.assertEqual(stats['count'], 4)
+        self.assertAlmostEqual(stats['total_ms'], 46.05)
+        self.assertEqual(stats['max_ms'], 40)
+        self.assertEqual(stats['p50_ms'], 5)
+        self.assertEqual(stats['p99_ms'], 40)
+        self.assertEqual(stats['histogram']['le_0.1'], 1)
+        self.assertEqual(stats['histogram']['le_5'], 2)
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span('stage'):
+            pass
+        self.assertEqual(tracer.stats(), {})
+        self.assertEqual(tracer.export_trace()['traceEvents'], [])
+
+    def test_export_is_bounded(self):
+        tracer = Tracer(max_events=3)
+        for i in range(5):
+            with tracer.span('stage', i=i):
+                pass
+
+        events = tracer.export_trace()['traceEvents']
+        self.assertEqual([event['args']['i'] for event in events], [2, 3, 4])
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(tracer.stats()['stage']['count'], 5)
+
+
+class RenderTracingTestCase(AppTestCase):
+    config = {'RENDER_TRACE_ENDPOINTS': True}
+    context = 'app'
+
+    def test_render_stages_are_timed(self):
+        CVGenerator(CV_DATA, None, 'fr').render()
+
+        stages = self.app.extensions['render_tracer'].stats()
+        for stage in ('format', 'layout', 'layout.work_experience', 'layout.education', 'paginate',
+                      'template', 'paint.template', 'paint.ops', 'save', 'render'):
+            self.assertEqual(stages[stage]['count'], 1, stage)
+
+        # Empty sidebar sections are not laid out
+        self.assertNotIn('layout.hobbies', stages)
+
+    def test_endpoints(self):
+        CVGenerator(CV_DATA, None, 'fr').render()
+
+        stats = self.client.get('/debug/render-stats').get_json()
+        self.assertIn('render', stats['stages'])
+
+        trace = self.client.get('/debug/render-trace').get_json()
+        self.assertIn('render', {event['name'] for event in trace['traceEvents']})
+
+        self.app.config['RENDER_TRACE_ENDPOINTS'] = False
+        self.assertEqual(self.client.get('/debug/render-stats').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
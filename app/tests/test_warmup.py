@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch
+
+from app.fonts import font_registry
+from app.tests.fixtures import AppTestCase
+from app.tracing import get_render_tracer
+from app.watermark import watermark_cache
+
+
+class WarmupTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.warmup = self.app.extensions['render_warmup']
+
+    def test_ready_without_warmup(self):
+        response = self.client.get('/ready')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['state'], 'cold')
+
+    def test_not_ready_until_warm(self):
+        self.app.config['PREFORK_WARMUP'] = True
+        self.assertEqual(self.client.get('/ready').status_code, 503)
+
+        self.assertTrue(self.warmup.run(self.app, freeze=False))
+
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['state'], 'warm')
+        self.assertEqual(set(response.json['steps_ms']), {'fonts', 'catalogs', 'templates', 'watermarks', 'renders'})
+
+    def test_resources_loaded(self):
+        self.warmup.run(self.app, freeze=False)
+
+        self.assertEqual(set(font_registry.stats()['fonts']), set(font_registry.font_files))
+        self.assertTrue({'fr', 'en', 'tr'} <= set(watermark_cache._overlays))
+        self.assertEqual(len(self.app.jinja_env.cache), len(self.app.jinja_env.list_templates(extensions=['html'])))
+        # Warm-up renders are not reported as traffic
+        with self.app.app_context():
+            self.assertEqual(get_render_tracer().stats(), {})
+
+    def test_failed_warmup(self):
+        self.app.config['PREFORK_WARMUP'] = True
+
+        with patch('app.watermark.WatermarkCache.get', side_effect=RuntimeError('no font')):
+            self.assertFalse(self.warmup.run(self.app, freeze=False))
+
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual((response.json['state'], response.json['error']), ('failed', 'no font'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import fitz
+
+from app.tests.fixtures import CV_DATA, AppTestCase
+from app.watermark import WatermarkCache
+
+
+def _text(pdf):
+    with fitz.open(stream=pdf, filetype='pdf') as doc:
+        return ''.join(page.get_text() for page in doc)
+
+
+def _pdf(pages=2):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=595, height=842)
+    return doc.tobytes()
+
+
+class WatermarkCacheTestCase(AppTestCase):
+    context = 'app'
+
+    def test_overlay_is_built_once_per_language(self):
+        cache = WatermarkCache()
+        self.assertIs(cache.get('fr'), cache.get('fr'))
+        self.assertIsNot(cache.get('fr'), cache.get('tr'))
+
+    def test_every_page_is_stamped(self):
+        pdf = WatermarkCache().apply(_pdf(pages=2), 'fr')
+
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            self.assertEqual(doc.page_count, 2)
+            for page in doc:
+                self.assertIn('APERÇU SEULEMENT', page.get_text())
+
+    def test_turkish_overlay(self):
+        """The Turkish overlay embeds its own font, subset to the watermark text"""
+        cache = WatermarkCache()
+        self.assertTrue(_text(cache.apply(_pdf(pages=1), 'tr')).strip())
+        self.assertLess(len(cache.get('tr')), 64 * 1024)
+
+
+class PreviewWatermarkTestCase(AppTestCase):
+    config = {'SESSION_COOKIE_SECURE': False, 'PERSIST_GENERATED_CV': False}
+
+    def setUp(self):
+        super().setUp()
+        self.set_session(cv_data=CV_DATA)
+
+    def test_unpaid_preview_is_watermarked(self):
+        self.client.post('/process-pdf')
+
+        preview = self.client.get('/preview-pdf')
+        self.assertEqual(preview.mimetype, 'application/pdf')
+        self.assertIn('APERÇU SEULEMENT', _text(preview.data))
+
+        # The original stays cached and unwatermarked for after payment
+        with self.client.session_transaction() as sess:
+            key = sess['generated_cv_key']
+            sess['payment_verified'] = True
+        original = self.app.extensions['render_cache'].get(key).pdf
+        self.assertNotIn('APERÇU SEULEMENT', _text(original))
+        self.assertEqual(self.client.get('/preview-pdf').data, original)
+
+    def test_tester_preview_is_not_watermarked(self):
+        self.set_session(tester_mode=True)
+        self.client.post('/process-pdf')
+
+        self.assertNotIn('APERÇU SEULEMENT', _text(self.client.get('/preview-pdf').data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import threading
+from array import array
+
+import fitz
+
+from .font_fallback import font_fallback
+from .fonts import font_registry
+
+# Codepoints below this value get a slot in the dense advance table.
+# It covers Latin-1 and Latin Extended-A/B, so French and Turkish text never
+# has to leave the fast path.
+TABLE_SIZE = 0x250
+
+
+class FontMetrics:
+    """
+    Glyph advance widths of a single font, in units of the font size.
+
+    Common codepoints live in an array indexed by codepoint; anything else is
+    looked up once through fitz and kept in a fallback dict.
+
+    Args:
+        font (fitz.Font): The font
+        glyph_font (callable, optional): Returns the fitz.Font that actually draws a
+            codepoint (see font_fallback.py); by default ``font`` draws everything
+    """
+
+    def __init__(self, font, glyph_font=None):
+        self.font = font
+        self.glyph_font = glyph_font or (lambda codepoint: font)
+        self.advances = array('d', (self.glyph_font(cp).glyph_advance(cp) for cp in range(TABLE_SIZE)))
+        self.fallback = {}
+        self._lock = threading.Lock()
+
+    def advance(self, codepoint):
+        """Return the advance width of a single codepoint at font size 1."""
+        if codepoint < TABLE_SIZE:
+            return self.advances[codepoint]
+
+        width = self.fallback.get(codepoint)
+        if width is None:
+            with self._lock:
+                width = self.fallback.get(codepoint)
+                if width is None:
+                    width = self.fallback[codepoint] = self.glyph_font(codepoint).glyph_advance(codepoint)
+        return width
+
+    def text_width(self, text, size):
+        """Return the width of ``text`` in points when set at ``size``."""
+        try:
+            return sum(map(self.advances.__getitem__, map(ord, text))) * size
+        except IndexError:
+            # At least one character is outside the dense table
+            return sum(map(self.advance, map(ord, text))) * size
+
+
+class TextMeasurer:
+    """
+    Builds FontMetrics lazily, once per font name, and measures strings.
+
+    Font names are the ones passed to ``fontname=`` when drawing: the
+    Turkish fonts come from the font registry, everything else is
+    treated as one of the PDF base-14 fonts (Helvetica, Times-Roman, ...).
+    Characters a font does not cover are measured with the fallback font
+    that draws them.
+    """
+
+    def __init__(self, registry=font_registry, fallback=font_fallback):
+        self.registry = registry
+        self.fallback = fallback
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def metrics(self, font_name):
+        """Return the (cached) FontMetrics for ``font_name``."""
+        metrics = self._metrics.get(font_name)
+        if metrics is not None:
+            return metrics
+
+        with self._lock:
+            metrics = self._metrics.get(font_name)
+            if metrics is None:
+                if font_name in self.registry.font_files:
+                    font = fitz.Font(fontbuffer=self.registry.get_buffer(font_name))
+                else:
+                    font = fitz.Font(font_name)
+                metrics = self._metrics[font_name] = FontMetrics(font, self._glyph_font(font_name, font))
+            return metrics
+
+    def _glyph_font(self, font_name, font):
+        def glyph_font(codepoint):
+            name = self.fallback.font_for(codepoint, font_name)
+            return font if name == font_name else self.fallback.font(name)
+
+        return glyph_font
+
+    def text_width(self, text, font_name, size):
+        """
+        Measure a whole string in one call.
+
+        Args:
+            text (str): The text to measure
+            font_name (str): Font used to draw the text
+            size (float): Font size in points
+
+        Returns:
+            float: Width of the text in points
+        """
+        return self.metrics(font_name).text_width(text, size)
+
+    def preload(self, font_names):
+        """Build the advance tables for the given fonts ahead of time."""
+        for font_name in font_names:
+            self.metrics(font_name)
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+# Shared by every CVGenerator in the process
+text_measurer = TextMeasurer()
@@ -0,0 +1,45 @@
+from io import BytesIO
+
+import fitz
+from PIL import Image
+
+THUMBNAIL_MIMETYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+
+def render_thumbnail(pdf, dpi=72, max_size=None, image_format='png', quality=80):
+    """
+    Render the first page of a PDF to an image, in process.
+
+    Args:
+        pdf (bytes): The PDF document
+        dpi (int): Resolution of the image
+        max_size (int, optional): Largest allowed width/height in pixels; lowers the resolution if needed
+        image_format (str): 'png', 'jpeg' or 'webp'
+        quality (int): Quality of lossy formats, 1-100
+
+    Returns:
+        bytes: The encoded image
+    """
+    if image_format not in THUMBNAIL_MIMETYPES:
+        raise ValueError(f"Unsupported thumbnail format '{image_format}'")
+
+    with fitz.open(stream=pdf, filetype='pdf') as doc:
+        page = doc[0]
+        zoom = dpi / 72
+        if max_size:
+            zoom = min(zoom, max_size / max(page.rect.width, page.rect.height))
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+    if image_format == 'png':
+        return pix.tobytes('png')
+    if image_format == 'jpeg':
+        return pix.tobytes('jpeg', jpg_quality=quality)
+
+    # fitz cannot encode WebP itself
+    output = BytesIO()
+    Image.frombytes('RGB', (pix.width, pix.height), pix.samples).save(output, 'WEBP', quality=quality)
+    return output.getvalue()
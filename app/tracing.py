@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app
+
+# Upper bounds of the histogram buckets, in milliseconds (the last bucket is unbounded)
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class SpanStats:
+    """Aggregated durations of one stage: counters plus a fixed-bucket histogram"""
+    __slots__ = ('count', 'total_ms', 'min_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of its bucket, capped at the maximum"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        histogram = {f"le_{bound}": count for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets)}
+        histogram['inf'] = self.buckets[-1]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'histogram': histogram,
+        }
+
+
+class Tracer:
+    """
+    Lightweight timing spans for the render pipeline.
+
+    Every span updates the histogram of its stage; the most recent spans are
+    also kept (up to ``max_events``) so they can be exported in the Trace
+    Event Format read by chrome://tracing and Perfetto.
+
+    Args:
+        enabled (bool): When False, spans cost a single attribute check
+        max_events (int): Number of recent spans kept for export
+    """
+
+    def __init__(self, enabled=True, max_events=2000):
+        self.enabled = enabled
+        self._stats = {}
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **args):
+        """
+        Time the enclosed block as stage ``name``; ``args`` are attached to the exported event.
+
+        The block receives ``args`` and may add to it, e.g. a size only known at the end.
+        """
+        if not self.enabled:
+            yield args
+            return
+
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            self.record(name, start, time.perf_counter_ns() - start, args)
+
+    def record(self, name, start_ns, duration_ns, args=None):
+        duration_ms = duration_ns / 1e6
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats()
+            stats.add(duration_ms)
+            self._events.append((name, start_ns, duration_ns, threading.get_ident(), args or None))
+
+    def stats(self):
+        """
+        Per-stage aggregates.
+
+        Returns:
+            dict: Stage name -> count, total/mean/min/max, estimated p50/p95/p99
+            (all in milliseconds) and bucket counts
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+    def export_trace(self):
+        """
+        Recent spans as a Trace Event Format document.
+
+        Returns:
+            dict: JSON-serializable trace with one complete ('X') event per span
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+
+        trace_events = []
+        for name, start_ns, duration_ns, tid, args in events:
+            event = {
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': start_ns / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': tid,
+            }
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._events.clear()
+
+
+def get_render_tracer():
+    """Return the render tracer of the current app"""
+    return current_app.extensions['render_tracer']
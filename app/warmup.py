@@ -0,0 +1,127 @@
+"""
+Pre-fork warm-up of the read-only render resources.
+
+With ``gunicorn --preload`` the app is created once in the master process and
+the workers are forked from it. When PREFORK_WARMUP is set, create_app also
+loads everything renders only read: font files, glyph coverage and advance
+tables, the translation catalogs, the compiled Jinja templates, the watermark
+overlays and the template skeletons (drawn by one small render per
+language). Forked workers then share those pages copy-on-write instead of
+each loading its own copy on the first render of a live request.
+
+PyMuPDF only takes font data as bytes, so font files are read once here
+rather than memory-mapped; the bytes are shared the same way.
+"""
+import gc
+import threading
+import time
+
+from flask import current_app
+from flask_babel import force_locale, get_translations
+
+# Enough of a CV for a render to go through every section
+WARMUP_CV = {
+    'personal_info': {
+        'first_name': 'Awa',
+        'last_name': 'Ndiaye',
+        'email': 'awa.ndiaye@example.com',
+        'phone': '+221 77 123 45 67',
+        'address': '12 Rue Carnot',
+        'city': 'Dakar',
+        'professional_summary': 'Ingénieure logicielle, paiements mobiles.'
+    },
+    'education': [{'institution': 'UCAD', 'degree': 'Master Informatique', 'start_date': '2010-09-01',
+                   'end_date': '2012-07-01'}],
+    'experience': [{'company': 'Wave', 'position': 'Ingénieure logicielle', 'start_date': '2015-01-01',
+                    'end_date': '', 'description_': 'Conception des services de paiement.'}],
+    'skills': [{'skill': 'Python'}],
+    'languages': [{'language': 'Wolof', 'level': 'Natif'}],
+    'certifications': [{'name': 'CCNA', 'issuer': 'Cisco', 'date': '2021-05-01'}],
+    'hobbys': [{'name': 'Lecture'}],
+    'references': [{'name': 'M. Sow', 'contact': '77 000 00 00', 'company': 'Sonatel'}],
+    'softwares': [{'name': 'Git', 'proficiency': 'Expert'}]
+}
+
+
+class RenderWarmup:
+    """Warm-up state of an app: 'cold', 'warming', 'warm' or 'failed'"""
+
+    def __init__(self):
+        self.state = 'cold'
+        self.steps = {}  # Step name -> milliseconds
+        self.error = None
+        self._lock = threading.Lock()
+
+    def run(self, app, freeze=True):
+        """
+        Load the read-only render resources of every language, then optionally
+        freeze the garbage collector so that collections in the workers do not
+        write to (and copy) the pages of the objects loaded here.
+
+        Args:
+            app (Flask): The app being created
+            freeze (bool): Move every object tracked so far out of the collected generations
+
+        Returns:
+            bool: True once warm, False if a step failed (the app still serves, rendering cold)
+        """
+        from .cv_generator import TRANSLATIONS, render_pdf
+        from .jobs import preload_render_resources
+        from .watermark import watermark_cache
+
+        languages = tuple(TRANSLATIONS)
+
+        def catalogs():
+            for language in languages:
+                with force_locale(language):
+                    get_translations()
+
+        def templates():
+            for name in app.jinja_env.list_templates(extensions=['html']):
+                app.jinja_env.get_template(name)
+
+        def watermarks():
+            for language in languages:
+                watermark_cache.get(language)
+
+        def renders():
+            for language in languages:
+                render_pdf(WARMUP_CV, language)
+            # Warm-up renders are not traffic
+            app.extensions['render_tracer'].clear()
+
+        with self._lock:
+            self.state, self.error = 'warming', None
+            self.steps.clear()
+
+        start = time.perf_counter()
+        try:
+            with app.app_context():
+                for name, step in (('fonts', preload_render_resources), ('catalogs', catalogs),
+                                   ('templates', templates), ('watermarks', watermarks), ('renders', renders)):
+                    step_start = time.perf_counter()
+                    step()
+                    self.steps[name] = round((time.perf_counter() - step_start) * 1000, 1)
+        except Exception as e:
+            app.logger.exception(f"Render warm-up failed: {e}")
+            with self._lock:
+                self.state, self.error = 'failed', str(e)
+            return False
+
+        if freeze:
+            gc.collect()
+            gc.freeze()
+
+        with self._lock:
+            self.state = 'warm'
+        app.logger.info(f"Render resources warm in {(time.perf_counter() - start) * 1000:.0f} ms: {self.steps}")
+        return True
+
+    def status(self):
+        with self._lock:
+            return {'state': self.state, 'steps_ms': dict(self.steps), 'error': self.error}
+
+
+def get_render_warmup():
+    """Return the render warm-up state of the current app"""
+    return current_app.extensions['render_warmup']
@@ -0,0 +1,81 @@
+import threading
+
+import fitz
+from flask_babel import force_locale, gettext as _
+
+from .fonts import font_registry
+
+# The overlay is drawn on an A4 page and scaled to the pages it is stamped on
+WATERMARK_PAGE_SIZE = (595, 842)
+
+
+def build_watermark(language):
+    """
+    Draw the preview watermark for one language on a transparent one-page PDF.
+
+    Needs an app context for the translations.
+
+    Returns:
+        bytes: The overlay PDF
+    """
+    with force_locale(language):
+        lines = [_("APERÇU SEULEMENT"), _("PAIEMENT REQUIS")]
+
+    doc = fitz.open()
+    page = doc.new_page(width=WATERMARK_PAGE_SIZE[0], height=WATERMARK_PAGE_SIZE[1])
+
+    # Helvetica has no dotted capital I or S cedilla
+    fontname = 'helv'
+    if language == 'tr':
+        fontname = 'Turkish-Roman'
+        font_registry.insert_font(page, fontname)
+
+    # Diagonal text, rising from the left side of the page
+    origin = fitz.Point(100, WATERMARK_PAGE_SIZE[1] - 400)
+    for i, text in enumerate(lines):
+        page.insert_text(origin + (0, i * 100), text, fontsize=60, fontname=fontname, color=(0, 0, 1),
+                         fill_opacity=0.3, morph=(origin, fitz.Matrix(45)))
+
+    doc.subset_fonts()
+    return doc.tobytes(garbage=3, deflate=True)
+
+
+class WatermarkCache:
+    """Watermark overlays built once per language and shared by the whole process"""
+
+    def __init__(self):
+        self._overlays = {}
+        self._lock = threading.Lock()
+
+    def get(self, language):
+        """Return the overlay PDF bytes for ``language``, building them on first use"""
+        overlay = self._overlays.get(language)
+        if overlay is None:
+            overlay = build_watermark(language)
+            with self._lock:
+                overlay = self._overlays.setdefault(language, overlay)
+        return overlay
+
+    def apply(self, pdf, language):
+        """
+        Stamp the watermark of ``language`` over every page of a PDF.
+
+        The overlay is embedded once and referenced from each page, so
+        neither the CV nor the watermark is drawn again.
+
+        Returns:
+            bytes: The watermarked PDF
+        """
+        with fitz.open(stream=self.get(language), filetype='pdf') as overlay, \
+                fitz.open(stream=pdf, filetype='pdf') as doc:
+            for page in doc:
+                page.show_pdf_page(page.rect, overlay, 0)
+            return doc.tobytes(garbage=1)
+
+    def clear(self):
+        with self._lock:
+            self._overlays.clear()
+
+
+# Shared by every request in the process
+watermark_cache = WatermarkCache()